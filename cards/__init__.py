@@ -1,3 +1,5 @@
 from .card import Card, IndexedSymbol
 from .deck import Deck
 from .hand import Hand
+from .mask import PackMasks, card_mask, iter_codes
+from .pack import Pack, PackSource, load_pack, load_shoe
@@ -1,28 +1,60 @@
-from typing import Tuple
-
-
 class IndexedSymbol:
+    __slots__ = ("index", "symbol")
+
     index: int
     symbol: str
 
     def __init__(self, index: int, symbol: str):
-        self.index = int(index)
-        self.symbol = str(symbol)
+        object.__setattr__(self, "index", int(index))
+        object.__setattr__(self, "symbol", str(symbol))
+
+    def __setattr__(self, key: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable!")
+
+    def __reduce__(self):
+        return IndexedSymbol, (self.index, self.symbol)
 
     def __str__(self) -> str:
         return self.symbol
 
-    def __eq__(self, other: "IndexedSymbol") -> bool:
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IndexedSymbol):
+            return NotImplemented
         return self.index == other.index and self.symbol == other.symbol
 
+    def __hash__(self) -> int:
+        return hash((self.index, self.symbol))
+
 
 class Card:
+    __slots__ = ("face", "rank", "code")
+
     face: IndexedSymbol
     rank: IndexedSymbol
-
-    def __init__(self, face: IndexedSymbol, rank: IndexedSymbol):
-        self.face = face
-        self.rank = rank
+    code: int
+    """
+    Compact integer encoding of the card, face index * number of ranks + rank index. Packs with several copies of every
+    card multiply it by the number of copies and add the copy, see Pack.copies.
+    """
+
+    def __init__(self, face: IndexedSymbol, rank: IndexedSymbol, code: int = 0):
+        object.__setattr__(self, "face", face)
+        object.__setattr__(self, "rank", rank)
+        object.__setattr__(self, "code", int(code))
+
+    def __setattr__(self, key: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable!")
+
+    def __reduce__(self):
+        return Card, (self.face, self.rank, self.code)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Card):
+            return NotImplemented
+        return self is other or (self.face == other.face and self.rank == other.rank)
+
+    def __hash__(self) -> int:
+        return hash((self.face.index, self.rank.index))
 
     def __str__(self):
         return f"{self.face}{self.rank}"
@@ -1,50 +1,60 @@
-import json
-from random import shuffle
-from typing import List, Tuple
+from collections import deque
+from random import Random
+from typing import Deque, Iterable, List, Tuple
 
 from .card import Card, IndexedSymbol
+from .mask import PackMasks
+from .pack import Pack, PackSource, load_pack
 
 
 class Deck:
-    cards: List[Card]
-    faces: List[IndexedSymbol]
+    cards: Deque[Card]
+    """ The draw pile. Cards are drawn from the right end, the left end is the bottom. """
+    pack: Pack
+    faces: Tuple[IndexedSymbol, ...]
     """ Faces available in the pack. """
-    ranks: List[IndexedSymbol]
+    ranks: Tuple[IndexedSymbol, ...]
     """ Ranks available in the pack. """
+    by_code: Tuple[Card, ...]
+    """ All cards of the pack, indexed by their code. """
+    masks: PackMasks
+    rng: Random
+    """ Source of randomness for shuffling. """
 
-    def __init__(self, deck_data: any = None):
-        self.cards = []
-        if isinstance(deck_data, str):
-            self.load_deck_file(deck_data)
-        else:
-            raise ValueError("Unknown deck data type!")
+    def __init__(self, deck_data: PackSource = None, rng: Random | None = None):
+        self.cards = deque()
+        self.rng = Random() if rng is None else rng
+        self.use_pack(load_pack(deck_data))
 
     @staticmethod
     def verify_deck_obj(obj: object) -> bool:
-        if "faces" in obj and "ranks" in obj:
-            return True
-        return False
+        return Pack.verify(obj)
+
+    def use_pack(self, pack: Pack) -> None:
+        """ Fill the deck with a fresh, unshuffled copy of the pack's cards. """
+        self.pack = pack
+        self.faces = pack.faces
+        self.ranks = pack.ranks
+        self.by_code = pack.cards
+        self.masks = pack.masks
+        self.cards = deque(pack.cards)
 
     def load_deck_file(self, deck_file: str) -> None:
-        self.cards = []
-        self.faces = []
-        self.ranks = []
-
-        with open(deck_file, "r") as fp:
-            deck_obj = json.load(fp)
-            if not self.verify_deck_obj(deck_obj):
-                raise ValueError("Bad deck file!")
-
-        for f_idx, face in enumerate(deck_obj["faces"]):
-            face_obj = IndexedSymbol(f_idx, face)
-            self.faces.append(face_obj)
-            for r_idx, rank in enumerate(deck_obj["ranks"]):
-                rank_obj = IndexedSymbol(r_idx, rank)
-                self.ranks.append(face_obj)
-                self.cards.append(Card(face_obj, rank_obj))
+        self.use_pack(load_pack(deck_file))
+
+    def rank_index(self, symbol: str) -> int:
+        """ :return: The index of the rank with the given symbol, or -1 if the pack has no such rank. """
+        return self.pack.rank_index(symbol)
+
+    def cards_from_mask(self, mask: int) -> List[Card]:
+        """ :return: The cards of the pack whose bits are set in the mask, ordered by code. """
+        return self.pack.cards_from_mask(mask)
 
     def shuffle(self) -> None:
-        shuffle(self.cards)
+        # Indexing into the middle of a deque is slow, so shuffle a list instead
+        cards = list(self.cards)
+        self.rng.shuffle(cards)
+        self.cards = deque(cards)
 
     def draw(self, count: int = 1) -> List[Card]:
         cards: List[Card] = []
@@ -57,7 +67,11 @@ class Deck:
         return cards
 
     def put_under(self, card: Card):
-        self.cards.insert(0, card)
+        self.cards.appendleft(card)
+
+    def put_cards_under(self, cards: Iterable[Card]) -> None:
+        """ Put cards under the deck, keeping their order, i.e. the first card ends up at the very bottom. """
+        self.cards.extendleft(reversed(cards))
 
     def __str__(self) -> str:
         return f"{len(self.cards)} cards in deck: " + ", ".join([str(card) for card in self.cards])
@@ -1,26 +1,89 @@
-from functools import cmp_to_key
-from typing import List
+from operator import attrgetter
+from typing import Iterable, List
 
 from .card import Card
 from .deck import Deck
 
 
 class Hand(Deck):
+    cards: List[Card]
+    mask: int
+    """
+    Bitmask of the codes of all cards in hand. Players may reorder cards, but adding or removing cards has to go through
+    the methods of the hand, so the mask stays in sync.
+    """
+
     def __init__(self):
         self.cards = []
+        self.mask = 0
         super(Deck, self).__init__()
 
     def sort(self) -> None:
-        def compare(l: Card, r: Card):
-            if l.face == r.face:
-                return l.rank.index - r.rank.index
-            return l.face.index - r.face.index
+        # The code of a card orders by face first, then by rank
+        self.cards.sort(key=attrgetter("code"))
+
+    def add(self, cards: List[Card]) -> None:
+        self.cards += cards
+        for card in cards:
+            self.mask |= 1 << card.code
+
+    def put(self, card: Card) -> None:
+        self.cards.append(card)
+        self.mask |= 1 << card.code
+
+    def take(self, index: int = -1) -> Card:
+        card = self.cards.pop(index)
+        self.mask &= ~(1 << card.code)
+        return card
+
+    def remove(self, card: Card) -> None:
+        """ Take a certain card out of the hand, wherever it is. """
+        cards = self.cards
+        # Cards are shared by everybody playing the pack, so the card itself is in the hand. Looking for it by identity
+        # saves comparing it with all cards before it.
+        for index, held in enumerate(cards):
+            if held is card:
+                break
+        else:
+            # Copies of a card are equal, only their codes tell them apart
+            index = [held.code for held in cards].index(card.code)
+        del cards[index]
+        self.mask &= ~(1 << card.code)
 
-        self.cards.sort(key=cmp_to_key(compare))
+    def collect(self, keep: int = 1) -> List[Card]:
+        """
+        Remove all cards except the last ones.
+        :param keep: The number of cards to keep.
+        :return: The removed cards.
+        """
+        kept = self.cards[-keep:]
+        del self.cards[-keep:]
+        collected = self.cards
+        self.cards = kept
+        self.mask = 0
+        for card in self.cards:
+            self.mask |= 1 << card.code
+        return collected
+
+    def put_under(self, card: Card):
+        self.cards.insert(0, card)
+        self.mask |= 1 << card.code
+
+    def put_cards_under(self, cards: Iterable[Card]) -> None:
+        cards = list(cards)
+        self.cards[:0] = cards
+        for card in cards:
+            self.mask |= 1 << card.code
+
+    def draw(self, count: int = 1) -> List[Card]:
+        drawn_cards = super().draw(count)
+        for card in drawn_cards:
+            self.mask &= ~(1 << card.code)
+        return drawn_cards
 
     def draw_from(self, deck: Deck, count: int = 1) -> List[Card]:
         drawn_cards = deck.draw(count)
-        self.cards += drawn_cards
+        self.add(drawn_cards)
         return drawn_cards
 
     def __str__(self) -> str:
@@ -0,0 +1,39 @@
+from typing import Iterable, Iterator, List
+
+from .card import Card
+
+
+def card_mask(cards: Iterable[Card]) -> int:
+    """ :return: A bitmask with the bit of every given card's code set. """
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.code
+    return mask
+
+
+def iter_codes(mask: int) -> Iterator[int]:
+    """ :return: The codes of all cards in the mask, lowest first. """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PackMasks:
+    """ Precomputed bitmasks of all cards sharing a face or a rank. """
+
+    face_masks: List[int]
+    """ Bitmask of all cards of a face, by face index. """
+    rank_masks: List[int]
+    """ Bitmask of all cards of a rank, by rank index. """
+    all: int
+    """ Bitmask of all cards in the pack. """
+
+    def __init__(self, cards: List[Card], face_count: int, rank_count: int):
+        self.face_masks = [0] * face_count
+        self.rank_masks = [0] * rank_count
+        for card in cards:
+            self.face_masks[card.face.index] |= 1 << card.code
+            self.rank_masks[card.rank.index] |= 1 << card.code
+        self.all = card_mask(cards)
+
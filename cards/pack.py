@@ -0,0 +1,111 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from .card import Card, IndexedSymbol
+from .mask import PackMasks, iter_codes
+
+
+class Pack:
+    """
+    The immutable set of cards a deck is made of. Packs are built once and shared by all decks, so starting a game only
+    copies references to the cards instead of creating them again.
+    """
+
+    path: str | None
+    """ The file the pack was loaded from, if any. """
+    definition: dict
+    """ The faces and ranks the pack was built from, and any other settings, as found in the pack files. """
+    faces: Tuple[IndexedSymbol, ...]
+    """ Faces available in the pack. """
+    ranks: Tuple[IndexedSymbol, ...]
+    """ Ranks available in the pack. """
+    copies: int
+    """ How often every card is in the pack. Copies of a card are equal, but every copy has a code of its own. """
+    cards: Tuple[Card, ...]
+    """ All cards of the pack, indexed by their code. """
+    masks: PackMasks
+
+    def __init__(self, definition: dict, path: str | None = None):
+        if not self.verify(definition):
+            raise ValueError("Bad deck file!")
+        self.path = path
+        self.definition = dict(definition, faces=list(definition["faces"]), ranks=list(definition["ranks"]))
+        self.faces = tuple(IndexedSymbol(f_idx, face) for f_idx, face in enumerate(definition["faces"]))
+        self.ranks = tuple(IndexedSymbol(r_idx, rank) for r_idx, rank in enumerate(definition["ranks"]))
+        self.copies = definition.get("copies", 1)
+        # Copies follow each other, so codes still order cards by face first, then by rank
+        self.cards = tuple(Card(face, rank, (face.index * len(self.ranks) + rank.index) * self.copies + copy)
+                           for face in self.faces for rank in self.ranks for copy in range(self.copies))
+        self.masks = PackMasks(list(self.cards), len(self.faces), len(self.ranks))
+
+    @staticmethod
+    def verify(obj: object) -> bool:
+        return isinstance(obj, dict) and "faces" in obj and "ranks" in obj \
+            and isinstance(obj.get("copies", 1), int) and obj.get("copies", 1) > 0
+
+    @property
+    def source(self) -> str | dict:
+        """ :return: Something that loads this pack again, i.e. its path or its definition. """
+        return self.path if self.path is not None else self.definition
+
+    def rank_index(self, symbol: str) -> int:
+        """ :return: The index of the rank with the given symbol, or -1 if the pack has no such rank. """
+        for rank in self.ranks:
+            if rank.symbol == symbol:
+                return rank.index
+        return -1
+
+    def cards_from_mask(self, mask: int) -> List[Card]:
+        """ :return: The cards of the pack whose bits are set in the mask, ordered by code. """
+        return [self.cards[code] for code in iter_codes(mask)]
+
+
+PackSource = str | dict | Pack
+""" A pack, the path of a pack file or a pack definition. """
+
+_packs: Dict[str, Pack] = {}
+
+
+def load_pack(source: PackSource) -> Pack:
+    """
+    Get a pack, loading it only the first time it is asked for.
+    :param source: The path of a pack file, or an in-memory definition with the same structure.
+    :return: The pack, shared with everybody else who loaded it.
+    """
+    if isinstance(source, Pack):
+        return source
+    if isinstance(source, dict):
+        key = json.dumps(source, sort_keys=True)
+    elif isinstance(source, str):
+        key = os.path.abspath(source)
+    else:
+        raise ValueError("Unknown deck data type!")
+
+    pack = _packs.get(key)
+    if pack is None:
+        if isinstance(source, dict):
+            pack = Pack(source)
+        else:
+            with open(source, "r") as fp:
+                pack = Pack(json.load(fp), path=source)
+        _packs[key] = pack
+    return pack
+
+
+def load_shoe(sources: PackSource | List[PackSource], copies: int = 1) -> Pack:
+    """
+    Get a shoe: several packs shuffled together into one, as needed by tables too large for a single pack.
+    :param sources: The packs to combine, which must all have the same faces and ranks.
+    :param copies: How often to take every pack.
+    :return: A pack holding all cards of all packs, with a code of its own for every physical card.
+    """
+    packs = [load_pack(source) for source in (sources if isinstance(sources, list) else [sources])]
+    if not packs or copies < 1:
+        raise ValueError("A shoe needs at least one pack!")
+    first = packs[0]
+    for pack in packs[1:]:
+        if pack.faces != first.faces or pack.ranks != first.ranks:
+            raise ValueError("The packs of a shoe must have the same faces and ranks!")
+    definition = dict(first.definition, copies=copies * sum(pack.copies for pack in packs))
+    return load_pack(definition)
@@ -1,20 +1,7 @@
-from random import shuffle
-
-from maumau import MauMau
-from maumau import HumanPlayer, StupidAI
-
-
-def main():
-    players = [
-        HumanPlayer("Jan"),
-        StupidAI("Alpha"),
-        StupidAI("Beta"),
-        StupidAI("Gamma"),
-    ]
-    shuffle(players)
-    maumau = MauMau(players)
-    maumau.run()
+import sys
 
+from maumau.__main__ import main
 
 if __name__ == '__main__':
-    main()
+    # Games at the terminal are played with python -m maumau play, which reads input without blocking the game
+    main(["play", "--name", "Jan", *(["--seed", sys.argv[1]] if len(sys.argv) > 1 else [])])
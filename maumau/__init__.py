@@ -1,2 +1,6 @@
+from .async_engine import AsyncMauMau
 from .engine import MauMau
-from .players import BasePlayer, HumanPlayer, StupidAI
+from .events import EventSink, ConsoleSink
+from .players import BasePlayer, EndgameAI, HeuristicAI, HumanPlayer, RemotePlayer, SearchAI, StupidAI
+from .result import GameResult
+from .state import DRAW, GameState, Move, Observation, Snapshot
@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+from collections import Counter
+from typing import List
+
+from cards import PackSource, load_pack, load_shoe
+from . import benchmark as benchmarks
+from . import ConsoleSink, MauMau, StupidAI
+from .columnar import FORMATS, ResultWriter
+from .daemon import DEFAULT_SOCKET, SimulationDaemon
+from .events import MultiSink
+from .instrumentation import MetricsCollector
+from .loadgen import generate_load
+from .replay import GameLogWriter, read_logs, replay
+from .server import GameServer
+from .terminal import play_terminal
+from .tournament import Entrant, Tournament
+from .tuning import Tuner
+
+
+def table_pack(args: argparse.Namespace) -> PackSource:
+    """ :return: The pack to play with, or a shoe if one was asked for or the pack is too small for the players. """
+    if args.copies is not None:
+        return load_shoe(args.pack, args.copies).source
+    if args.players * MauMau.HAND_SIZE >= len(load_pack(args.pack).cards):
+        return MauMau.shoe_for(args.players, args.pack).source
+    return args.pack
+
+
+def simulate(args: argparse.Namespace) -> None:
+    players = [StupidAI(f"AI {idx + 1}") for idx in range(args.players)]
+    args.pack = table_pack(args)
+    metrics = MetricsCollector() if args.metrics else None
+    start = time.perf_counter()
+    if args.vectorized:
+        if args.rules is not None:
+            raise SystemExit("The vectorized engine only plays by the classic rules.")
+        from .vectorized import VectorizedMauMau, StupidPolicy
+
+        engine = VectorizedMauMau([StupidPolicy() for _ in players], games=args.games, pack=args.pack)
+        engine.run(max_turns=args.max_turns)
+        elapsed = time.perf_counter() - start
+        results = engine.results([player.name for player in players])
+    elif args.log or args.results:
+        with contextlib.ExitStack() as stack:
+            sinks = [] if metrics is None else [metrics]
+            if args.log:
+                sinks.append(GameLogWriter(stack.enter_context(open(args.log, "a"))))
+            if args.results:
+                sinks.append(stack.enter_context(ResultWriter(args.results, file_format=args.results_format,
+                                                              turns=args.turns)))
+            results = MauMau.simulate(players, games=args.games, pack=args.pack, sink=MultiSink(*sinks),
+                                      max_turns=args.max_turns, seed=args.seed, rules=args.rules)
+        elapsed = time.perf_counter() - start
+    else:
+        results = MauMau.simulate(players, games=args.games, pack=args.pack, sink=metrics, max_turns=args.max_turns,
+                                  seed=args.seed, rules=args.rules)
+        elapsed = time.perf_counter() - start
+
+    wins = Counter(result.winner for result in results if result.completed)
+    aborted = sum(1 for result in results if not result.completed)
+    print(f"Played {len(results)} games in {elapsed:.3f}s ({len(results) / elapsed:.0f} games/s).")
+    print(f"Average turns per game: {sum(result.turns for result in results) / len(results):.1f}")
+    if aborted:
+        print(f"{aborted} games hit the turn limit and were aborted.")
+    for player in players:
+        print(f"{player.name}: {wins[player.name]} wins ({wins[player.name] / len(results):.1%})")
+    if metrics is not None:
+        print_metrics(metrics)
+
+
+def print_metrics(metrics: MetricsCollector) -> None:
+    turns = metrics.turn_times
+    print(f"Turns: {turns.count}, mean {turns.mean / 1000:.1f}us, p99 below {turns.percentile(.99) / 1000:.1f}us")
+    print(f"Events: {', '.join(f'{event} {count}' for event, count in metrics.events.most_common())}")
+    for name, mean_ns in metrics.slowest_players():
+        decisions = metrics.player_decision_times[name]
+        print(f"{name}: {mean_ns / 1000:.1f}us per turn deciding, p99 below {decisions.percentile(.99) / 1000:.1f}us, "
+              f"{metrics.cards_played[name]} cards played, {metrics.cards_drawn[name]} drawn")
+
+
+def tournament(args: argparse.Namespace) -> None:
+    entrants = [Entrant(f"AI {idx + 1}", StupidAI) for idx in range(args.players)]
+    args.pack = table_pack(args)
+    tournament = Tournament(entrants, games=args.games, pack=args.pack, seed=args.seed, workers=args.workers,
+                            chunk_size=args.chunk_size, max_turns=args.max_turns, rules=args.rules)
+    start = time.perf_counter()
+    standings = tournament.run()
+    elapsed = time.perf_counter() - start
+
+    print(f"Played {args.games} games on {tournament.workers} workers in {elapsed:.3f}s "
+          f"({args.games / elapsed:.0f} games/s).")
+    if tournament.aborted:
+        print(f"{tournament.aborted} games hit the turn limit and were aborted.")
+    for rank, standing in enumerate(standings):
+        low, high = standing.confidence_interval()
+        print(f"{rank + 1}. {standing.name}: {standing.win_rate:.2%} wins [{low:.2%}, {high:.2%}], "
+              f"average position {standing.average_position:.2f}")
+
+
+def tune(args: argparse.Namespace) -> None:
+    tuner = Tuner(players=args.players, pack=table_pack(args), rules=args.rules, candidates=args.candidates,
+                  first_games=args.first_games, eta=args.eta, z=args.z, seed=args.seed, workers=args.workers,
+                  chunk_size=args.chunk_size, max_turns=args.max_turns)
+    report = tuner.run()
+    print(report.format())
+    print(json.dumps(report.best.to_dict(), indent=2))
+    if args.save:
+        with open(args.save, "w") as stream:
+            json.dump(report.best.to_dict(), stream, indent=2)
+
+
+def play_policy(args: argparse.Namespace) -> None:
+    from .batching import FeatureEncoder, MLPPolicy, load_policy, play_batched
+
+    encoder = FeatureEncoder(table_pack(args), max_opponents=args.players - 1)
+    policy = load_policy(args.policy) if args.policy else MLPPolicy.random(encoder, hidden=args.hidden, seed=args.seed)
+    start = time.perf_counter()
+    results, stats = asyncio.run(play_batched(policy, encoder, games=args.games, concurrency=args.concurrency,
+                                              players=args.players, rules=args.rules, seed=args.seed,
+                                              max_batch=args.max_batch, max_turns=args.max_turns))
+    elapsed = time.perf_counter() - start
+    wins = sum(result.completed and result.winner == "Policy" for result in results)
+    print(f"The policy won {wins} of {len(results)} games ({wins / len(results):.2%}) in {elapsed:.3f}s "
+          f"({len(results) / elapsed:.0f} games/s).")
+    print(f"{stats.decisions} decisions in {stats.batches} batches: {stats.mean_batch:.1f} per batch on average, "
+          f"{stats.largest} at most, {stats.full} full, {stats.mean_wait * 1000:.2f}ms wait on average.")
+
+
+def replay_logs(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    with open(args.log, "r") as stream:
+        logs = list(read_logs(stream))
+    if args.game is not None:
+        logs = [logs[args.game]]
+    for log in logs:
+        game = replay(log, sink=ConsoleSink() if args.verbose else None, turns=args.turns)
+        if not args.verbose:
+            print(f"Seed {log.seed}: {', '.join(player.name for player in game.finishers)} after {game.turns} turns")
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {len(logs)} games in {elapsed:.3f}s.")
+
+
+def play(args: argparse.Namespace) -> None:
+    try:
+        asyncio.run(play_terminal(args.name or ["You"], bots=args.bots, pack=args.pack, rules=args.rules,
+                                  pace=args.pace, auto_draw=not args.no_auto_draw, seed=args.seed))
+    except (EOFError, KeyboardInterrupt):
+        print("\nGame abandoned.")
+
+
+def serve(args: argparse.Namespace) -> None:
+    server = GameServer(host=args.host, port=args.port, seats=args.players, remote_seats=args.clients_per_table,
+                        pack=args.pack, turn_timeout=args.timeout, seed=args.seed, rules=args.rules)
+    print(f"Serving tables of {args.players} on {args.host}:{args.port}.")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(f"Stopped after {server.games_played} games.")
+
+
+def daemon(args: argparse.Namespace) -> None:
+    daemon = SimulationDaemon(path=args.socket, packs=args.packs, workers=args.workers)
+    print(f"Loaded {len(daemon.packs)} packs and {len(daemon.rules)} rules, starting {daemon.workers} workers.")
+    try:
+        asyncio.run(daemon.serve_forever())
+    except OSError as e:
+        raise SystemExit(str(e))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print(f"Stopped after {daemon.jobs_run} jobs and {daemon.games_played} games.")
+
+
+async def run_load(args: argparse.Namespace) -> None:
+    server_task = None
+    if args.local:
+        server = GameServer(host=args.host, port=args.port, seats=args.players, remote_seats=args.clients_per_table,
+                            turn_timeout=args.timeout, seed=args.seed)
+        server_task = asyncio.create_task(server.serve_forever())
+        # Give the server a moment to start listening
+        await asyncio.sleep(.1)
+    try:
+        report = await generate_load(args.host, args.port, clients=args.clients, games=args.games,
+                                     clients_per_table=args.clients_per_table, seed=args.seed)
+    finally:
+        if server_task is not None:
+            server_task.cancel()
+
+    print(f"{report.clients} clients finished {report.games} games in {report.elapsed:.3f}s "
+          f"({report.tables_per_second:.0f} tables/s).")
+    print(f"Move latency: p50 {report.latency(.5) * 1000:.2f}ms, p95 {report.latency(.95) * 1000:.2f}ms, "
+          f"p99 {report.latency(.99) * 1000:.2f}ms over {len(report.latencies)} moves")
+
+
+def load(args: argparse.Namespace) -> None:
+    asyncio.run(run_load(args))
+
+
+def bench(args: argparse.Namespace) -> None:
+    measurements = []
+    for name in benchmarks.BENCHMARKS:
+        if args.filter in name:
+            measurement = benchmarks.measure(name, repeat=args.repeat, min_time=args.min_time)
+            measurements.append(measurement)
+            print(f"{name}: {measurement.per_second:,.0f}/s")
+    baseline = args.baseline
+    if baseline is None and os.path.exists(benchmarks.BASELINE):
+        baseline = benchmarks.BASELINE
+    # Read the baseline before saving, which may overwrite it
+    previous = benchmarks.load_results(baseline) if baseline else None
+    if args.save:
+        benchmarks.save_results(measurements, args.save)
+    if previous is not None:
+        regressions = 0
+        print(f"\nCompared with {baseline}:")
+        for comparison in benchmarks.compare(measurements, previous):
+            regressed = comparison.regressed(args.tolerance)
+            regressions += regressed
+            print(f"{comparison.name}: {comparison.change:+.1%}{' REGRESSION' if regressed else ''}")
+        if regressions:
+            raise SystemExit(f"{regressions} benchmarks are more than {args.tolerance:.0%} slower than the baseline.")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m maumau")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    simulate_parser = commands.add_parser("simulate", help="Play headless games between AI players.")
+    simulate_parser.add_argument("--games", type=int, default=1000, help="Number of games to play.")
+    simulate_parser.add_argument("--players", type=int, default=4, help="Number of players per game.")
+    simulate_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    simulate_parser.add_argument("--copies", type=int, default=None,
+                                 help="Play with a shoe of this many copies of the pack. By default, a shoe is only "
+                                      "used if the pack is too small for the players.")
+    simulate_parser.add_argument("--rules", default=None, help="Rules file to play by, e.g. ./packs/rules/house.json.")
+    simulate_parser.add_argument("--max-turns", type=int, default=10_000, help="Abort games after this many turns.")
+    simulate_parser.add_argument("--seed", type=int, default=None, help="Seed from which all games are derived.")
+    simulate_parser.add_argument("--log", default=None, help="Append the log of every game to this file.")
+    simulate_parser.add_argument("--results", default=None,
+                                 help="Write the records of every game to columnar files in this directory.")
+    simulate_parser.add_argument("--results-format", choices=FORMATS, default=None,
+                                 help="Format of the result files. By default, the best one available.")
+    simulate_parser.add_argument("--turns", action="store_true", help="Also write the records of every turn.")
+    simulate_parser.add_argument("--vectorized", action="store_true",
+                                 help="Play all games in lockstep with the NumPy engine.")
+    simulate_parser.add_argument("--metrics", action="store_true",
+                                 help="Measure turn and decision times, which slows the games down a little.")
+    simulate_parser.set_defaults(handler=simulate)
+
+    tournament_parser = commands.add_parser("tournament", help="Play many games on multiple processes.")
+    tournament_parser.add_argument("--games", type=int, default=100_000, help="Number of games to play.")
+    tournament_parser.add_argument("--players", type=int, default=4, help="Number of players per game.")
+    tournament_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    tournament_parser.add_argument("--copies", type=int, default=None,
+                                   help="Play with a shoe of this many copies of the pack, see simulate.")
+    tournament_parser.add_argument("--rules", default=None, help="Rules file to play by.")
+    tournament_parser.add_argument("--seed", type=int, default=0, help="Seed of the tournament.")
+    tournament_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    tournament_parser.add_argument("--chunk-size", type=int, default=500, help="Games per chunk sent to a worker.")
+    tournament_parser.add_argument("--max-turns", type=int, default=10_000, help="Abort games after this many turns.")
+    tournament_parser.set_defaults(handler=tournament)
+
+    tune_parser = commands.add_parser("tune", help="Search for the best strategy of a HeuristicAI against StupidAIs.")
+    tune_parser.add_argument("--players", type=int, default=4, help="Number of players per game.")
+    tune_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    tune_parser.add_argument("--copies", type=int, default=None,
+                             help="Play with a shoe of this many copies of the pack, see simulate.")
+    tune_parser.add_argument("--rules", default=None, help="Rules file to play by.")
+    tune_parser.add_argument("--candidates", type=int, default=32, help="Number of strategies to start with.")
+    tune_parser.add_argument("--first-games", type=int, default=200,
+                             help="Games per candidate in the first round, which grow by eta every round.")
+    tune_parser.add_argument("--eta", type=int, default=2, help="One in eta candidates survives every round.")
+    tune_parser.add_argument("--z", type=float, default=2.5,
+                             help="Drop candidates that lose to the leader with a paired z-score below -z.")
+    tune_parser.add_argument("--seed", type=int, default=0, help="Seed of the search.")
+    tune_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    tune_parser.add_argument("--chunk-size", type=int, default=100, help="Games per chunk sent to a worker.")
+    tune_parser.add_argument("--max-turns", type=int, default=10_000, help="Abort games after this many turns.")
+    tune_parser.add_argument("--save", default=None, help="Write the best strategy to this JSON file.")
+    tune_parser.set_defaults(handler=tune)
+
+    policy_parser = commands.add_parser("policy", help="Play a NumPy policy against StupidAIs in many games at once, "
+                                                       "with its decisions batched across the games.")
+    policy_parser.add_argument("--policy", default=None,
+                               help="File the weights of the policy were saved to. By default, a random one.")
+    policy_parser.add_argument("--hidden", type=int, default=64, help="Hidden units of a random policy.")
+    policy_parser.add_argument("--games", type=int, default=1000, help="Number of games to play.")
+    policy_parser.add_argument("--concurrency", type=int, default=256, help="Number of games played at once.")
+    policy_parser.add_argument("--max-batch", type=int, default=None,
+                               help="Decisions per batch at most. By default, as many as games are played at once.")
+    policy_parser.add_argument("--players", type=int, default=4, help="Number of players per game.")
+    policy_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    policy_parser.add_argument("--copies", type=int, default=None,
+                               help="Play with a shoe of this many copies of the pack, see simulate.")
+    policy_parser.add_argument("--rules", default=None, help="Rules file to play by.")
+    policy_parser.add_argument("--seed", type=int, default=0, help="Seed of the games and a random policy.")
+    policy_parser.add_argument("--max-turns", type=int, default=10_000, help="Abort games after this many turns.")
+    policy_parser.set_defaults(handler=play_policy)
+
+    replay_parser = commands.add_parser("replay", help="Repeat logged games and check they end the same way.")
+    replay_parser.add_argument("log", help="Log file written by simulate --log.")
+    replay_parser.add_argument("--game", type=int, default=None, help="Only replay the game with this index.")
+    replay_parser.add_argument("--turns", type=int, default=None, help="Stop after this many turns.")
+    replay_parser.add_argument("--verbose", action="store_true", help="Print all events of the replayed games.")
+    replay_parser.set_defaults(handler=replay_logs)
+
+    play_parser = commands.add_parser("play", help="Play against bots at the terminal.")
+    play_parser.add_argument("--name", action="append", default=None,
+                             help="Name of a person playing. Repeat it for several people at the same terminal.")
+    play_parser.add_argument("--bots", type=int, default=3, help="Number of bots.")
+    play_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    play_parser.add_argument("--rules", default=None, help="Rules file to play by.")
+    play_parser.add_argument("--pace", type=float, default=.5, help="Seconds to wait after every turn of a bot.")
+    play_parser.add_argument("--no-auto-draw", action="store_true",
+                             help="Ask before drawing, even if no card may be played.")
+    play_parser.add_argument("--seed", type=int, default=None, help="Seed of the game.")
+    play_parser.set_defaults(handler=play)
+
+    serve_parser = commands.add_parser("serve", help="Host tables for clients connecting over TCP.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    serve_parser.add_argument("--port", type=int, default=7777, help="Port to listen on.")
+    serve_parser.add_argument("--players", type=int, default=4, help="Number of players per table.")
+    serve_parser.add_argument("--clients-per-table", type=int, default=1,
+                              help="Seats per table taken by clients, the others are taken by bots.")
+    serve_parser.add_argument("--pack", default=MauMau.DEFAULT_PACK, help="Pack file to play with.")
+    serve_parser.add_argument("--rules", default=None, help="Rules file to play by.")
+    serve_parser.add_argument("--timeout", type=float, default=30., help="Seconds a client has for a decision.")
+    serve_parser.add_argument("--seed", type=int, default=None, help="Seed from which all games are derived.")
+    serve_parser.set_defaults(handler=serve)
+
+    daemon_parser = commands.add_parser("daemon", help="Keep packs and workers loaded and run simulation jobs sent "
+                                                       "over a Unix socket, e.g. by python query.py.")
+    daemon_parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Path of the socket to listen on.")
+    daemon_parser.add_argument("--packs", default="./packs",
+                               help="Directory of the packs to load, with the rules in its rules directory.")
+    daemon_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    daemon_parser.set_defaults(handler=daemon)
+
+    load_parser = commands.add_parser("loadgen", help="Measure a server with many concurrent bot clients.")
+    load_parser.add_argument("--host", default="127.0.0.1", help="Address of the server.")
+    load_parser.add_argument("--port", type=int, default=7777, help="Port of the server.")
+    load_parser.add_argument("--clients", type=int, default=1000, help="Number of concurrent clients.")
+    load_parser.add_argument("--games", type=int, default=5, help="Number of games every client plays.")
+    load_parser.add_argument("--clients-per-table", type=int, default=1,
+                             help="Seats per table the server gives to clients.")
+    load_parser.add_argument("--local", action="store_true", help="Start a server in the same process.")
+    load_parser.add_argument("--players", type=int, default=4, help="Number of players per table of a local server.")
+    load_parser.add_argument("--timeout", type=float, default=30., help="Turn timeout of a local server.")
+    load_parser.add_argument("--seed", type=int, default=None, help="Seed of the clients and a local server.")
+    load_parser.set_defaults(handler=load)
+
+    bench_parser = commands.add_parser("bench", help="Run the benchmarks and compare them with a baseline.")
+    bench_parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text.")
+    bench_parser.add_argument("--repeat", type=int, default=5, help="Number of repeats, the best one counts.")
+    bench_parser.add_argument("--min-time", type=float, default=.2, help="Minimum seconds per repeat.")
+    bench_parser.add_argument("--save", default=None, help="Save the results to this JSON file.")
+    bench_parser.add_argument("--baseline", default=None,
+                              help=f"Compare with results saved earlier, by default {benchmarks.BASELINE}. "
+                                   "Pass an empty string to skip the comparison.")
+    bench_parser.add_argument("--tolerance", type=float, default=.1,
+                              help="Slowdown relative to the baseline that counts as a regression.")
+    bench_parser.set_defaults(handler=bench)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
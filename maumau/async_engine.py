@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import Awaitable, List, TypeVar
+
+from cards import Card, PackSource
+from .engine import MauMau
+from .errors import CardNotAllowedError
+from .events import EventSink
+from .players import BasePlayer
+from .result import GameResult
+from .rules import PENDING_SKIP, RulesSource
+from .state import DRAW, SHOW_ALL
+
+T = TypeVar("T")
+
+
+class AsyncMauMau(MauMau):
+    """
+    MauMau for asyncio. Players are asked through the async variants of their decisions, so players waiting for input,
+    e.g. over the network, do not block the other games running on the same event loop. Only the decisions differ from
+    MauMau. All changes of the game state are shared with it.
+    """
+
+    turn_timeout: float | None
+    """ Seconds a player has for a decision. Players who take longer get a default decision made for them. """
+
+    def __init__(self,
+                 players: List[BasePlayer],
+                 pack: PackSource = MauMau.DEFAULT_PACK,
+                 sink: EventSink | None = None,
+                 seed: int | None = None,
+                 turn_timeout: float | None = None,
+                 rules: RulesSource = None,
+                 ):
+        super().__init__(players, pack=pack, sink=sink, seed=seed, rules=rules)
+        self.turn_timeout = turn_timeout
+
+    async def decide(self, player: BasePlayer, decision: Awaitable[T], default: T) -> T:
+        """
+        Wait for a decision of a player.
+        :param default: The decision made for the player if they run out of time or lose their connection.
+        """
+        start = time.perf_counter_ns() if self.timed else 0
+        try:
+            if self.turn_timeout is None:
+                return await decision
+            return await asyncio.wait_for(decision, self.turn_timeout)
+        except asyncio.TimeoutError:
+            self.sink("timed_out", player=player)
+        except ConnectionError:
+            self.sink("disconnected", player=player)
+        finally:
+            if self.timed:
+                self.decision_ns += time.perf_counter_ns() - start
+        return default
+
+    async def draw_cards_async(self, player: BasePlayer) -> None:
+        if self.pending & PENDING_SKIP:
+            self.take_skip(player)
+            return
+        drawn_cards = self.draw_from_deck(player)
+        if self.can_play_drawn(drawn_cards) \
+                and await self.decide(player, player.choose_play_immediately_async(drawn_card=drawn_cards[0]), False):
+            await self.play_card_async(player, drawn_cards[0])
+        self.end_draw(player, drawn_cards)
+
+    async def play_card_async(self, player: BasePlayer, card: Card) -> None:
+        played_card = self.put_card(player, card)
+        if self.rules.wild_mask >> played_card.code & 1:
+            face = await self.decide(player,
+                                     player.choose_face_async(current_face=self.table.cards[-2].face,
+                                                              available_faces=self.deck.faces),
+                                     played_card.face)
+            self.set_face(player, face)
+
+    async def do_player_turn_async(self, player: BasePlayer) -> None:
+        while True:
+            move = await self.decide(player, player.choose_card_async(observation=self.observe(player)), DRAW)
+
+            if not self.holds(player, move):
+                if move == SHOW_ALL:
+                    self.show_all()
+                    continue
+                if move != DRAW:
+                    self.sink("invalid_option")
+                    continue
+                await self.draw_cards_async(player)
+            else:
+                if not self.enforce_chain(move):
+                    continue
+
+                try:
+                    await self.play_card_async(player, move)
+                except CardNotAllowedError as e:
+                    self.sink("not_allowed", error=e)
+                    continue
+            break
+
+    async def step_async(self) -> bool:
+        """
+        Let the player in the current seat take their turn and move on to the next seat.
+        :return: Whether the game is still running.
+        """
+        player = self.begin_turn()
+        if player is None:
+            return True
+
+        await self.do_player_turn_async(player)
+        running = self.end_turn(player)
+        # Sleeping, even for no time at all, lets the other games on the loop move on
+        await asyncio.sleep(0 if player.interactive else self.turn_delay)
+        return running
+
+    async def play_async(self, max_turns: int | None = None) -> GameResult:
+        """
+        Play the game until only one player is left.
+        :param max_turns: (optional) Abort the game after this many turns, e.g. if no player can ever finish.
+        :return: The outcome of the game.
+        """
+        self.start()
+        running = True
+        while running and (max_turns is None or self.turns < max_turns):
+            running = await self.step_async()
+        return self.outcome(running)
@@ -0,0 +1,393 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from random import Random
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cards import Card, IndexedSymbol, Pack, PackSource, load_pack
+from .async_engine import AsyncMauMau
+from .engine import MauMau
+from .events import EventSink
+from .players import BasePlayer, StupidAI
+from .result import GameResult
+from .rules import RulesSource
+from .state import DRAW, Move, Observation
+from .tournament import PlayerFactory
+
+
+class FeatureEncoder:
+    """
+    Turns what a player sees into a vector of fixed size, as the input of a policy. The features are, in this order:
+
+    - the hand, one bit per card code
+    - the top card, one-hot by code
+    - the face to play, one-hot by face index
+    - the cards to draw, divided by 10
+    - the pending draw and skip flags
+    - the hand counts of the next players in seating order, divided by the hand size, up to max_opponents of them
+
+    The outputs of a policy are scores of every card, of drawing, and of every face to choose with a Jack, see
+    output_size.
+    """
+
+    pack: Pack
+    max_opponents: int
+    card_count: int
+    face_count: int
+    size: int
+    """ Number of features. """
+    output_size: int
+    """ Number of scores a policy puts out: one per card code, one for drawing, and one per face. """
+    mask_bytes: int
+
+    def __init__(self, pack: PackSource = MauMau.DEFAULT_PACK, max_opponents: int = 3):
+        self.pack = load_pack(pack)
+        self.max_opponents = max_opponents
+        self.card_count = len(self.pack.cards)
+        self.face_count = len(self.pack.faces)
+        self.size = 2 * self.card_count + self.face_count + 3 + max_opponents
+        self.output_size = self.card_count + 1 + self.face_count
+        self.mask_bytes = (self.card_count + 7) // 8
+
+    @property
+    def draw_output(self) -> int:
+        """ :return: The index of the score of drawing, or keeping a drawn card, among the outputs. """
+        return self.card_count
+
+    def encode_into(self, row: np.ndarray, observation: Observation) -> None:
+        """ Write the features of an observation into a row of a batch, allocating nothing but the hand bits. """
+        cards = self.card_count
+        row.fill(0.)
+        row[:cards] = np.unpackbits(np.frombuffer(observation.hand_mask.to_bytes(self.mask_bytes, "little"),
+                                                  dtype=np.uint8), count=cards, bitorder="little")
+        row[cards + observation.top_card.code] = 1.
+        base = 2 * cards
+        row[base + observation.face.index] = 1.
+        base += self.face_count
+        row[base] = observation.cards_to_draw / 10
+        row[base + 1] = observation.pending & 1
+        row[base + 2] = observation.pending >> 1 & 1
+        counts = observation.hand_counts
+        seats = len(counts)
+        seat = observation.seat
+        for offset in range(1, min(seats, self.max_opponents + 1)):
+            row[base + 2 + offset] = counts[(seat + offset) % seats] / MauMau.HAND_SIZE
+
+    def encode(self, observation: Observation) -> np.ndarray:
+        row = np.empty(self.size, dtype=np.float32)
+        self.encode_into(row, observation)
+        return row
+
+    def encode_batch(self, observations: List[Observation]) -> np.ndarray:
+        batch = np.empty((len(observations), self.size), dtype=np.float32)
+        for row, observation in zip(batch, observations):
+            self.encode_into(row, observation)
+        return batch
+
+
+class Policy:
+    """ A learned policy: maps a batch of features to a batch of scores, with a single matrix product per layer. """
+
+    params: Dict[str, np.ndarray]
+
+    def forward(self, features: np.ndarray) -> np.ndarray:
+        """
+        :param features: The features of a batch of decisions, one row each, see FeatureEncoder.
+        :return: The scores of every decision, one row each, see FeatureEncoder.output_size.
+        """
+        raise NotImplementedError()
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.params)
+
+
+class LinearPolicy(Policy):
+    def __init__(self, weights: np.ndarray, bias: np.ndarray):
+        self.params = {"weights": np.asarray(weights, dtype=np.float32), "bias": np.asarray(bias, dtype=np.float32)}
+
+    @classmethod
+    def random(cls, encoder: FeatureEncoder, scale: float = .1, seed: int | None = None) -> "LinearPolicy":
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0., scale, (encoder.size, encoder.output_size)), np.zeros(encoder.output_size))
+
+    @classmethod
+    def load(cls, path: str) -> "LinearPolicy":
+        with np.load(path) as params:
+            return cls(params["weights"], params["bias"])
+
+    def forward(self, features: np.ndarray) -> np.ndarray:
+        return features @ self.params["weights"] + self.params["bias"]
+
+
+class MLPPolicy(Policy):
+    """ A policy with one hidden layer of rectified linear units. """
+
+    def __init__(self, hidden_weights: np.ndarray, hidden_bias: np.ndarray, weights: np.ndarray, bias: np.ndarray):
+        self.params = {name: np.asarray(value, dtype=np.float32) for name, value in
+                       [("hidden_weights", hidden_weights), ("hidden_bias", hidden_bias),
+                        ("weights", weights), ("bias", bias)]}
+
+    @classmethod
+    def random(cls, encoder: FeatureEncoder, hidden: int = 64, seed: int | None = None) -> "MLPPolicy":
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0., (2 / encoder.size) ** .5, (encoder.size, hidden)), np.zeros(hidden),
+                   rng.normal(0., (1 / hidden) ** .5, (hidden, encoder.output_size)), np.zeros(encoder.output_size))
+
+    @classmethod
+    def load(cls, path: str) -> "MLPPolicy":
+        with np.load(path) as params:
+            return cls(params["hidden_weights"], params["hidden_bias"], params["weights"], params["bias"])
+
+    def forward(self, features: np.ndarray) -> np.ndarray:
+        params = self.params
+        hidden = features @ params["hidden_weights"] + params["hidden_bias"]
+        np.maximum(hidden, 0., out=hidden)
+        return hidden @ params["weights"] + params["bias"]
+
+
+def load_policy(path: str) -> Policy:
+    """ :return: The policy saved to a file, linear or with a hidden layer, depending on the weights saved. """
+    with np.load(path) as params:
+        names = set(params.files)
+    return MLPPolicy.load(path) if "hidden_weights" in names else LinearPolicy.load(path)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    decisions: int = 0
+    full: int = 0
+    """ Number of batches evaluated because they were full, rather than because the timeout expired. """
+    wait: float = 0.
+    """ Seconds the decisions waited for their batch, added up. """
+    largest: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.decisions / self.batches if self.batches else 0.
+
+    @property
+    def mean_wait(self) -> float:
+        return self.wait / self.decisions if self.decisions else 0.
+
+
+class DecisionBatcher:
+    """
+    Collects the decisions of many games running on the same event loop and evaluates them with a single forward pass
+    of the policy. A batch is evaluated as soon as it is full, or as soon as all games that may ask are waiting, or once
+    the oldest decision waited for timeout seconds, whichever comes first. Features are written straight into a
+    preallocated batch.
+    """
+
+    policy: Policy
+    encoder: FeatureEncoder
+    max_batch: int
+    timeout: float
+    """ Seconds a decision waits for its batch to fill at most. """
+    expected: int | None
+    """ Number of decisions that may be pending at most, e.g. the number of games running, or None if unknown. """
+    features: np.ndarray
+    futures: List[asyncio.Future]
+    submitted: List[float]
+    timer: asyncio.TimerHandle | None
+    stats: BatchStats
+
+    def __init__(self, policy: Policy, encoder: FeatureEncoder, max_batch: int = 256, timeout: float = .005):
+        self.policy = policy
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.expected = None
+        self.features = np.zeros((max_batch, encoder.size), dtype=np.float32)
+        self.futures = []
+        self.submitted = []
+        self.timer = None
+        self.stats = BatchStats()
+
+    def limit(self) -> int:
+        return self.max_batch if self.expected is None else max(1, min(self.max_batch, self.expected))
+
+    async def decide(self, observation: Observation) -> np.ndarray:
+        """ :return: The scores of the decision, once its batch was evaluated. """
+        loop = asyncio.get_running_loop()
+        self.encoder.encode_into(self.features[len(self.futures)], observation)
+        future = loop.create_future()
+        self.futures.append(future)
+        self.submitted.append(time.perf_counter())
+        if len(self.futures) >= self.limit():
+            self.flush(full=True)
+        elif self.timer is None:
+            self.timer = loop.call_later(self.timeout, self.flush)
+        return await future
+
+    def poke(self) -> None:
+        """ Evaluate the batch right away if all decisions that may be asked for wait, e.g. after a game ended. """
+        if self.futures and len(self.futures) >= self.limit():
+            self.flush(full=True)
+
+    def flush(self, full: bool = False) -> None:
+        """ Evaluate all pending decisions. """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        count = len(self.futures)
+        if not count:
+            return
+        scores = self.policy.forward(self.features[:count])
+        now = time.perf_counter()
+        stats = self.stats
+        stats.batches += 1
+        stats.decisions += count
+        stats.full += full
+        stats.largest = max(stats.largest, count)
+        stats.wait += now * count - sum(self.submitted)
+        futures = self.futures
+        self.futures = []
+        self.submitted = []
+        for future, row in zip(futures, scores):
+            # Games may have given up on a decision, e.g. when it timed out
+            if not future.done():
+                future.set_result(row)
+
+
+class PolicyPlayer(BasePlayer):
+    """
+    Plays the legal move a policy scores best. In async games with a batcher, decisions are evaluated together with
+    those of other games, else one by one. Whether to play a drawn card comes from the scores of the decision to draw,
+    the face for a Jack from the scores of the game after the Jack was played.
+    """
+
+    policy: Policy
+    encoder: FeatureEncoder
+    batcher: DecisionBatcher | None
+    scores: np.ndarray | None
+    """ The scores of the last decision. """
+    observation: Observation | None
+    """ The view of the game the player was last asked to decide in, which follows the game. """
+
+    def __init__(self,
+                 name: str,
+                 policy: Policy,
+                 encoder: FeatureEncoder,
+                 batcher: DecisionBatcher | None = None,
+                 ):
+        super().__init__(name=name)
+        self.policy = policy
+        self.encoder = encoder
+        self.batcher = batcher
+        self.scores = None
+        self.observation = None
+
+    def best_move(self, observation: Observation, scores: np.ndarray) -> Move:
+        self.scores = scores
+        legal_mask = observation.legal_mask
+        if not legal_mask:
+            return DRAW
+        codes = [card.code for card in observation.pack.cards_from_mask(legal_mask)]
+        best = codes[int(np.argmax(scores[codes]))]
+        if scores[self.encoder.draw_output] > scores[best]:
+            return DRAW
+        return observation.pack.cards[best]
+
+    def evaluate(self, observation: Observation) -> np.ndarray:
+        """ :return: The scores of a single decision. """
+        self.observation = observation
+        return self.policy.forward(self.encoder.encode(observation)[None])[0]
+
+    async def evaluate_async(self, observation: Observation) -> np.ndarray:
+        """ :return: The scores of a decision, evaluated with those of other games if there is a batcher. """
+        if self.batcher is None:
+            return self.evaluate(observation)
+        self.observation = observation
+        return await self.batcher.decide(observation)
+
+    def best_face(self, scores: np.ndarray, available_faces: List[IndexedSymbol]) -> IndexedSymbol:
+        first = self.encoder.draw_output + 1
+        return available_faces[int(np.argmax(scores[first:first + len(available_faces)]))]
+
+    def current_observation(self) -> Observation:
+        if self.observation is None:
+            raise ValueError(f"{self.name} was never asked to play a card, so there is no game to choose a face in!")
+        return self.observation
+
+    def choose_card(
+            self,
+            observation: Observation,
+    ) -> Move:
+        return self.best_move(observation, self.evaluate(observation))
+
+    async def choose_card_async(
+            self,
+            observation: Observation,
+    ) -> Move:
+        return self.best_move(observation, await self.evaluate_async(observation))
+
+    def choose_face(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        # The last scores are from before the Jack was played, or even from turns ago if a decision timed out
+        return self.best_face(self.evaluate(self.current_observation()), available_faces)
+
+    async def choose_face_async(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        return self.best_face(await self.evaluate_async(self.current_observation()), available_faces)
+
+    def choose_play_immediately(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        return self.scores is None or self.scores[drawn_card.code] >= self.scores[self.encoder.draw_output]
+
+
+async def play_batched(policy: Policy,
+                       encoder: FeatureEncoder,
+                       games: int,
+                       concurrency: int = 256,
+                       players: int = 4,
+                       opponent: PlayerFactory = StupidAI,
+                       rules: RulesSource = None,
+                       seed: int = 0,
+                       max_batch: int | None = None,
+                       timeout: float = .05,
+                       max_turns: int | None = 10_000,
+                       ) -> Tuple[List[GameResult], BatchStats]:
+    """
+    Play games of a policy against opponents, many at once on the running event loop, with the decisions of the policy
+    batched across all of them.
+    :param concurrency: Number of games played at the same time.
+    :param max_batch: (optional) Decisions per batch at most. By default, as many as games are played at the same time.
+    :param timeout: Seconds a decision waits for its batch at most. As the batcher knows how many games are running,
+                    batches are usually evaluated once all of them wait, long before.
+    :return: The results, in the order the games were started, and the statistics of the batches.
+    """
+    concurrency = min(concurrency, games)
+    batcher = DecisionBatcher(policy, encoder, max_batch=max_batch or concurrency, timeout=timeout)
+    batcher.expected = concurrency
+    rng = Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(games)]
+    results: List[GameResult | None] = [None] * games
+    next_game = iter(range(games))
+
+    async def worker() -> None:
+        learner = PolicyPlayer("Policy", policy, encoder, batcher)
+        opponents = [opponent(f"Opponent {idx + 1}") for idx in range(players - 1)]
+        try:
+            for game in next_game:
+                seat = game % players
+                lineup = opponents[:seat] + [learner] + opponents[seat:]
+                engine = AsyncMauMau(lineup, pack=encoder.pack, sink=EventSink(), seed=seeds[game], rules=rules)
+                results[game] = await engine.play_async(max_turns=max_turns)
+        finally:
+            # One game less may ask, so the others need not wait for it
+            batcher.expected -= 1
+            batcher.poke()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, batcher.stats
@@ -0,0 +1,97 @@
+from typing import List
+
+from cards import Hand, Pack, iter_codes
+
+
+class CardTracker:
+    """
+    What everybody at the table knows about the cards they cannot see. The table pile is public, so the cards a player
+    has not seen are the ones neither on the table nor in their own hand, which replenishing the deck puts back in play
+    without any bookkeeping.
+
+    On top of that, drawing tells something: a player who draws instead of playing is assumed to hold none of the cards
+    they could have played. Every seat keeps a bitmask of such cards, which applies to the cards they held at the time,
+    and the number of cards they drew since, which may be anything. Every event updates a few integers, and estimates
+    are computed from bitmasks when asked for.
+    """
+
+    pack: Pack
+    table: Hand
+    """ The table pile of the game. """
+    hand_counts: List[int]
+    """ Number of cards in hand of every player, by seat. Shared with the game. """
+    excluded: List[int]
+    """ Bitmask of the cards every seat is assumed not to hold, apart from the ones they drew since. """
+    fresh: List[int]
+    """ Number of cards every seat drew since they were last seen passing, which are not covered by excluded. """
+
+    def __init__(self, pack: Pack, table: Hand, hand_counts: List[int]):
+        self.pack = pack
+        self.table = table
+        self.hand_counts = hand_counts
+        self.excluded = [0] * len(hand_counts)
+        # Dealt cards are as unknown as drawn ones
+        self.fresh = list(hand_counts)
+
+    def passed(self, seat: int, playable: int) -> None:
+        """
+        The player in the seat draws or takes a skip instead of playing a card.
+        :param playable: Bitmask of the cards they could have played.
+        """
+        if self.fresh[seat]:
+            # The cards drawn since the last pass are covered from now on, the older exclusions only held for the others
+            self.excluded[seat] = playable
+            self.fresh[seat] = 0
+        else:
+            self.excluded[seat] |= playable
+
+    def drew(self, seat: int, count: int) -> None:
+        self.fresh[seat] += count
+
+    def played(self, seat: int) -> None:
+        if self.fresh[seat] > self.hand_counts[seat]:
+            self.fresh[seat] = self.hand_counts[seat]
+
+    def unseen(self, hand_mask: int) -> int:
+        """
+        :param hand_mask: The hand of the observer, e.g. observation.hand_mask.
+        :return: Bitmask of the cards the observer has not seen, which are in the deck or in other hands.
+        """
+        return self.pack.masks.all & ~self.table.mask & ~hand_mask
+
+    def possible(self, seat: int, unseen: int) -> int:
+        """ :return: Bitmask of the unseen cards the player in the seat may hold, as far as everybody knows. """
+        if self.fresh[seat]:
+            return unseen
+        return unseen & ~self.excluded[seat] or unseen
+
+    def probability(self, seat: int, code: int, unseen: int) -> float:
+        """
+        Estimate whether the player in the seat holds a card, treating the unseen cards as equally likely unless they
+        are excluded.
+        :param code: The code of the card.
+        :param unseen: The cards the observer has not seen, see unseen().
+        """
+        if not unseen >> code & 1:
+            return 0.
+        count = self.hand_counts[seat]
+        fresh = min(self.fresh[seat], count)
+        estimate = fresh / unseen.bit_count()
+        candidates = unseen & ~self.excluded[seat] or unseen
+        if candidates >> code & 1:
+            estimate += (count - fresh) / candidates.bit_count()
+        return min(estimate, 1.)
+
+    def probabilities(self, seat: int, unseen: int) -> List[float]:
+        """ :return: The estimates of probability() of all cards, by code. """
+        count = self.hand_counts[seat]
+        fresh = min(self.fresh[seat], count)
+        estimates = [0.] * len(self.pack.cards)
+        if not unseen:
+            return estimates
+        candidates = unseen & ~self.excluded[seat] or unseen
+        anywhere = fresh / unseen.bit_count()
+        candidate = min(anywhere + (count - fresh) / candidates.bit_count(), 1.)
+        for code in iter_codes(unseen):
+            estimates[code] = candidate if candidates >> code & 1 else anywhere
+        return estimates
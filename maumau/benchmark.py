@@ -0,0 +1,231 @@
+import json
+import platform
+import time
+from dataclasses import dataclass
+from random import Random
+from typing import Callable, Dict, List, Tuple
+
+from cards import Deck, Hand, Pack, PackSource
+from .engine import MauMau
+from .events import EventSink
+from .players import StupidAI
+from .rules import RulesSource
+
+Operation = Callable[[], None]
+BenchmarkFactory = Callable[[], Tuple[Operation, int]]
+""" Sets up a benchmark and returns the operation to time, with the number of items every call processes. """
+
+BENCHMARKS: Dict[str, BenchmarkFactory] = {}
+""" All benchmarks by name. Micro-benchmarks measure single hot paths, macro-benchmarks whole games. """
+
+PACKS: Dict[str, str] = {
+    "french_32": "./packs/french_32.json",
+    "french_52": "./packs/french_52.json",
+}
+
+RULES: Dict[str, str] = {
+    "house": "./packs/rules/house.json",
+}
+
+BASELINE: str = "./benchmarks/baseline.json"
+""" The results the benchmarks are compared with, unless other ones are given. """
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFactory], BenchmarkFactory]:
+    """ Register a benchmark factory under a name. """
+    def register(factory: BenchmarkFactory) -> BenchmarkFactory:
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def new_game(pack: PackSource, players: int, seed: int = 0, rules: RulesSource = None) -> MauMau:
+    return MauMau([StupidAI(f"AI {idx + 1}") for idx in range(players)], pack=pack, sink=EventSink(), seed=seed,
+                  rules=rules)
+
+
+@benchmark("deck.load_deck_file")
+def bench_load_deck_file() -> Tuple[Operation, int]:
+    deck = Deck(PACKS["french_32"])
+    return lambda: deck.load_deck_file(PACKS["french_32"]), 1
+
+
+@benchmark("pack.parse")
+def bench_pack_parse() -> Tuple[Operation, int]:
+    """ Reading and building a pack, which load_pack only does once per process and file. """
+    def parse() -> None:
+        with open(PACKS["french_52"], "r") as stream:
+            Pack(json.load(stream))
+    return parse, 1
+
+
+@benchmark("deck.shuffle")
+def bench_shuffle() -> Tuple[Operation, int]:
+    deck = Deck(PACKS["french_32"], rng=Random(0))
+    return deck.shuffle, 1
+
+
+@benchmark("hand.sort")
+def bench_hand_sort() -> Tuple[Operation, int]:
+    deck = Deck(PACKS["french_32"], rng=Random(0))
+    deck.shuffle()
+    hand = Hand()
+    hand.draw_from(deck, 10)
+    unsorted = list(hand.cards)
+
+    def sort() -> None:
+        hand.cards[:] = unsorted
+        hand.sort()
+    return sort, 1
+
+
+@benchmark("engine.is_card_allowed")
+def bench_is_card_allowed() -> Tuple[Operation, int]:
+    game = new_game(PACKS["french_32"], 4)
+    cards = game.pack.cards
+    is_card_allowed = game.is_card_allowed
+
+    def check() -> None:
+        for card in cards:
+            is_card_allowed(card)
+    return check, len(cards)
+
+
+@benchmark("engine.replenish_deck")
+def bench_replenish_deck() -> Tuple[Operation, int]:
+    game = new_game(PACKS["french_52"], 4)
+
+    def replenish() -> None:
+        game.table.add(game.deck.draw(len(game.deck.cards)))
+        game.replenish_deck()
+    return replenish, 1
+
+
+def started_game(pack: str, players: int, turns: int = 20) -> MauMau:
+    """ :return: A game some turns in, so the cards are spread over deck, table and hands. """
+    game = new_game(pack, players)
+    for _ in range(turns):
+        game.step()
+    return game
+
+
+@benchmark("engine.snapshot")
+def bench_snapshot() -> Tuple[Operation, int]:
+    game = started_game(PACKS["french_32"], 4)
+    snapshot = game.snapshot()
+
+    def snapshot_and_restore() -> None:
+        game.snapshot()
+        game.restore(snapshot)
+    return snapshot_and_restore, 1
+
+
+@benchmark("engine.clone")
+def bench_clone() -> Tuple[Operation, int]:
+    return started_game(PACKS["french_32"], 4).clone, 1
+
+
+def bench_games(pack: str, players: int, rules: RulesSource = None) -> BenchmarkFactory:
+    def factory() -> Tuple[Operation, int]:
+        rng = Random(0)
+        return lambda: new_game(pack, players, seed=rng.getrandbits(64), rules=rules).play(max_turns=10_000), 1
+    return factory
+
+
+# Every player is dealt 5 cards, so 8 players need more cards than the small pack has
+for pack_name, player_count in [("french_32", 2), ("french_32", 4),
+                                ("french_52", 2), ("french_52", 4), ("french_52", 8)]:
+    benchmark(f"game.{pack_name}.{player_count}_players")(bench_games(PACKS[pack_name], player_count))
+benchmark("game.french_32.4_players.house_rules")(bench_games(PACKS["french_32"], 4, RULES["house"]))
+
+
+def bench_table_turns(seats: int, turns: int = 100) -> BenchmarkFactory:
+    """ Turns at a table of many seats, played with a shoe of as many packs as it needs. """
+    def factory() -> Tuple[Operation, int]:
+        pack = MauMau.shoe_for(seats, PACKS["french_32"])
+        rng = Random(0)
+        games = [new_game(pack, seats, seed=rng.getrandbits(64))]
+
+        def play_turns() -> None:
+            for _ in range(turns):
+                if not games[0].step():
+                    games[0] = new_game(pack, seats, seed=rng.getrandbits(64))
+        return play_turns, turns
+    return factory
+
+
+# The rate of turns should not depend on the number of seats
+for seat_count in (4, 16, 64, 128):
+    benchmark(f"table.shoe.{seat_count}_seats")(bench_table_turns(seat_count))
+
+
+@dataclass
+class Measurement:
+    name: str
+    per_second: float
+    """ Items processed per second, in the best of all repeats. """
+    calls: int
+    """ Number of calls timed in each repeat. """
+
+
+def measure(name: str, repeat: int = 5, min_time: float = .2) -> Measurement:
+    """
+    Time a benchmark. The number of calls is raised until a repeat takes at least min_time, like timeit does.
+    :return: The best rate of all repeats, which is the one least disturbed by the rest of the system.
+    """
+    operation, items = BENCHMARKS[name]()
+    calls = 1
+    while True:
+        elapsed = time_calls(operation, calls)
+        if elapsed >= min_time:
+            break
+        calls *= 2
+    best = min([elapsed] + [time_calls(operation, calls) for _ in range(repeat - 1)])
+    return Measurement(name=name, per_second=calls * items / best, calls=calls)
+
+
+def time_calls(operation: Operation, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        operation()
+    return time.perf_counter() - start
+
+
+def run_benchmarks(pattern: str = "", repeat: int = 5, min_time: float = .2) -> List[Measurement]:
+    """ Run all benchmarks whose name contains the pattern. """
+    return [measure(name, repeat=repeat, min_time=min_time) for name in BENCHMARKS if pattern in name]
+
+
+def save_results(measurements: List[Measurement], path: str) -> None:
+    with open(path, "w") as stream:
+        json.dump({"python": platform.python_version(),
+                   "machine": platform.machine(),
+                   "results": {measurement.name: measurement.per_second for measurement in measurements}},
+                  stream, indent=2)
+
+
+def load_results(path: str) -> Dict[str, float]:
+    """ :return: The rates by benchmark name. """
+    with open(path, "r") as stream:
+        return json.load(stream)["results"]
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """ Relative change of the rate, negative if the benchmark got slower. """
+        return self.current / self.baseline - 1
+
+    def regressed(self, tolerance: float) -> bool:
+        return self.change < -tolerance
+
+
+def compare(measurements: List[Measurement], baseline: Dict[str, float]) -> List[Comparison]:
+    """ Compare measurements with a baseline. Benchmarks missing from the baseline are left out. """
+    return [Comparison(measurement.name, baseline[measurement.name], measurement.per_second)
+            for measurement in measurements if measurement.name in baseline]
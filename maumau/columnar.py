@@ -0,0 +1,373 @@
+import csv
+import os
+from bisect import bisect_right
+from itertools import accumulate, chain
+from typing import Dict, Iterator, List
+
+from .engine import MauMau
+from .events import EventSink
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+Columns = Dict[str, list]
+
+GAME_COLUMNS: Dict[str, str] = {
+    "game": "int64",
+    "seed": "uint64",
+    "players": "str",
+    "finishers": "str",
+    "turns": "int64",
+    "rounds": "int64",
+    "cards_drawn": "int64",
+    "longest_chain": "int64",
+    "replenishes": "int64",
+    "completed": "bool",
+}
+"""
+Columns of the games table and their types. Players holds the names in seating order and finishers the seats in
+finishing order, both separated by commas.
+"""
+
+TURN_COLUMNS: Dict[str, str] = {
+    "game": "int64",
+    "turn": "int64",
+    "seat": "int64",
+    "card": "int64",
+    "cards_drawn": "int64",
+    "chain": "int64",
+    "cards_left": "int64",
+    "decision_ns": "int64",
+    "duration_ns": "int64",
+}
+"""
+Columns of the turns table and their types. Card is the code of the card played last in the turn, or -1, and chain the
+length of the chain of draw cards after the turn, see ResultWriter.chain.
+"""
+
+TABLES: Dict[str, Dict[str, str]] = {
+    "games": GAME_COLUMNS,
+    "turns": TURN_COLUMNS,
+}
+
+FORMATS = ("arrow", "parquet", "npy", "csv")
+"""
+Formats of the files written, by preference. Arrow IPC files and .npy columns are memory-mapped when read back.
+Parquet and Arrow need pyarrow, npy needs numpy, and csv works everywhere.
+"""
+
+
+def default_format() -> str:
+    """ :return: The best format the installed packages can write. """
+    if pa is not None:
+        return "arrow"
+    if np is not None:
+        return "npy"
+    return "csv"
+
+
+def write_part(path: str, columns: Columns, types: Dict[str, str], file_format: str) -> str:
+    """
+    Write a batch of records to a single file, or a directory of .npy files.
+    :param path: Path of the part without extension.
+    :return: The path written.
+    """
+    if file_format in ("arrow", "parquet"):
+        if pa is None:
+            raise ImportError(f"Writing {file_format} files requires pyarrow.")
+        arrow_types = {"int64": pa.int64(), "uint64": pa.uint64(), "str": pa.string(), "bool": pa.bool_()}
+        table = pa.table({name: pa.array(values, type=arrow_types[types[name]]) for name, values in columns.items()})
+        path = f"{path}.{file_format}"
+        if file_format == "parquet":
+            pa.parquet.write_table(table, path)
+        else:
+            with pa.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+    elif file_format == "npy":
+        if np is None:
+            raise ImportError("Writing npy files requires numpy.")
+        os.makedirs(path)
+        for name, values in columns.items():
+            dtype = None if types[name] == "str" else types[name]
+            np.save(os.path.join(path, f"{name}.npy"), np.array(values, dtype=dtype))
+    elif file_format == "csv":
+        path = f"{path}.csv"
+        with open(path, "w", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
+    else:
+        raise ValueError(f"Unknown format {file_format}!")
+    return path
+
+
+def read_part(path: str, types: Dict[str, str]) -> dict:
+    """
+    Read a part written by write_part. Arrow files and .npy columns are memory-mapped, so only the pages actually
+    looked at are read from disk.
+    :return: The columns by name: pyarrow arrays, numpy arrays or, for csv, lists.
+    """
+    if os.path.isdir(path):
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in types}
+    if path.endswith(".arrow"):
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return {name: table.column(name) for name in table.column_names}
+    if path.endswith(".parquet"):
+        table = pa.parquet.read_table(path, memory_map=True)
+        return {name: table.column(name) for name in table.column_names}
+    with open(path, "r", newline="") as stream:
+        reader = csv.reader(stream)
+        names = next(reader)
+        columns = {name: [] for name in names}
+        for row in reader:
+            for name, value in zip(names, row):
+                columns[name].append(value)
+    for name, values in columns.items():
+        if types[name] == "bool":
+            columns[name] = [value == "True" for value in values]
+        elif types[name] != "str":
+            columns[name] = [int(value) for value in values]
+    return columns
+
+
+class ColumnBuffer:
+    """ Collects records column by column and writes them as a new part whenever the batch is full. """
+
+    directory: str
+    types: Dict[str, str]
+    columns: Columns
+    batch_size: int
+    file_format: str
+    parts: int
+    """ Number of parts written so far. """
+    rows: int
+    """ Number of records written so far, not counting the ones still buffered. """
+
+    def __init__(self, directory: str, types: Dict[str, str], batch_size: int, file_format: str):
+        self.directory = directory
+        self.types = types
+        self.batch_size = batch_size
+        self.file_format = file_format
+        self.parts = 0
+        self.rows = 0
+        self.columns = {name: [] for name in types}
+        os.makedirs(directory, exist_ok=True)
+        if any(name.startswith("part-") for name in os.listdir(directory)):
+            raise FileExistsError(f"{directory} already holds results!")
+
+    def __len__(self) -> int:
+        return len(self.columns["game"])
+
+    def flush(self) -> None:
+        count = len(self)
+        if not count:
+            return
+        write_part(os.path.join(self.directory, f"part-{self.parts:05d}"), self.columns, self.types, self.file_format)
+        self.parts += 1
+        self.rows += count
+        self.columns = {name: [] for name in self.types}
+
+
+class ResultWriter(EventSink):
+    """
+    Streams the records of every game, and optionally every turn, to columnar files. Records are buffered in batches of
+    a fixed size, so memory stays bounded no matter how many games are played. Like the game log, the writer expects
+    games to be played one after the other.
+
+    The directory gets a subdirectory per table, games and turns, holding the parts in the order they were written. Call
+    close() after the last game, or use the writer as a context manager, to write the last batch.
+    """
+
+    directory: str
+    games: ColumnBuffer
+    turns: ColumnBuffer | None
+    """ The buffer of turn records, or None if turns are not recorded. """
+    game_index: int
+    game: MauMau | None
+    """ The game being played. """
+    chain: int
+    """ Number of draw cards played in a row, each answering the one before, until somebody draws. """
+    longest_chain: int
+    card: int
+    """ Code of the card played last in the current turn, or -1. """
+    cards_drawn: int
+    """ Number of cards drawn in the current turn. """
+
+    def __init__(self,
+                 directory: str,
+                 batch_size: int = 65_536,
+                 file_format: str | None = None,
+                 turns: bool = True,
+                 ):
+        """
+        :param directory: The directory to write to, which must not hold any results yet.
+        :param batch_size: Number of records per part.
+        :param file_format: (optional) One of FORMATS. By default, the best format available.
+        :param turns: Whether to record every turn, besides the games.
+        """
+        file_format = default_format() if file_format is None else file_format
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown format {file_format}!")
+        # Turns are only reported to sinks that want timings, which the turn records include
+        self.timed = turns
+        self.directory = directory
+        self.games = ColumnBuffer(os.path.join(directory, "games"), GAME_COLUMNS, batch_size, file_format)
+        self.turns = ColumnBuffer(os.path.join(directory, "turns"), TURN_COLUMNS, batch_size, file_format) \
+            if turns else None
+        self.game_index = -1
+        self.game = None
+        self.chain = 0
+        self.longest_chain = 0
+        self.card = -1
+        self.cards_drawn = 0
+
+    def __call__(self, event: str, **data) -> None:
+        if event == "played":
+            card = data["card"]
+            self.card = card.code
+            if self.game.rules.draw_counts[card.rank.index]:
+                self.chain += 1
+                if self.chain > self.longest_chain:
+                    self.longest_chain = self.chain
+            else:
+                self.chain = 0
+        elif event == "drew":
+            self.cards_drawn += 1
+            self.chain = 0
+        elif event == "drew_many":
+            self.cards_drawn += data["count"]
+            self.chain = 0
+        elif event in ("drew_nothing", "skip_taken"):
+            self.chain = 0
+        elif event == "turn_started":
+            self.card = -1
+            self.cards_drawn = 0
+        elif event == "turn_ended" and self.turns is not None:
+            self.end_turn(data["seat"], data["decision_ns"], data["duration_ns"])
+        elif event == "started":
+            self.game = data["game"]
+            self.game_index += 1
+            self.chain = 0
+            self.longest_chain = 0
+        elif event in ("game_over", "aborted"):
+            self.end_game(data["game"], event == "game_over")
+
+    def end_turn(self, seat: int, decision_ns: int, duration_ns: int) -> None:
+        game = self.game
+        columns = self.turns.columns
+        columns["game"].append(self.game_index)
+        columns["turn"].append(game.turns - 1)
+        columns["seat"].append(seat)
+        columns["card"].append(self.card)
+        columns["cards_drawn"].append(self.cards_drawn)
+        columns["chain"].append(self.chain)
+        columns["cards_left"].append(game.hand_counts[seat])
+        columns["decision_ns"].append(decision_ns)
+        columns["duration_ns"].append(duration_ns)
+        if len(self.turns) >= self.turns.batch_size:
+            self.turns.flush()
+
+    def end_game(self, game: MauMau, completed: bool) -> None:
+        columns = self.games.columns
+        columns["game"].append(self.game_index)
+        columns["seed"].append(game.seed)
+        columns["players"].append(",".join(player.name for player in game.players))
+        columns["finishers"].append(",".join(str(game.seat_of[player]) for player in game.finishers))
+        columns["turns"].append(game.turns)
+        columns["rounds"].append(game.round)
+        columns["cards_drawn"].append(sum(game.cards_drawn))
+        columns["longest_chain"].append(self.longest_chain)
+        columns["replenishes"].append(game.replenishes)
+        columns["completed"].append(completed)
+        if len(self.games) >= self.games.batch_size:
+            self.games.flush()
+        self.game = None
+
+    def close(self) -> None:
+        """ Write the records still buffered. """
+        self.games.flush()
+        if self.turns is not None:
+            self.turns.flush()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ChunkedColumn:
+    """
+    A column made of the memory-mapped .npy columns of all parts, which are only read from disk where they are looked
+    at, like a pyarrow chunked array. Nothing is copied until to_numpy() is called.
+    """
+
+    chunks: List["np.ndarray"]
+    offsets: List[int]
+    """ Index of the first value of every chunk, and the length of the column at the end. """
+
+    def __init__(self, chunks: List["np.ndarray"]):
+        self.chunks = chunks
+        self.offsets = [0, *accumulate(len(chunk) for chunk in chunks)]
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self.chunks)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Column index out of range!")
+        chunk = bisect_right(self.offsets, index) - 1
+        return self.chunks[chunk][index - self.offsets[chunk]]
+
+    def to_numpy(self) -> "np.ndarray":
+        """ :return: The whole column in one array, which copies all chunks into memory. """
+        return np.concatenate(self.chunks)
+
+
+class ResultReader:
+    """ Reads the tables written by a ResultWriter back, part by part or column by column. """
+
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def parts(self, table: str = "games") -> List[str]:
+        """ :return: The paths of all parts of a table, in the order they were written. """
+        path = os.path.join(self.directory, table)
+        if not os.path.isdir(path):
+            return []
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.startswith("part-")]
+
+    def iter_parts(self, table: str = "games") -> Iterator[dict]:
+        """ :return: The columns of every part, see read_part. Only one part has to be looked at at a time. """
+        for path in self.parts(table):
+            yield read_part(path, TABLES[table])
+
+    def column(self, table: str, name: str):
+        """
+        :return: A column of all parts: a pyarrow chunked array or a ChunkedColumn of memory-mapped arrays, neither of
+                 which copies anything, or a list.
+        """
+        chunks = [part[name] for part in self.iter_parts(table)]
+        if not chunks:
+            return []
+        if pa is not None and isinstance(chunks[0], pa.ChunkedArray):
+            return pa.chunked_array([chunk for column in chunks for chunk in column.chunks])
+        if np is not None and isinstance(chunks[0], np.ndarray):
+            return ChunkedColumn(chunks)
+        return [value for chunk in chunks for value in chunk]
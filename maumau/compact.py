@@ -0,0 +1,353 @@
+from random import Random
+from typing import Dict, List, Tuple
+
+from cards import Pack
+from .rules import rule_table
+
+DRAW_KEEP: int = -1
+""" Move: draw, and keep a single drawn card even if it could be played. """
+DRAW_PLAY: int = -2
+""" Move: draw, and play a single drawn card right away if it is allowed. """
+FACE_SHIFT: int = 12
+CARD_BITS: int = (1 << FACE_SHIFT) - 1
+
+
+def play_move(code: int, face: int = -1) -> int:
+    """ :return: The move playing a card. For Jacks, face is the index of the face chosen. """
+    return code | (face + 1) << FACE_SHIFT
+
+
+def move_card(move: int) -> int:
+    return move & CARD_BITS
+
+
+def move_face(move: int) -> int:
+    """ :return: The face chosen with a Jack, or -1. """
+    return (move >> FACE_SHIFT) - 1
+
+
+class CompactRules:
+    """ Lookup tables of a pack that the compact games need. They are built once per pack. """
+
+    __slots__ = ("face_of", "rank_of", "face_masks", "rank_masks", "seven", "eight", "jack", "seven_mask",
+                 "jack_mask", "face_count", "all", "legal")
+
+    face_of: List[int]
+    rank_of: List[int]
+    face_masks: List[int]
+    rank_masks: List[int]
+    seven: int
+    eight: int
+    jack: int
+    seven_mask: int
+    jack_mask: int
+    face_count: int
+    all: int
+    legal: List[int]
+    """ The legal cards by situation, see RuleTable. """
+
+    def __init__(self, pack: Pack):
+        self.face_of = [card.face.index for card in pack.cards]
+        self.rank_of = [card.rank.index for card in pack.cards]
+        self.face_masks = list(pack.masks.face_masks)
+        self.rank_masks = list(pack.masks.rank_masks)
+        table = rule_table(pack)
+        self.seven = table.draw_two
+        self.eight = table.skip
+        self.jack = table.wild
+        self.seven_mask = table.draw_mask
+        self.jack_mask = table.wild_mask
+        self.face_count = len(pack.faces)
+        self.all = pack.masks.all
+        self.legal = table.legal
+
+
+_rules: Dict[Pack, CompactRules] = {}
+
+
+def compact_rules(pack: Pack) -> CompactRules:
+    rules = _rules.get(pack)
+    if rules is None:
+        rules = _rules[pack] = CompactRules(pack)
+    return rules
+
+
+class CompactGame:
+    """
+    A copy of the MauMau rules on plain ints, for AIs that need to play games ahead. Cards are codes, hands are
+    bitmasks and there are no player objects, events or checks. Decisions the engine would ask a player for are part of
+    the moves: the face chosen with a Jack and whether to play a drawn card right away.
+    """
+
+    __slots__ = ("rules", "hands", "counts", "deck", "below", "table_mask", "top", "next_face", "cards_to_draw",
+                 "miss_turn", "seat", "finished", "finish_order", "players_left", "rng")
+
+    rules: CompactRules
+    hands: List[int]
+    """ Hand bitmask of every seat. """
+    counts: List[int]
+    """ Number of cards in hand of every seat. """
+    deck: List[int]
+    """ Codes of the draw pile, top last. """
+    below: List[int]
+    """ Codes of the table pile under the top card. """
+    table_mask: int
+    top: int
+    next_face: int
+    cards_to_draw: int
+    miss_turn: bool
+    seat: int
+    """ The seat to move. """
+    finished: int
+    """ Bitmask of the finished seats. """
+    finish_order: List[int]
+    players_left: int
+    rng: Random
+
+    @classmethod
+    def determinize(cls,
+                    pack: Pack,
+                    seat: int,
+                    hand: int,
+                    counts: List[int],
+                    finished: List[int],
+                    top: int,
+                    next_face: int,
+                    cards_to_draw: int,
+                    table_mask: int,
+                    rng: Random,
+                    excluded: List[int] | None = None,
+                    fresh: List[int] | None = None,
+                    ) -> "CompactGame":
+        """
+        Create a game consistent with everything a player knows: the unseen cards are dealt randomly to the opponents,
+        according to their number of cards, and the rest makes up the deck.
+        :param seat: The seat of the player, who is to move.
+        :param hand: The player's hand bitmask.
+        :param counts: Number of cards in hand of every seat.
+        :param finished: The seats that already finished, in order.
+        :param table_mask: Bitmask of all cards on the table, including the top card.
+        :param excluded: (optional) Bitmask of the cards every seat is known not to hold, see CardTracker.
+        :param fresh: (optional) Number of cards every seat drew since, which may be any, see CardTracker.
+        """
+        game = cls.__new__(cls)
+        rules = game.rules = compact_rules(pack)
+        unseen = [code for code in range(len(rules.face_of)) if not (hand | table_mask) >> code & 1]
+        rng.shuffle(unseen)
+
+        game.hands = [0] * len(counts)
+        for other, count in enumerate(counts):
+            if other == seat:
+                game.hands[other] = hand
+                continue
+            # The cards held since the last pass are none of the excluded ones, as long as there are enough others
+            known = count - min(fresh[other], count) if fresh else 0
+            if known and excluded and excluded[other]:
+                for idx in range(len(unseen) - 1, -1, -1):
+                    if not known:
+                        break
+                    if not excluded[other] >> unseen[idx] & 1:
+                        game.hands[other] |= 1 << unseen.pop(idx)
+                        count -= 1
+                        known -= 1
+            for _ in range(count):
+                game.hands[other] |= 1 << unseen.pop()
+        game.counts = list(counts)
+        game.deck = unseen
+        game.below = [code for code in range(len(rules.face_of)) if table_mask >> code & 1 and code != top]
+        game.table_mask = table_mask
+        game.top = top
+        game.next_face = next_face
+        game.cards_to_draw = cards_to_draw
+        game.miss_turn = False
+        game.seat = seat
+        game.finished = 0
+        for other in finished:
+            game.finished |= 1 << other
+        game.finish_order = list(finished)
+        game.players_left = len(counts) - len(finished)
+        game.rng = rng
+        return game
+
+    def copy(self) -> "CompactGame":
+        game = CompactGame.__new__(CompactGame)
+        game.rules = self.rules
+        game.hands = self.hands[:]
+        game.counts = self.counts[:]
+        game.deck = self.deck[:]
+        game.below = self.below[:]
+        game.table_mask = self.table_mask
+        game.top = self.top
+        game.next_face = self.next_face
+        game.cards_to_draw = self.cards_to_draw
+        game.miss_turn = self.miss_turn
+        game.seat = self.seat
+        game.finished = self.finished
+        game.finish_order = self.finish_order[:]
+        game.players_left = self.players_left
+        game.rng = self.rng
+        return game
+
+    def is_over(self) -> bool:
+        return self.players_left < 2
+
+    def key(self, observer: int) -> Tuple:
+        """ :return: A compact hash key of everything the observer can see of the game. """
+        return (self.hands[observer], self.top, self.next_face, self.cards_to_draw, self.seat, self.table_mask,
+                tuple(self.counts))
+
+    def allowed(self) -> int:
+        return self.rules.legal[(self.top * self.rules.face_count + self.next_face) << 2]
+
+    def legal_cards(self) -> int:
+        """ :return: Bitmask of the cards the seat to move may play, including the 7-chain rule. """
+        return self.hands[self.seat] & self.rules.legal[(self.top * self.rules.face_count + self.next_face) << 2
+                                                        | (self.cards_to_draw > 1)]
+
+    def moves(self) -> List[int]:
+        """
+        :return: The moves worth searching. Like StupidAI, Jacks are only played if no other card fits, and cards are
+                 only drawn if none fits at all. A Jack is played with every face the player holds other cards of.
+        """
+        rules = self.rules
+        moves = []
+        legal = self.legal_cards()
+        cards = legal & ~rules.jack_mask or legal
+        while cards:
+            low = cards & -cards
+            cards ^= low
+            code = low.bit_length() - 1
+            if rules.rank_of[code] == rules.jack:
+                rest = self.hands[self.seat] & ~low
+                faces = [face for face in range(rules.face_count) if rest & rules.face_masks[face]] or [-1]
+                moves += [play_move(code, face) for face in faces]
+            else:
+                moves.append(code)
+        if moves:
+            return moves
+        moves.append(DRAW_PLAY)
+        # Whether to play a drawn card only matters if a single card is drawn
+        if self.cards_to_draw == 1:
+            moves.append(DRAW_KEEP)
+        return moves
+
+    def favourite_face(self, seat: int) -> int:
+        """ :return: The face the seat holds most cards of, like StupidAI chooses it. """
+        hand = self.hands[seat]
+        counts = [(hand & mask).bit_count() for mask in self.rules.face_masks]
+        return counts.index(max(counts))
+
+    def apply(self, move: int) -> None:
+        """ Let the seat to move make a move, then pass the turn on. """
+        if move < 0:
+            self.draw(move == DRAW_PLAY)
+        else:
+            self.play(move & CARD_BITS, (move >> FACE_SHIFT) - 1)
+        if self.players_left > 1:
+            self.advance()
+
+    def play(self, code: int, face: int) -> None:
+        rules = self.rules
+        seat = self.seat
+        self.hands[seat] &= ~(1 << code)
+        self.counts[seat] -= 1
+        self.below.append(self.top)
+        self.table_mask |= 1 << code
+        self.top = code
+
+        rank = rules.rank_of[code]
+        if rank == rules.seven:
+            if self.cards_to_draw < 2:
+                self.cards_to_draw = 0
+            self.cards_to_draw += 2
+        if rank == rules.eight:
+            self.miss_turn = True
+        if rank == rules.jack:
+            self.next_face = face if face >= 0 else self.favourite_face(seat)
+        else:
+            self.next_face = rules.face_of[code]
+
+        if self.counts[seat] == 0:
+            self.finish(seat)
+
+    def draw(self, play_drawn: bool) -> None:
+        seat = self.seat
+        if len(self.deck) < self.cards_to_draw:
+            self.replenish()
+        count = min(self.cards_to_draw, len(self.deck))
+        code = -1
+        for _ in range(count):
+            code = self.deck.pop()
+            self.hands[seat] |= 1 << code
+        self.counts[seat] += count
+        if count == 1 and play_drawn and self.allowed() >> code & 1:
+            self.play(code, -1)
+        self.cards_to_draw = 1
+
+    def replenish(self) -> None:
+        self.rng.shuffle(self.below)
+        self.deck[:0] = self.below
+        self.below = []
+        self.table_mask = 1 << self.top
+
+    def finish(self, seat: int) -> None:
+        self.finished |= 1 << seat
+        self.finish_order.append(seat)
+        self.players_left -= 1
+        if self.players_left == 1:
+            last = self.next_active(seat)
+            self.finished |= 1 << last
+            self.finish_order.append(last)
+            self.players_left = 0
+
+    def next_active(self, seat: int) -> int:
+        seat = (seat + 1) % len(self.counts)
+        while self.finished >> seat & 1:
+            seat = (seat + 1) % len(self.counts)
+        return seat
+
+    def advance(self) -> None:
+        while True:
+            self.seat = self.next_active(self.seat)
+            if not self.deck:
+                self.replenish()
+            if self.miss_turn:
+                self.miss_turn = False
+                continue
+            return
+
+    def rollout_move(self) -> int:
+        """ :return: A move chosen the way StupidAI plays: random non-Jacks first, Jacks only if nothing else fits. """
+        legal = self.legal_cards()
+        cards = legal & ~self.rules.jack_mask or legal
+        if not cards:
+            return DRAW_PLAY
+        pick = self.rng.randrange(cards.bit_count())
+        for _ in range(pick):
+            cards &= cards - 1
+        return (cards & -cards).bit_length() - 1
+
+    def rollout(self, max_moves: int = 1000) -> None:
+        """ Play on with random moves until the game is over, or stop after max_moves. """
+        while self.players_left > 1 and max_moves > 0:
+            self.apply(self.rollout_move())
+            max_moves -= 1
+
+    def rewards(self) -> List[float]:
+        """
+        :return: The reward of every seat, from 1 for the winner down to 0 for the loser. Players still playing share
+                 the places left by their number of cards: the fewer cards compared to each of the others, the more.
+        """
+        seats = len(self.counts)
+        last = max(seats - 1, 1)
+        rewards = [0.] * seats
+        for position, seat in enumerate(self.finish_order):
+            rewards[seat] = (last - position) / last
+        playing = [seat for seat in range(seats) if not self.finished >> seat & 1]
+        if len(playing) > 1:
+            best = (last - len(self.finish_order)) / last
+            for seat in playing:
+                count = self.counts[seat]
+                shares = [self.counts[other] / (count + self.counts[other]) for other in playing if other != seat]
+                rewards[seat] = best * sum(shares) / len(shares)
+        return rewards
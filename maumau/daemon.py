@@ -0,0 +1,277 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from functools import partial
+from glob import glob
+from typing import Callable, Dict, List, Tuple
+
+from cards import Pack, load_pack, load_shoe
+from .engine import MauMau
+from .events import EventSink
+from .players import BasePlayer, EndgameAI, HeuristicAI, SearchAI, StupidAI, Strategy
+from .rules import load_rules
+from .tournament import Entrant, Standing, Tournament
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "maumau.sock")
+""" Where the daemon listens by default. The thin client in query.py repeats it, so it does not need to import us. """
+
+
+def heuristic_player(name: str, **weights: float) -> HeuristicAI:
+    """ :return: A HeuristicAI with the weights of its strategy given one by one, as they are sent in jobs. """
+    return HeuristicAI(name, Strategy(**weights))
+
+
+PLAYER_TYPES: Dict[str, Callable[..., BasePlayer]] = {
+    "stupid": StupidAI,
+    "heuristic": heuristic_player,
+    "endgame": EndgameAI,
+    "search": SearchAI,
+}
+""" The players a job may ask for, by type. The options of a player are passed to its type as keyword arguments. """
+
+NUMBER = (int, float)
+
+PLAYER_OPTIONS: Dict[str, Dict[str, type | Tuple[type, ...]]] = {
+    "stupid": {},
+    "heuristic": {field.name: NUMBER for field in fields(Strategy)},
+    "endgame": {"endgame_cards": int, "endgame_unseen": int, "endgame_budget": NUMBER},
+    # Not the workers of SearchAI: every game is played on a worker of the daemon already, which must not start a pool
+    "search": {"iterations": (int, type(None)), "time_limit": NUMBER + (type(None),), "exploration": NUMBER,
+               "rollout_moves": int, "max_nodes": int},
+}
+""" The options a job may set for every player type, with the types of their values. """
+
+
+def positive_int(job: dict, key: str, default: int | None = None) -> int:
+    """ :return: The value of a key of a job, which has to be a positive int, or the default if it is missing. """
+    if key not in job:
+        if default is None:
+            raise ValueError(f"A job needs {key}!")
+        return default
+    value = job[key]
+    # bool is an int to Python, but not to a job
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"{key} has to be an int, not {type(value).__name__}!")
+    if value < 1:
+        raise ValueError(f"{key} has to be positive!")
+    return value
+
+
+def warm_up(packs: List[dict]) -> None:
+    """ Load the packs and play a game with each of them, so a fresh worker process is ready for jobs. """
+    for definition in packs:
+        pack = load_pack(definition)
+        players = [StupidAI(f"Warm-up {idx + 1}") for idx in range(2)]
+        MauMau(players, pack=pack, sink=EventSink(), seed=0).play(max_turns=1000)
+
+
+def standing_dict(standing: Standing) -> dict:
+    low, high = standing.confidence_interval()
+    return {"name": standing.name, "games": standing.games, "wins": standing.wins, "win_rate": standing.win_rate,
+            "interval": [low, high], "average_position": standing.average_position}
+
+
+class SimulationDaemon:
+    """
+    Runs simulation jobs for local clients, so they do not pay for starting interpreters, importing the game, reading
+    packs and spawning workers every time. The packs and rules found at start are loaded once, and a pool of worker
+    processes is started and warmed up before the first job.
+
+    Clients connect to a Unix socket and send jobs as JSON, one per line, e.g.
+
+        {"players": ["stupid", "stupid", {"type": "heuristic", "name": "Tuned", "options": {"wild": 0.5}}],
+         "pack": "french_32", "games": 1000, "seed": 0}
+
+    Besides the players and the number of games, all keys are optional: pack and rules are names of files loaded at
+    start or paths, copies asks for a shoe, and there are chunk_size, max_turns and results, which asks for the record
+    of every game. Players may only have the options of their type in PLAYER_OPTIONS. Jobs are split into chunks like
+    a Tournament, so the outcome only depends on the seed and the chunk size. As chunks finish, the daemon sends a
+    "progress" line for each, and a "done" line with the standings at the end, or an "error" line if the job is
+    invalid. A connection may send any number of jobs, one after the other.
+    """
+
+    path: str
+    workers: int
+    packs: Dict[str, Pack]
+    """ The packs loaded at start, by the name of their file without extension. """
+    rules: Dict[str, dict]
+    """ The rules loaded at start, by the name of their file without extension. """
+    executor: ProcessPoolExecutor | None
+    jobs_run: int
+    games_played: int
+
+    def __init__(self, path: str = DEFAULT_SOCKET, packs: str = "./packs", workers: int | None = None):
+        """
+        :param packs: Directory of the pack files to load at start. Rules files are looked for in its rules directory.
+        """
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.packs = {os.path.splitext(os.path.basename(file))[0]: load_pack(file)
+                      for file in sorted(glob(os.path.join(packs, "*.json")))}
+        self.rules = {os.path.splitext(os.path.basename(file))[0]: load_rules(file)
+                      for file in sorted(glob(os.path.join(packs, "rules", "*.json")))}
+        self.executor = None
+        self.jobs_run = 0
+        self.games_played = 0
+
+    def start(self) -> None:
+        """ Start the worker processes and wait until all of them are warmed up. """
+        definitions = [pack.definition for pack in self.packs.values()]
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up, initargs=(definitions,))
+        # Every worker is spawned as soon as there is a task it could take
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def stop(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def remove_stale_socket(self) -> None:
+        """ Remove the socket left behind by a daemon that did not stop cleanly, but never that of a running one. """
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except ConnectionRefusedError:
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"Another daemon is listening on {self.path}!")
+
+    async def serve_forever(self) -> None:
+        self.remove_stale_socket()
+        # Stop cleanly when a service manager asks for it, too
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        self.start()
+        try:
+            server = await asyncio.start_unix_server(self.handle, path=self.path)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def load_pack(self, name: str) -> Pack:
+        pack = self.packs.get(name)
+        return pack if pack is not None else load_pack(name)
+
+    @staticmethod
+    def entrant(idx: int, spec: str | dict) -> Entrant:
+        """ :return: The entrant of a player of a job, given by its type or a dict with type, name and options. """
+        if isinstance(spec, str):
+            spec = {"type": spec}
+        if not isinstance(spec, dict):
+            raise TypeError(f"Player {idx + 1} is neither a type nor a dict!")
+        kind = spec.get("type")
+        if not isinstance(kind, str) or kind not in PLAYER_TYPES:
+            raise ValueError(f"Unknown player type {kind}, choose from {', '.join(PLAYER_TYPES)}!")
+        name = spec.get("name") or f"{kind} {idx + 1}"
+        if not isinstance(name, str):
+            raise TypeError(f"The name of player {idx + 1} is not a string!")
+        options = spec.get("options") or {}
+        if not isinstance(options, dict):
+            raise TypeError(f"The options of player {idx + 1} are not a dict!")
+        allowed = PLAYER_OPTIONS[kind]
+        for option, value in options.items():
+            if option not in allowed:
+                raise ValueError(f"Unknown option {option} of a {kind} player, choose from "
+                                 f"{', '.join(allowed) or 'none'}!")
+            # bool is an int to Python, but not to a job
+            if isinstance(value, bool) or not isinstance(value, allowed[option]):
+                raise TypeError(f"Option {option} of player {idx + 1} has the wrong type {type(value).__name__}!")
+        factory = PLAYER_TYPES[kind]
+        if options:
+            factory = partial(factory, **options)
+        return Entrant(name, factory)
+
+    def tournament(self, job: dict) -> Tournament:
+        """ :return: The tournament playing the games of a job. """
+        if not isinstance(job, dict):
+            raise TypeError("A job has to be a JSON object!")
+        if not isinstance(job.get("players"), list):
+            raise TypeError("The players of a job have to be a list!")
+        entrants = [self.entrant(idx, spec) for idx, spec in enumerate(job["players"])]
+        if len(entrants) < 2:
+            raise ValueError("A game needs at least two players!")
+
+        pack = self.load_pack(job.get("pack") or MauMau.DEFAULT_PACK)
+        if job.get("copies"):
+            pack = load_shoe(pack, job["copies"])
+        elif len(entrants) * MauMau.HAND_SIZE >= len(pack.cards):
+            pack = MauMau.shoe_for(len(entrants), pack)
+        rules = job.get("rules")
+        if rules is not None:
+            rules = self.rules[rules] if rules in self.rules else load_rules(rules)
+
+        games = positive_int(job, "games")
+        # A few chunks per worker, so they finish at about the same time and progress arrives steadily
+        chunk_size = positive_int(job, "chunk_size", min(500, max(1, math.ceil(games / (4 * self.workers)))))
+        return Tournament(entrants, games=games, pack=pack, seed=int(job.get("seed", 0)), workers=self.workers,
+                          chunk_size=chunk_size, max_turns=positive_int(job, "max_turns", 10_000), rules=rules)
+
+    @staticmethod
+    async def send(writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Serve a single client connection, job after job, until it is closed. """
+        try:
+            while line := await reader.readline():
+                try:
+                    job = json.loads(line)
+                    tournament = self.tournament(job)
+                except (ValueError, TypeError, KeyError, OSError) as e:
+                    await self.send(writer, {"event": "error", "message": f"Invalid job: {e}"})
+                    continue
+                await self.run_job(tournament, writer, results=bool(job.get("results")))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_job(self, tournament: Tournament, writer: asyncio.StreamWriter, results: bool = False) -> None:
+        """ Play the games of a job on the workers and stream the results to the client as chunks finish. """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        futures = []
+        played = 0
+        try:
+            futures = [loop.run_in_executor(self.executor, call) for call in tournament.chunk_calls()]
+            for future in asyncio.as_completed(futures):
+                chunk = await future
+                for result in chunk:
+                    tournament.record(result)
+                played += len(chunk)
+                message = {"event": "progress", "games": played, "total": tournament.games}
+                if results:
+                    message["results"] = [asdict(result) for result in chunk]
+                await self.send(writer, message)
+        except ConnectionError:
+            # Nobody waits for the rest anymore
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            await self.send(writer, {"event": "error", "message": f"The job failed: {e!r}"})
+            return
+        self.jobs_run += 1
+        self.games_played += played
+        await self.send(writer, {"event": "done",
+                                 "games": played,
+                                 "aborted": tournament.aborted,
+                                 "elapsed": time.perf_counter() - start,
+                                 "standings": [standing_dict(standing) for standing in tournament.ranking()]})
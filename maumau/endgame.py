@@ -0,0 +1,398 @@
+import time
+from dataclasses import dataclass
+from itertools import combinations, islice
+from random import Random
+from typing import Dict, Iterator, List, Tuple
+
+from cards import Pack, iter_codes
+from .compact import CompactRules, compact_rules
+
+WIN: float = 1.
+
+EXACT: int = 1 << 30
+""" The depth of memoized values that no estimate went into. """
+
+Values = Dict[Tuple[int, int], float]
+""" Win probabilities by move: the code of a card and the face chosen with it, or (-1, -1) for drawing or keeping. """
+
+
+class BudgetExceeded(Exception):
+    """ Raised inside a search that ran out of time. """
+
+
+@dataclass(frozen=True)
+class EndgamePosition:
+    """ What the player to move knows in a game of two: their hand, the number of cards of the other and the table. """
+
+    hand: int
+    """ Bitmask of the player's hand. """
+    other_count: int
+    """ Number of cards of the other player. """
+    top: int
+    next_face: int
+    cards_to_draw: int
+    table_mask: int
+    """ Bitmask of all cards on the table, including the top card. """
+    other_excluded: int = 0
+    """ Bitmask of the cards the other player is known not to hold, apart from the ones they drew since, see belief. """
+    other_fresh: int = 0
+    """ Number of cards the other player drew since they were seen passing, which may be any. """
+
+    def unseen(self, rules: CompactRules) -> int:
+        """ :return: The cards the player has not seen, which are in the deck or in the other hand. """
+        return rules.all & ~self.table_mask & ~self.hand
+
+
+@dataclass
+class SolveStats:
+    """ Statistics of the searches of a solver, added up over all decisions. """
+
+    decisions: int = 0
+    solved: int = 0
+    """ Number of decisions for which at least one search finished in time. """
+    exact: int = 0
+    """ Number of decisions solved to the end of the game for every hand of the other player. """
+    proven: int = 0
+    """ Number of decisions whose best move was proven, see EndgameSolver.proven. """
+    deals: int = 0
+    """ Number of hands of the other player searched. """
+    depth: int = 0
+    """ Turns searched ahead by the deepest search that finished in time, added up over the decisions. """
+    nodes: int = 0
+    """ Number of positions searched, not counting the ones found in the memo table. """
+    lookups: int = 0
+    hits: int = 0
+    cutoffs: int = 0
+    """ Number of positions estimated instead of searched. """
+    elapsed: float = 0.
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth / self.solved if self.solved else 0.
+
+
+class EndgameSolver:
+    """
+    Plays endgames of two players, following the rules to the letter: 7-chains, 8s, the face chosen with a Jack and
+    playing a drawn card right away.
+
+    Given the hand of the other player, the game is one of perfect information apart from the cards drawn, which are
+    chance events: every card of the deck is equally likely. The solver searches such games depth first for the win
+    probabilities with best play on both sides, going one turn deeper at a time until the latency budget is used up or
+    the games are solved to their end. Positions are memoized in a table keyed by the hands, the deck and the table
+    pile as bitmasks, together with the depth they were searched to, which is shared by all searches.
+
+    Since the hand of the other player is hidden, the solver searches all hands they may hold, or a random sample of
+    them if there are many, and plays the move that wins most often on average. Positions deeper than the search goes,
+    and positions in which the hands grew beyond max_cards, are estimated by the share of cards the other player holds,
+    see estimate(). Since drawing is always allowed and the table pile turns into the deck again, hardly any search
+    gets by without estimates, so only a move that wins for certain against every hand is proven, see proven.
+    """
+
+    rules: CompactRules
+    max_cards: int
+    """ Hands of both players together may grow up to this many cards in the search. """
+    max_depth: int
+    """ Number of turns searched ahead at most. """
+    max_deals: int
+    """ Number of hands of the other player searched at most. """
+    budget: float
+    """ Seconds per decision. """
+    max_entries: int
+    memo: Dict[Tuple[int, ...], Tuple[float, int]]
+    """ Win probability of the player to move, and the depth it was searched to, by position. """
+    estimates: int
+    """ Number of estimates that went into the searches so far, which tells whether a value is exact. """
+    deadline: float
+    proven: bool
+    """
+    Whether the best move of the last decision is certain: it wins against every hand the other player may hold,
+    whatever they draw, or the decision was solved to the end of the game. Estimates are never certain wins.
+    """
+    stats: SolveStats
+    rng: Random
+
+    def __init__(self,
+                 pack: Pack,
+                 max_cards: int = 16,
+                 max_depth: int = 32,
+                 max_deals: int = 12,
+                 budget: float = .05,
+                 max_entries: int = 1_000_000,
+                 rng: Random | None = None,
+                 ):
+        self.rules = compact_rules(pack)
+        if self.rules.seven < 0 or self.rules.eight < 0 or self.rules.jack < 0:
+            raise ValueError("The endgame solver only knows the classic rules!")
+        self.max_cards = max_cards
+        self.max_depth = max_depth
+        self.max_deals = max_deals
+        self.budget = budget
+        self.max_entries = max_entries
+        self.memo = {}
+        self.estimates = 0
+        self.deadline = 0.
+        self.proven = False
+        self.stats = SolveStats()
+        self.rng = Random() if rng is None else rng
+
+    def deals(self, position: EndgamePosition) -> List[int]:
+        """
+        :return: The hands the other player may hold, all of them if there are few, else a random sample. Cards they
+                 drew since they were last seen passing may be any, the others are none of the excluded ones.
+        """
+        unseen = position.unseen(self.rules)
+        count = position.other_count
+        if unseen.bit_count() < count:
+            return []
+        candidates = unseen & ~position.other_excluded
+        known = count - min(position.other_fresh, count)
+        if candidates.bit_count() < known:
+            candidates, known = unseen, 0
+        hands = list(islice(self.hands(candidates, unseen, known, count), self.max_deals + 1))
+        if len(hands) <= self.max_deals:
+            return hands
+        hands = []
+        candidate_codes = list(iter_codes(candidates))
+        for _ in range(self.max_deals):
+            hand = sum(1 << code for code in self.rng.sample(candidate_codes, known))
+            hand |= sum(1 << code for code in self.rng.sample(list(iter_codes(unseen & ~hand)), count - known))
+            hands.append(hand)
+        return hands
+
+    def hands(self, candidates: int, unseen: int, known: int, count: int) -> Iterator[int]:
+        """ :return: All hands of count cards that hold known of the candidates, and any unseen cards besides. """
+        seen = set()
+        for cards in combinations(iter_codes(candidates), known):
+            hand = sum(1 << code for code in cards)
+            for rest in combinations(iter_codes(unseen & ~hand), count - known):
+                full = hand | sum(1 << code for code in rest)
+                if full not in seen:
+                    seen.add(full)
+                    yield full
+
+    def solve_card(self, position: EndgamePosition) -> Values:
+        """
+        :return: The average win probability of every move, or nothing if the budget did not even allow to look one
+                 turn ahead.
+        """
+        return self.solve(position, -1)
+
+    def solve_drawn(self, position: EndgamePosition, drawn: int) -> Values:
+        """
+        :param drawn: The code of the card just drawn, which is in the hand already.
+        :return: The average win probability of playing the drawn card, with every face for a Jack, and of keeping it.
+        """
+        return self.solve(position, drawn)
+
+    def solve(self, position: EndgamePosition, drawn: int) -> Values:
+        start = time.perf_counter()
+        self.deadline = start + self.budget
+        if len(self.memo) > self.max_entries:
+            self.memo.clear()
+        stats = self.stats
+        stats.decisions += 1
+        unseen = position.unseen(self.rules)
+        below = position.table_mask & ~(1 << position.top)
+        deals = self.deals(position)
+        exhaustive = len(deals) < self.max_deals or unseen.bit_count() <= position.other_count
+        best: Values = {}
+        depth = 0
+        self.proven = False
+        try:
+            for depth in range(1, self.max_depth + 1):
+                estimates = self.estimates
+                totals: Values = {}
+                for other in deals:
+                    for move, value in self.root_values(position, other, unseen & ~other, below, drawn,
+                                                        depth).items():
+                        totals[move] = totals.get(move, 0.) + value
+                best = {move: total / len(deals) for move, total in totals.items()}
+                if self.estimates == estimates:
+                    stats.exact += exhaustive
+                    self.proven = exhaustive
+                    break
+                if exhaustive and max(best.values()) == WIN:
+                    # Searching deeper only refines the moves that are worse anyway
+                    self.proven = True
+                    break
+        except BudgetExceeded:
+            depth -= 1
+        stats.proven += self.proven
+        if best:
+            stats.solved += 1
+            stats.deals += len(deals)
+            stats.depth += depth
+        stats.elapsed += time.perf_counter() - start
+        return best
+
+    def root_values(self, position: EndgamePosition, other: int, deck: int, below: int, drawn: int, depth: int
+                    ) -> Values:
+        hand, top, face, to_draw = position.hand, position.top, position.next_face, position.cards_to_draw
+        if drawn >= 0:
+            # The drawn card is in the hand already, and not in the deck
+            rest = hand & ~(1 << drawn)
+            skip = self.rules.rank_of[drawn] == self.rules.eight
+            values = {(-1, -1): self.next_turn(hand, other, deck, below, top, face, 1, False, depth)}
+            for face_chosen in self.faces(drawn):
+                values[(drawn, face_chosen)] = self.after_play(rest, other, deck, below | 1 << top, drawn,
+                                                               face_chosen, 1, skip, depth)
+            return values
+        values = {(-1, -1): self.draw(hand, other, deck, below, top, face, to_draw, depth)}
+        for code in iter_codes(hand & self.legal(top, face, to_draw)):
+            for face_chosen in self.faces(code):
+                values[(code, face_chosen)] = self.play(hand, other, deck, below, top, code, face_chosen, to_draw,
+                                                        depth)
+        return values
+
+    def legal(self, top: int, face: int, to_draw: int) -> int:
+        return self.rules.legal[(top * self.rules.face_count + face) << 2 | (to_draw > 1)]
+
+    def faces(self, code: int) -> range:
+        """ :return: The faces to choose from after playing the card: all for a Jack, else just its own. """
+        if self.rules.rank_of[code] == self.rules.jack:
+            return range(self.rules.face_count)
+        return range(self.rules.face_of[code], self.rules.face_of[code] + 1)
+
+    def estimate(self, hand: int, other: int, top: int, face: int, to_draw: int) -> float:
+        """
+        :return: A guess of the win probability of the player to move, by the share of cards the other holds once the
+                 player played a card, or drew if they cannot.
+        """
+        self.estimates += 1
+        self.stats.cutoffs += 1
+        count = hand.bit_count()
+        if hand & self.legal(top, face, to_draw):
+            count -= 1
+            if not count:
+                return WIN
+        else:
+            count += to_draw
+        other_count = other.bit_count()
+        return other_count / (count + other_count)
+
+    def turn(self, hand: int, other: int, deck: int, below: int, top: int, face: int, to_draw: int, depth: int
+             ) -> float:
+        """
+        :param depth: Number of turns to search ahead, this one included.
+        :return: The win probability of the player to move, with best play on both sides.
+        """
+        if not depth or hand.bit_count() + other.bit_count() > self.max_cards:
+            return self.estimate(hand, other, top, face, to_draw)
+        key = (hand, other, deck, below, top, face, to_draw)
+        stats = self.stats
+        stats.lookups += 1
+        entry = self.memo.get(key)
+        if entry is not None and entry[1] >= depth:
+            stats.hits += 1
+            if entry[1] < EXACT:
+                # The value rests on estimates, even though they were made deeper than needed now
+                self.estimates += 1
+            return entry[0]
+        stats.nodes += 1
+        if not stats.nodes & 255 and time.perf_counter() > self.deadline:
+            raise BudgetExceeded()
+
+        estimates = self.estimates
+        depth -= 1
+        best = self.draw(hand, other, deck, below, top, face, to_draw, depth)
+        for code in iter_codes(hand & self.legal(top, face, to_draw)):
+            if best == WIN:
+                break
+            for face_chosen in self.faces(code):
+                value = self.play(hand, other, deck, below, top, code, face_chosen, to_draw, depth)
+                if value > best:
+                    best = value
+        self.memo[key] = (best, EXACT if self.estimates == estimates else depth + 1)
+        return best
+
+    def play(self, hand: int, other: int, deck: int, below: int, top: int, code: int, face: int, to_draw: int,
+             depth: int) -> float:
+        """ :return: The win probability of the player to move after playing the card. """
+        rank = self.rules.rank_of[code]
+        if rank == self.rules.seven:
+            to_draw = (to_draw if to_draw > 1 else 0) + 2
+        return self.after_play(hand & ~(1 << code), other, deck, below | 1 << top, code, face, to_draw,
+                               rank == self.rules.eight, depth)
+
+    def after_play(self, hand: int, other: int, deck: int, below: int, top: int, face: int, to_draw: int,
+                   skip: bool, depth: int) -> float:
+        if not hand:
+            return WIN
+        return self.next_turn(hand, other, deck, below, top, face, to_draw, skip, depth)
+
+    def next_turn(self, hand: int, other: int, deck: int, below: int, top: int, face: int, to_draw: int,
+                  skip: bool, depth: int) -> float:
+        """ :return: The win probability of the player who just moved, once the turn passes on. """
+        # Every turn starts with turning the table pile into the deck if it ran out, even a turn that is skipped
+        if not deck:
+            deck, below = below, 0
+        if skip:
+            return self.turn(hand, other, deck, below, top, face, to_draw, depth)
+        return 1. - self.turn(other, hand, deck, below, top, face, to_draw, depth)
+
+    def draw(self, hand: int, other: int, deck: int, below: int, top: int, face: int, to_draw: int, depth: int
+             ) -> float:
+        """ :return: The win probability of the player to move when they draw, on average over the cards drawn. """
+        count = deck.bit_count()
+        if count >= to_draw:
+            outcomes = [(drawn, deck & ~drawn, below) for drawn in self.subsets(deck, to_draw)]
+        else:
+            # The table pile is shuffled under the deck, whose cards are drawn first, and becomes the deck
+            rest = min(to_draw - count, below.bit_count())
+            outcomes = [(deck | drawn, below & ~drawn, 0) for drawn in self.subsets(below, rest)]
+        if not outcomes:
+            return self.next_turn(hand, other, deck, below, top, face, 1, False, depth)
+        allowed = self.legal(top, face, to_draw)
+        if not depth:
+            return self.draw_estimate(hand, other, outcomes, top, face, allowed)
+
+        total = 0.
+        for drawn, new_deck, new_below in outcomes:
+            value = self.next_turn(hand | drawn, other, new_deck, new_below, top, face, 1, False, depth)
+            # A single card drawn may be played right away, and a 7 played like that does not count
+            if drawn & (drawn - 1) == 0 and allowed & drawn:
+                code = drawn.bit_length() - 1
+                skip = self.rules.rank_of[code] == self.rules.eight
+                for face_chosen in self.faces(code):
+                    played = self.after_play(hand, other, new_deck, new_below | 1 << top, code, face_chosen, 1, skip,
+                                             depth)
+                    if played > value:
+                        value = played
+            total += value
+        return total / len(outcomes)
+
+    def draw_estimate(self, hand: int, other: int, outcomes: List[Tuple[int, int, int]], top: int, face: int,
+                      allowed: int) -> float:
+        """
+        The same as draw() for a search that ends with this turn. Which cards are kept makes no difference to the
+        estimates, so only the outcomes in which the drawn card may be played right away are looked at one by one.
+        """
+        drawn = outcomes[0][0]
+        keep = 1. - self.estimate(other, hand | drawn, top, face, 1)
+        if drawn & (drawn - 1):
+            return keep
+        total = 0.
+        for drawn, _, _ in outcomes:
+            value = keep
+            if allowed & drawn:
+                code = drawn.bit_length() - 1
+                skip = self.rules.rank_of[code] == self.rules.eight
+                for face_chosen in self.faces(code):
+                    played = self.estimate(hand, other, code, face_chosen, 1) if skip \
+                        else 1. - self.estimate(other, hand, code, face_chosen, 1)
+                    if played > value:
+                        value = played
+            total += value
+        return total / len(outcomes)
+
+    @staticmethod
+    def subsets(mask: int, size: int) -> List[int]:
+        """ :return: All subsets of the mask with the given number of cards. """
+        if size <= 0:
+            return [0] if size == 0 else []
+        return [sum(1 << code for code in cards) for cards in combinations(iter_codes(mask), size)]
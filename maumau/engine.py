@@ -1,94 +1,231 @@
+import copy
+import random
 import time
-from random import shuffle
-from typing import List, Dict, Callable
+from array import array
+from collections import deque
+from functools import partial
+from random import Random
+from typing import List, Dict, Callable, Set, Tuple, TypeVar
 
-from cards import Deck, Hand, Card
+from cards import Deck, Hand, Card, Pack, PackMasks, PackSource, load_pack, load_shoe
 from cards.card import IndexedSymbol
+from .belief import CardTracker
 from .errors import CardNotAllowedError
-from .players import BasePlayer, HumanPlayer
+from .events import EventSink, ConsoleSink
+from .players import BasePlayer
+from .result import GameResult
+from .rules import PENDING_DRAW, PENDING_SKIP, RuleTable, RulesSource, rule_table
+from .state import DRAW, SHOW_ALL, GameState, Move, Observation, Snapshot
+
+T = TypeVar("T")
+
+
+def copy_rng(rng: Random) -> Random:
+    """ :return: A generator in the same state, without the cost of seeding it first. """
+    copied = Random.__new__(Random)
+    copied.setstate(rng.getstate())
+    return copied
+
+
+def seat_seed(seed: int, seat: int) -> int:
+    """
+    :return: The seed of the generator of a seat in the game with the given seed. Integers are seeded without hashing,
+             unlike strings.
+    """
+    return seed << 32 | seat
+
+
+def fork_seed(seed: int, turns: int) -> int:
+    """
+    :return: The seed of a fork of the game with the given seed after some turns, if the fork does not copy the states
+             of the random generators. It differs from the seeds of all seats of the game.
+    """
+    return (seed << 32 | turns) << 32
+
+
+def run_all(handlers: Tuple[Callable[["MauMau"], None], ...], game: "MauMau") -> None:
+    for handler in handlers:
+        handler(game)
+
+
+_effects: Dict[Tuple[type, RuleTable], List[Callable[["MauMau"], None]]] = {}
+""" The compiled effects by game class and rules, see MauMau.compile_effects(). """
 
 
 class MauMau:
     DEBUG: bool = False
+    DEFAULT_PACK: str = "./packs/french_32.json"
+    HAND_SIZE: int = 5
+    """ Number of cards dealt to every player. """
+
+    pack: Pack
+    seed: int
+    """ Seed of the game. Playing with the same seed, pack and players in the same order repeats the game. """
+    rng: Random
 
     deck: Deck
     table: Hand
 
     players: List[BasePlayer]
     finishers: List[BasePlayer]
+    seat_of: Dict[BasePlayer, int]
+    finished_seats: Set[int]
+    hand_counts: List[int]
+    """ Number of cards in hand of every player, by seat. """
+    next_seat: List[int]
+    """ Ring of the seats still playing: the seat after each seat. Finished seats are unlinked. """
+    prev_seat: List[int]
+    state: GameState
+    """ Read-only view of this game that is handed to players. """
+    observations: List[Observation]
+    """ What every player sees when choosing a move, by seat. These are views of the game, too. """
 
     cards_to_draw: int
     miss_turn: bool
     next_face: IndexedSymbol
-
-    def __init__(self, players: List[BasePlayer]):
-        self.deck = Deck("./packs/french_32.json")
+    chain: int
+    """ Number of 7s, or other draw cards, on top of the table. """
+    pending: int
+    """ PENDING_DRAW and PENDING_SKIP, if the next move has to answer draw cards or a skip. """
+    reversed: bool
+    """ Whether the direction of play is reversed, i.e. next_seat and prev_seat are swapped. """
+
+    masks: PackMasks
+    rules: RuleTable
+    """ Legal cards of every situation and the effects of every rank. """
+    effects: List[Callable[["MauMau"], None]]
+    """ Handler of the effects of every rank, by rank index, which is called with the game. """
+    tracker: CardTracker | None
+    """ What everybody knows about the unseen cards, only kept up to date if a player tracks cards. """
+    allowed: int
+    """ Bitmask of all cards that may currently be played. """
+
+    sink: EventSink
+    """ Receives all game events. Interactive games print them, simulations usually discard them. """
+    events: bool
+    """
+    Whether the sink wants the events of every turn. The plain EventSink discards everything, so games without any other
+    sink do not even build the events.
+    """
+    turn_delay: float
+    """ Seconds to wait after each turn, so humans can follow the game. """
+    timed: bool
+    """
+    Whether the sink wants timings. Only then turns are reported and decisions are timed, so games without collectors
+    do not pay for the clock.
+    """
+    turn_started_ns: int
+    decision_ns: int
+    """ Nanoseconds the player to move spent on decisions in the current turn. """
+
+    seat: int
+    """ Index of the player whose turn is next. """
+    last_seat: int
+    round: int
+    turns: int
+    replenishes: int
+    cards_drawn: List[int]
+    """ Number of cards every player drew, by seat. """
+
+    def __init__(self,
+                 players: List[BasePlayer],
+                 pack: PackSource = DEFAULT_PACK,
+                 sink: EventSink | None = None,
+                 seed: int | None = None,
+                 rules: RulesSource = None,
+                 ):
+        """
+        :param rules: (optional) The rules to play by, as the path of a rules file or a rules definition. By default,
+                      the classic rules apply, with the special ranks named in the pack.
+        """
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = Random(self.seed)
+        self.deck = Deck(pack, rng=self.rng)
+        self.pack = self.deck.pack
         self.table = Hand()
         self.players = []
         self.finishers = []
-
+        self.sink = ConsoleSink() if sink is None else sink
+        self.events = type(self.sink) is not EventSink
+        self.turn_delay = 0
+        self.timed = self.sink.timed
+        self.turn_started_ns = 0
+        self.decision_ns = 0
+
+        self.masks = self.deck.masks
+        self.rules = rule_table(self.pack, rules)
+        self.effects = self.compile_effects(self.rules)
+
+        if len(players) * self.HAND_SIZE >= len(self.pack.cards):
+            raise ValueError(f"{len(self.pack.cards)} cards are not enough for {len(players)} players, "
+                             f"play with a shoe of several packs, see shoe_for!")
         self.deck.shuffle()
 
-        for player in players:
-            if player in self.players:
+        self.seat_of = {}
+        self.hand_counts = []
+        for seat, player in enumerate(players):
+            if player in self.seat_of:
                 raise ValueError("Cannot have multiple players with identical names!")
             player.hand = Hand()
-            player.hand.draw_from(self.deck, 5)
+            # Players get their own generators, so their decisions do not change how the deck is shuffled
+            player.rng = Random(seat_seed(self.seed, seat))
+            player.hand.draw_from(self.deck, self.HAND_SIZE)
             player.hand.sort()
             self.players.append(player)
+            self.seat_of[player] = seat
+            self.hand_counts.append(len(player.hand.cards))
+        self.finished_seats = set()
+        self.next_seat = [(seat + 1) % len(self.players) for seat in range(len(self.players))]
+        self.prev_seat = [(seat - 1) % len(self.players) for seat in range(len(self.players))]
+        self.state = GameState(self)
+        self.observations = [Observation(self, seat) for seat in range(len(self.players))]
+        self.tracker = None
+        for seat, player in enumerate(self.players):
+            player.seat = seat
+            player.game_state = self.state
 
         self.table.draw_from(self.deck, 1)
         self.next_face = self.table.cards[-1].face
+        self.chain = 1 if self.rules.draw_counts[self.table.cards[-1].rank.index] else 0
+        self.update_allowed()
+        if any(player.tracks_cards for player in self.players):
+            self.tracker = CardTracker(self.pack, self.table, self.hand_counts)
 
-    def is_card_allowed(self, card: Card) -> bool:
+        # In case of a 7, records how many cards are to be drawn if 7 chain is not continued
+        self.cards_to_draw = 1  # Start at 1, because it is also used for normal drawing
+        self.miss_turn = False  # Record if an 8 is played
+        self.pending = 0
+        self.reversed = False
+
+        self.seat = 0
+        self.last_seat = len(self.players)
+        self.round = 0
+        self.turns = 0
+        self.replenishes = 0
+        self.cards_drawn = [0] * len(self.players)
+
+    def update_allowed(self) -> None:
         # Valid if any of the following is valid:
         # - matches current face
         # - matches previous card's rank
         # - is a Jake
-        return card.face == self.next_face \
-            or card.rank == self.table.cards[-1].rank \
-            or card.rank.symbol == "J"
-
-    def pick_a_card(self,
-                    choice_method: Callable[..., int | str],
-                    player_hand: Hand,
-                    current_card: Card,
-                    current_face: IndexedSymbol,
-                    cards_to_draw: int,
-                    active_players_card_count: Dict[str, int],
-                    ) -> int | str:
-        while True:
-            choice = choice_method(player_hand=player_hand,
-                                   current_card=current_card,
-                                   current_face=current_face,
-                                   cards_to_draw=cards_to_draw,
-                                   active_players_card_count=active_players_card_count)
-            try:
-                choice = int(choice)
-                if choice > len(player_hand.cards) - 1 or choice < 0:
-                    print("Invalid option!")
-                    continue
-                break
-            except ValueError:
-                if choice in ["d"]:
-                    break
-                elif choice == "!":
-                    print(f"DEBUGGING:\n"
-                          + "\n".join(['%s: %s' % (player.name, player.hand) for player in self.players])
-                          + f"\nTable: {self.table}")
-                else:
-                    print("Invalid option!")
-                    continue
+        self.allowed = self.rules.allowed(self.table.cards[-1].code, self.next_face.index)
+
+    def is_card_allowed(self, card: Card) -> bool:
+        return self.allowed >> card.code & 1 == 1
 
-        return choice
+    def legal_mask(self, hand: Hand) -> int:
+        """ :return: Bitmask of all cards in the hand that may currently be played. """
+        return hand.mask & self.allowed
 
     def print_scoreboard(self):
-        for player in self.players:
-            if player not in self.finishers:
+        for seat, player in enumerate(self.players):
+            if seat not in self.finished_seats:
+                self.finished_seats.add(seat)
                 self.finishers.append(player)
                 break
-        print("Game over!\nScore board:")
-        print("\n".join([f"{idx + 1}.: {player.name}" for idx, player in enumerate(self.finishers)]))
+        if self.events:
+            self.sink("game_over", game=self, finishers=self.finishers)
 
     def replenish_deck(self, min_cnt: int | None = None) -> None:
         """
@@ -97,173 +234,541 @@ class MauMau:
         :return: Nothing.
         """
         if min_cnt is None or len(self.deck.cards) < min_cnt:
-            old_cards = self.table.cards[:-1]
-            shuffle(old_cards)
-            self.deck.cards = old_cards + self.deck.cards
-            self.table.cards = self.table.cards[-1:]
-            print("Deck was replenished")
+            old_cards = self.table.collect()
+            self.rng.shuffle(old_cards)
+            self.deck.put_cards_under(old_cards)
+            self.chain = min(self.chain, 1)
+            self.replenishes += 1
+            if self.events:
+                self.sink("replenished")
 
     def get_draw_count(self):
-        count = 0
-        for card in reversed(self.table.cards):
-            if card.rank.symbol == "7":
-                count += 2
-            else:
-                break
-        return count
-
-    @staticmethod
-    def pick_a_face(choice_method: Callable[..., IndexedSymbol],
-                    player_hand: Hand,
-                    current_face: IndexedSymbol,
-                    available_faces: List[IndexedSymbol],
-                    ) -> IndexedSymbol:
-        while True:
-            chosen_face = choice_method(player_hand=player_hand,
-                                        current_face=current_face,
-                                        available_faces=available_faces)
-            try:
-                available_faces.index(chosen_face)
-                break
-
-            except ValueError:
-                print("Invalid option!")
-                continue
-
-        return chosen_face
+        return self.cards_to_draw if self.pending & PENDING_DRAW else 0
 
-    def draw_cards(self, player: BasePlayer):
+    def draw_from_deck(self, player: BasePlayer) -> List[Card]:
+        """
+        Let the player draw the cards that are due, replenishing the deck if necessary.
+        :return: The cards drawn, which may be none if there are no cards left at all.
+        """
+        if self.tracker is not None:
+            self.track_pass(player)
         self.replenish_deck(self.cards_to_draw)
         if len(self.deck.cards) < self.cards_to_draw:
             self.cards_to_draw = len(self.deck.cards)
-        if self.cards_to_draw > 0:
-            drawn_cards = player.hand.draw_from(self.deck, self.cards_to_draw)
+        if self.cards_to_draw == 0:
+            if self.events:
+                self.sink("drew_nothing", player=player)
+            return []
+        drawn_cards = player.hand.draw_from(self.deck, self.cards_to_draw)
+        seat = self.seat_of[player]
+        self.hand_counts[seat] = len(player.hand.cards)
+        if self.tracker is not None:
+            self.tracker.drew(seat, self.cards_to_draw)
+        self.cards_drawn[seat] += self.cards_to_draw
+        if self.events:
             if self.cards_to_draw == 1:
-                print(f"{player.name} drew a card, and has {len(player.hand.cards)} cards left.")
-                if self.is_card_allowed(drawn_cards[0]) \
-                        and player.choose_play_immediately(drawn_card=drawn_cards[0]):
-                    self.play_card(player, -1)
+                self.sink("drew", player=player, cards_left=len(player.hand.cards))
             else:
-                print(f"{player.name} drew {self.cards_to_draw} cards, "
-                      f"and has {len(player.hand.cards)} cards left.")
+                self.sink("drew_many", player=player, count=self.cards_to_draw, cards_left=len(player.hand.cards))
+        return drawn_cards
+
+    def can_play_drawn(self, drawn_cards: List[Card]) -> bool:
+        """ :return: Whether the player may play the card just drawn right away. """
+        return len(drawn_cards) == 1 and self.is_card_allowed(drawn_cards[0])
+
+    def end_draw(self, player: BasePlayer, drawn_cards: List[Card]) -> None:
+        if drawn_cards:
             player.hand.sort()
         self.cards_to_draw = 1
+        self.pending &= ~PENDING_DRAW
+
+    def take_skip(self, player: BasePlayer) -> None:
+        """ Skip a player who does not pass a pending skip on. """
+        if self.tracker is not None:
+            self.track_pass(player)
+        self.pending &= ~PENDING_SKIP
+        if self.events:
+            self.sink("skip_taken", player=player, cards_left=len(player.hand.cards))
+
+    def track_pass(self, player: BasePlayer) -> None:
+        """ Tell the tracker the player could not, or did not want to, play any of the cards they may play. """
+        self.tracker.passed(self.seat_of[player],
+                            self.rules.legal_mask(self.table.cards[-1].code, self.next_face.index, self.pending))
+
+    def draw_cards(self, player: BasePlayer):
+        if self.pending & PENDING_SKIP:
+            self.take_skip(player)
+            return
+        drawn_cards = self.draw_from_deck(player)
+        if self.can_play_drawn(drawn_cards) and self.ask(player.choose_play_immediately, drawn_cards[0]):
+            self.play_card(player, drawn_cards[0])
+        self.end_draw(player, drawn_cards)
+
+    def ask(self, decision: Callable[..., T], *args) -> T:
+        """ Ask a player for a decision, and time it if the sink wants timings. """
+        if not self.timed:
+            return decision(*args)
+        start = time.perf_counter_ns()
+        try:
+            return decision(*args)
+        finally:
+            self.decision_ns += time.perf_counter_ns() - start
+
+    def observe(self, player: BasePlayer) -> Observation:
+        """ :return: What the player sees when choosing a move, a view of the game that is created once per seat. """
+        return self.observations[self.seat_of[player]]
+
+    def show_all(self) -> None:
+        """ Show all hands and the table, when a player asks for it with SHOW_ALL. """
+        self.sink("debug",
+                  message="DEBUGGING:\n"
+                          + "\n".join(['%s: %s' % (player.name, player.hand) for player in self.players])
+                          + f"\nTable: {self.table}")
 
-    def choose_action(self, player: BasePlayer) -> int | str:
-        return player.choose_card(is_card_allowed=self.is_card_allowed,
-                                  current_card=self.table.cards[-1],
-                                  current_face=self.next_face,
-                                  cards_to_draw=self.cards_to_draw,  # the only affection so far
-                                  active_players_card_count=[len(player.hand.cards) for player in
-                                                             self.players])
+    def choose_action(self, player: BasePlayer) -> Move:
+        if not self.timed:
+            return player.choose_card(self.observe(player))
+        return self.ask(player.choose_card, self.observe(player))
+
+    def holds(self, player: BasePlayer, move: Move) -> bool:
+        """ :return: Whether the move is a card from the player's hand. """
+        if not isinstance(move, Card) or not player.hand.mask >> move.code & 1:
+            return False
+        card = self.pack.cards[move.code]
+        return card is move or card == move
 
     def enforce_chain(self, picked_card: Card) -> bool:
         """
         Check if the player needs to chain and chained properly.
         :return: Whether the player needed to and did chain.
         """
-        if self.cards_to_draw > 1 and picked_card.rank.symbol != "7":
-            print(f"You cannot play a {picked_card.rank.symbol} in response to a 7!")
-            print(f"You have to either draw {self.cards_to_draw} cards or chain with another 7!")
+        if self.pending and not self.rules.answers[self.pending] >> picked_card.code & 1:
+            if self.pending & PENDING_DRAW:
+                self.sink("chain_required", card=picked_card, cards_to_draw=self.cards_to_draw)
+            else:
+                self.sink("skip_required", card=picked_card)
             return False
         return True
 
+    def put_card(self,
+                 player: BasePlayer,
+                 played_card: Card
+                 ) -> Card:
+        """
+        Move a card from the player's hand onto the table and apply its effects, except for the face chosen with a Jack.
+        :return: The card played.
+        """
+        if not self.is_card_allowed(played_card):
+            raise CardNotAllowedError(played_card, self.table.cards[-1], self.next_face)
+
+        hand = player.hand
+        hand.remove(played_card)
+        self.table.put(played_card)
+        seat = self.seat_of[player]
+        self.hand_counts[seat] = len(hand.cards)
+        if self.tracker is not None:
+            self.tracker.played(seat)
+        if self.events:
+            self.sink("played", player=player, card=played_card, cards_left=len(hand.cards))
+
+        self.effects[played_card.rank.index](self)
+
+        # A Jack's face is chosen by the player
+        if not self.rules.wild_mask >> played_card.code & 1:
+            self.next_face = face = played_card.face
+            self.allowed = self.rules.legal[(played_card.code * self.rules.face_count + face.index) << 2]
+        return played_card
+
+    @classmethod
+    def compile_effects(cls, rules: RuleTable) -> List[Callable[["MauMau"], None]]:
+        """
+        Turn the effects of every rank into a single handler, so playing a card costs the same single call, no matter
+        which rules are played. The handlers take the game, so they are compiled once per rules and shared by all games.
+        """
+        compiled = _effects.get((cls, rules))
+        if compiled is not None:
+            return compiled
+        compiled = []
+        for effects in rules.effects:
+            handlers = []
+            if "skip" in effects:
+                handlers.append(cls.pass_skip if rules.chain_skips else cls.skip_next)
+            if "reverse" in effects:
+                handlers.append(cls.reverse)
+            # Other handlers end the chain, so the draw effect comes last to start one
+            if "draw" in effects:
+                handlers.append(partial(cls.add_draw, count=effects["draw"]))
+            if not handlers:
+                handlers.append(cls.end_chain)
+            compiled.append(handlers[0] if len(handlers) == 1 else partial(run_all, tuple(handlers)))
+        _effects[cls, rules] = compiled
+        return compiled
+
+    def end_chain(self) -> None:
+        self.chain = 0
+
+    def add_draw(self, count: int) -> None:
+        """ Handle 7 - next player has to draw 2 cards or chain """
+        if self.cards_to_draw < 2:
+            self.cards_to_draw = 0
+        self.cards_to_draw += count
+        self.chain += 1
+        self.pending |= PENDING_DRAW
+
+    def skip_next(self) -> None:
+        """ Handle 8 - next player misses their turn """
+        self.chain = 0
+        self.miss_turn = True
+
+    def pass_skip(self) -> None:
+        """ With chained skips, the next player misses their turn unless they pass it on. """
+        self.chain = 0
+        self.pending |= PENDING_SKIP
+
+    def reverse(self) -> None:
+        """ Reverse the direction of play by swapping the seat ring, which costs nothing on the other turns. """
+        self.chain = 0
+        self.next_seat, self.prev_seat = self.prev_seat, self.next_seat
+        self.reversed = not self.reversed
+        self.seat = self.next_seat[self.last_seat]
+
+    def set_face(self, player: BasePlayer, face: IndexedSymbol) -> None:
+        """ Set the face chosen with a Jack. """
+        self.next_face = face
+        if self.events:
+            self.sink("face_chosen", player=player, face=self.next_face)
+        self.update_allowed()
+
     def play_card(self,
                   player: BasePlayer,
-                  choice: int
+                  card: Card
                   ) -> None:
-        if not self.is_card_allowed(player.hand.cards[choice]):
-            raise CardNotAllowedError(player.hand.cards[choice], self.table.cards[-1], self.next_face)
-
-        played_card = player.hand.cards.pop(choice)
-        self.table.cards.append(played_card)
-        print(f"{player.name} played {played_card}, and has {len(player.hand.cards)} cards left.")
-
-        # Handle 7 - next player has to draw 2 cards or chain
-        if played_card.rank.symbol == "7":
-            if self.cards_to_draw < 2:
-                self.cards_to_draw = 0
-            self.cards_to_draw += 2
-
-        # Handle 8 - next player misses their turn
-        if played_card.rank.symbol == "8":
-            self.miss_turn = True
+        played_card = self.put_card(player, card)
 
         # Handle J - current player can change face to whatever they want
-        if played_card.rank.symbol == "J":
-            self.next_face = player.choose_face(current_face=self.table.cards[-2].face,
-                                                available_faces=self.deck.faces)
-            print(f"{player.name} chose {self.next_face.symbol} as the next face.")
-        else:
-            self.next_face = played_card.face
-
-    def run(self):
-        print(f"Table: {self.table.cards[-1]}")
-        # In case of a 7, records how many cards are to be drawn if 7 chain is not continued
-        self.cards_to_draw = 1  # Start at 1, because it is also used for normal drawing
-        self.miss_turn = False  # Record if an 8 is played
-        turn = 0
+        if self.rules.wild_mask >> played_card.code & 1:
+            self.set_face(player, self.ask(player.choose_face, self.table.cards[-2].face, self.deck.faces))
 
+    def do_player_turn(self, player: BasePlayer) -> None:
+        # Force to draw or chain in case of a 7
         while True:
-            turn += 1
-            for player in self.players:
-
-                if self.DEBUG:
-                    print("============\n"
-                          "DEBUGGING\n"
-                          "------------\n"
-                          f"Current turn: {turn}\n"
-                          f"Table hand: {[str(card.face) + str(card.rank) for card in self.table.cards]}\n"
-                          "%s\n"
-                          f"Next face: {self.next_face}\n"
-                          f"Miss turn: {self.miss_turn}\n"
-                          f"Cards to draw: {self.cards_to_draw}\n"
-                          "============\n" % ("\n".join([f"{player.name}: {player.hand}" for player in self.players]),))
-
-                if player in self.finishers:
-                    continue
+            move = self.choose_action(player)
 
-                self.replenish_deck(1)
+            if not self.holds(player, move):
+                if move == SHOW_ALL:
+                    self.show_all()
+                    continue
+                if move != DRAW:
+                    self.sink("invalid_option")
+                    continue
+                self.draw_cards(player)
+            else:
+                if not self.enforce_chain(move):
+                    continue
 
-                if self.miss_turn:
-                    self.miss_turn = False
-                    print(f"{player.name} is skipped due to card, and has {len(player.hand.cards)} cards left")
+                try:
+                    self.play_card(player, move)
+                except CardNotAllowedError as e:
+                    self.sink("not_allowed", error=e)
                     continue
+            break
+
+    def begin_turn(self) -> BasePlayer | None:
+        """
+        Move on to the next seat.
+        :return: The player whose turn it is, or None if the player is skipped.
+        """
+        seat = self.seat
+        # Seats wrap around once per round, downwards if play is reversed
+        if (seat <= self.last_seat) != self.reversed:
+            self.round += 1
+        self.last_seat = seat
+        player = self.players[seat]
+        self.seat = self.next_seat[seat]
+
+        if self.DEBUG:
+            self.sink("debug",
+                      message="============\n"
+                              "DEBUGGING\n"
+                              "------------\n"
+                              f"Current turn: {self.round}\n"
+                              f"Table hand: {[str(card.face) + str(card.rank) for card in self.table.cards]}\n"
+                              "%s\n"
+                              f"Next face: {self.next_face}\n"
+                              f"Miss turn: {self.miss_turn}\n"
+                              f"Cards to draw: {self.cards_to_draw}\n"
+                              "============\n" % ("\n".join([f"{p.name}: {p.hand}" for p in self.players]),))
+
+        if not self.deck.cards:
+            self.replenish_deck()
+
+        if self.miss_turn:
+            self.miss_turn = False
+            if self.events:
+                self.sink("skipped", player=player, cards_left=len(player.hand.cards))
+            return None
+        if self.timed:
+            self.decision_ns = 0
+            self.turn_started_ns = time.perf_counter_ns()
+            self.sink("turn_started", player=player, seat=seat, round=self.round)
+        return player
+
+    def end_turn(self, player: BasePlayer) -> bool:
+        """
+        Take the player out of the game if they got rid of all cards.
+        :return: Whether the game is still running.
+        """
+        seat = self.seat_of[player]
+        self.turns += 1
+        if self.timed:
+            self.sink("turn_ended", player=player, seat=seat, duration_ns=time.perf_counter_ns() - self.turn_started_ns,
+                      decision_ns=self.decision_ns)
+        if self.hand_counts[seat] == 0:
+            self.finish(seat)
+            if len(self.players) - len(self.finished_seats) < 2:
+                self.print_scoreboard()
+                return False
+        return True
 
-                def do_player_turn():
-                    # Force to draw or chain in case of a 7
-                    while True:
-                        choice = self.choose_action(player)
-
-                        if choice == "d":
-                            self.draw_cards(player)
-                        elif isinstance(choice, int):
-                            if not self.enforce_chain(player.hand.cards[choice]):
-                                continue
-
-                            try:
-                                self.play_card(player, choice)
-                            except CardNotAllowedError as e:
-                                print(e)
-                                continue
-                        else:
-                            raise Exception("Unexpected choice")
-                        break
-
-                do_player_turn()
-                sleep_time = 1
-                human_players_left = False
-                for p in self.players:
-                    if isinstance(p, HumanPlayer):
-                        human_players_left = True
-                        break
-                if not human_players_left:
-                    sleep_time = .1
-                time.sleep(sleep_time)
-
-                if len(player.hand.cards) == 0:
-                    self.finishers.append(player)
-                    print(f"{player.name} finished!")
-                    if len(self.players) - len(self.finishers) < 2:
-                        self.print_scoreboard()
-                        return
+    def step(self) -> bool:
+        """
+        Let the player in the current seat take their turn and move on to the next seat.
+        :return: Whether the game is still running.
+        """
+        player = self.begin_turn()
+        if player is None:
+            return True
+
+        self.do_player_turn(player)
+        running = self.end_turn(player)
+        # People do not need time to follow their own moves
+        if self.turn_delay and not player.interactive:
+            time.sleep(self.turn_delay)
+        return running
+
+    def finish(self, seat: int) -> None:
+        """ Take a player who got rid of all cards out of the seat ring. """
+        self.finished_seats.add(seat)
+        self.finishers.append(self.players[seat])
+        prev_seat = self.prev_seat[seat]
+        next_seat = self.next_seat[seat]
+        self.next_seat[prev_seat] = next_seat
+        self.prev_seat[next_seat] = prev_seat
+        if self.events:
+            self.sink("finished", player=self.players[seat])
+
+    def play(self, max_turns: int | None = None) -> GameResult:
+        """
+        Play the game until only one player is left.
+        :param max_turns: (optional) Abort the game after this many turns, e.g. if no player can ever finish.
+        :return: The outcome of the game.
+        """
+        self.start()
+        running = True
+        while running and (max_turns is None or self.turns < max_turns):
+            running = self.step()
+        return self.outcome(running)
+
+    def start(self) -> None:
+        self.sink("started", game=self)
+        self.sink("table", card=self.table.cards[-1])
+
+    def outcome(self, running: bool) -> GameResult:
+        """ :param running: Whether the game was stopped before it was over. """
+        if running:
+            self.sink("aborted", game=self)
+        return GameResult(finishers=[player.name for player in self.finishers],
+                          rounds=self.round,
+                          turns=self.turns,
+                          cards_drawn={player.name: count for player, count in zip(self.players, self.cards_drawn)},
+                          replenishes=self.replenishes,
+                          completed=not running,
+                          seed=self.seed)
+
+    def snapshot(self, rng_states: bool = False) -> Snapshot:
+        """
+        :param rng_states: (optional) Keep the states of the random generators, so restoring the snapshot replays the
+                           game exactly. A state takes about 4 KB pickled and is slow to copy, so by default they are
+                           left out, and restoring the snapshot leaves the generators as they are.
+        :return: The current state of the game, which restore() returns to.
+        """
+        hands = [player.hand.cards for player in self.players]
+        states = (self.rng.getstate(), *[player.rng.getstate() for player in self.players]) if rng_states else ()
+        codes = array("H", [card.code for card in self.deck.cards])
+        codes.extend([card.code for card in self.table.cards])
+        for cards in hands:
+            codes.extend([card.code for card in cards])
+        return Snapshot(pack=self.pack.source,
+                        rules=self.rules.source,
+                        seed=self.seed,
+                        cards=codes.tobytes(),
+                        sizes=(len(self.deck.cards), len(self.table.cards), *map(len, hands)),
+                        counters=(self.cards_to_draw, self.miss_turn, self.next_face.index, self.chain, self.pending,
+                                  self.reversed, self.seat, self.last_seat, self.round, self.turns, self.replenishes),
+                        next_seat=tuple(self.next_seat),
+                        prev_seat=tuple(self.prev_seat),
+                        finishers=tuple(self.seat_of[player] for player in self.finishers),
+                        cards_drawn=tuple(self.cards_drawn),
+                        rng_states=states,
+                        excluded=() if self.tracker is None else tuple(self.tracker.excluded),
+                        fresh=() if self.tracker is None else tuple(self.tracker.fresh))
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Return to the state of a snapshot of this game, or of a game with the same pack, rules and number of players.
+        The players stay the same, apart from their hands and, if the snapshot has their states, random generators.
+        """
+        if len(snapshot.sizes) != len(self.players) + 2:
+            raise ValueError(f"The snapshot has {len(snapshot.sizes) - 2} players, the game {len(self.players)}!")
+        codes = array("H")
+        codes.frombytes(snapshot.cards)
+        cards = [self.pack.cards[code] for code in codes]
+        end = snapshot.sizes[0]
+        self.deck.cards = deque(cards[:end])
+        for hand, size in zip([self.table] + [player.hand for player in self.players], snapshot.sizes[1:]):
+            start, end = end, end + size
+            hand.cards = cards[start:end]
+            hand.mask = 0
+            for code in codes[start:end]:
+                hand.mask |= 1 << code
+        # The state view holds on to the list of hand counts
+        self.hand_counts[:] = snapshot.sizes[2:]
+
+        (self.cards_to_draw, miss_turn, face, self.chain, self.pending, reversed_, self.seat, self.last_seat,
+         self.round, self.turns, self.replenishes) = snapshot.counters
+        self.miss_turn = bool(miss_turn)
+        self.reversed = bool(reversed_)
+        self.next_face = self.pack.faces[face]
+        self.next_seat = list(snapshot.next_seat)
+        self.prev_seat = list(snapshot.prev_seat)
+        self.finishers = [self.players[seat] for seat in snapshot.finishers]
+        self.finished_seats = set(snapshot.finishers)
+        self.cards_drawn = list(snapshot.cards_drawn)
+        if snapshot.rng_states:
+            self.rng.setstate(snapshot.rng_states[0])
+            for player, state in zip(self.players, snapshot.rng_states[1:]):
+                player.rng.setstate(state)
+        if self.tracker is not None:
+            # Without tracker state in the snapshot, nothing is known about the hands
+            self.tracker.excluded = list(snapshot.excluded) or [0] * len(self.players)
+            self.tracker.fresh = list(snapshot.fresh) or list(self.hand_counts)
+        self.update_allowed()
+
+    def clone(self,
+              players: List[BasePlayer] | None = None,
+              sink: EventSink | None = None,
+              seed: int | None = None,
+              rng_states: bool = False,
+              ) -> "MauMau":
+        """
+        Fork the game without going through a snapshot. Cards are immutable and shared, so only the lists holding them
+        are copied.
+        :param players: (optional) The players of the clone, in seating order, e.g. the policies of a search. They must
+                        not take part in this game. By default, the players are shallow copies of its players.
+        :param sink: (optional) Receives the events of the clone. By default, events are discarded.
+        :param seed: (optional) Seed of the random generators of the clone and its players, which lets forks of the
+                     same game play out differently. By default, it is derived from the seed and the turns of the game,
+                     see fork_seed().
+        :param rng_states: (optional) Copy the states of the random generators instead, so the clone plays on exactly
+                           like the game would. Copying them is slower than seeding new ones.
+        :return: An independent game in the same state.
+        """
+        if players is None:
+            players = [copy.copy(player) for player in self.players]
+        elif len(players) != len(self.players):
+            raise ValueError(f"The game has {len(self.players)} players, not {len(players)}!")
+        game = copy.copy(self)
+        game.sink = EventSink() if sink is None else sink
+        game.events = type(game.sink) is not EventSink
+        game.timed = game.sink.timed
+        game.deck = copy.copy(self.deck)
+        game.deck.cards = self.deck.cards.copy()
+        game.table = Hand()
+        game.table.cards = self.table.cards.copy()
+        game.table.mask = self.table.mask
+        if seed is not None and rng_states:
+            raise ValueError("A clone either copies the states of the random generators or gets a seed, not both!")
+        if seed is None:
+            seed = fork_seed(self.seed, self.turns)
+        game.rng = game.deck.rng = copy_rng(self.rng) if rng_states else Random(seed)
+
+        game.players = list(players)
+        game.seat_of = {}
+        for seat, (player, original) in enumerate(zip(game.players, self.players)):
+            player.hand = Hand()
+            player.hand.cards = original.hand.cards.copy()
+            player.hand.mask = original.hand.mask
+            player.rng = copy_rng(original.rng) if rng_states else Random(seat_seed(seed, seat))
+            player.seat = seat
+            game.seat_of[player] = seat
+        game.finishers = [game.players[self.seat_of[player]] for player in self.finishers]
+        game.finished_seats = set(self.finished_seats)
+        game.hand_counts = list(self.hand_counts)
+        game.next_seat = list(self.next_seat)
+        game.prev_seat = list(self.prev_seat)
+        game.cards_drawn = list(self.cards_drawn)
+        if self.tracker is not None:
+            game.tracker = CardTracker(game.pack, game.table, game.hand_counts)
+            game.tracker.excluded = list(self.tracker.excluded)
+            game.tracker.fresh = list(self.tracker.fresh)
+        # The views are bound to the game they were made for
+        game.state = GameState(game)
+        game.observations = [Observation(game, seat) for seat in range(len(game.players))]
+        for player in game.players:
+            player.game_state = game.state
+        return game
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot, players: List[BasePlayer], sink: EventSink | None = None) -> "MauMau":
+        """
+        Rebuild a game from a snapshot, e.g. in another process.
+        :param players: The players of the game, in seating order.
+        """
+        game = cls(players, pack=snapshot.pack, sink=EventSink() if sink is None else sink, seed=snapshot.seed,
+                   rules=snapshot.rules)
+        game.restore(snapshot)
+        return game
+
+    def run(self):
+        self.turn_delay = 1 if any(player.interactive for player in self.players) else .1
+        self.play()
+
+    @classmethod
+    def simulate(cls,
+                 players: List[BasePlayer],
+                 games: int = 1,
+                 pack: PackSource = DEFAULT_PACK,
+                 sink: EventSink | None = None,
+                 max_turns: int | None = 10_000,
+                 seed: int | None = None,
+                 rules: RulesSource = None,
+                 ) -> List[GameResult]:
+        """
+        Play games without any console output or delays.
+        :param players: The players taking part in every game, in seating order.
+        :param games: How many games to play.
+        :param pack: The pack to play with, or the path of its pack file.
+        :param sink: (optional) Receives the events of all games. By default, events are discarded.
+        :param max_turns: (optional) Abort a game after this many turns.
+        :param seed: (optional) Seed from which the seeds of all games are derived.
+        :param rules: (optional) The rules to play by, see __init__.
+        :return: The results of all games, in the order they were played.
+        """
+        if sink is None:
+            sink = EventSink()
+        # Loaded once, instead of looking the pack up by its path for every game
+        pack = load_pack(pack)
+        rng = Random(seed)
+        return [cls(players, pack=pack, sink=sink, seed=rng.getrandbits(64), rules=rules).play(max_turns=max_turns)
+                for _ in range(games)]
+
+    @classmethod
+    def shoe_for(cls, seats: int, pack: PackSource = DEFAULT_PACK, cards_per_seat: int = 8) -> Pack:
+        """
+        Get a shoe for a large table, made of as many copies of a pack as it takes to have enough cards per seat. Small
+        tables get the pack itself.
+        :param cards_per_seat: Number of cards per seat, including the cards dealt, so there is something to draw.
+        """
+        pack = load_pack(pack)
+        copies = -(-seats * max(cards_per_seat, cls.HAND_SIZE + 1) // len(pack.cards))
+        return pack if copies <= 1 else load_shoe(pack, copies)
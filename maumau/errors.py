@@ -14,3 +14,7 @@ class CardNotAllowedError(RuntimeError):
             message = f"You are not allowed to play {card_to_play} " \
                       f"because it matches neither last card {last_played_card}'s face nor rank!"
         super(RuntimeError, self).__init__(message)
+
+
+class ReplayMismatchError(RuntimeError):
+    """ Raised when a replayed game deviates from its log. """
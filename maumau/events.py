@@ -0,0 +1,67 @@
+from typing import Dict, List
+
+
+class EventSink:
+    """
+    Receives everything that happens during a game. This implementation discards all events, which makes it the sink of
+    choice for headless simulations.
+    """
+
+    timed: bool = False
+    """
+    Whether the sink wants the timing events turn_started and turn_ended, which report how long turns and decisions
+    took. Games only measure times for sinks that want them.
+    """
+
+    def __call__(self, event: str, **data) -> None:
+        pass
+
+
+class MultiSink(EventSink):
+    """ Passes all events on to several sinks, e.g. the console and a collector. """
+
+    sinks: List[EventSink]
+
+    def __init__(self, *sinks: EventSink):
+        self.sinks = list(sinks)
+        self.timed = any(sink.timed for sink in self.sinks)
+
+    def __call__(self, event: str, **data) -> None:
+        for sink in self.sinks:
+            sink(event, **data)
+
+
+class ConsoleSink(EventSink):
+    """ Prints events as human-readable messages, just like an interactive game does. """
+
+    MESSAGES: Dict[str, str] = {
+        "table": "Table: {card}",
+        "invalid_option": "Invalid option!",
+        "not_allowed": "{error}",
+        "chain_required": "You cannot play a {card.rank.symbol} in response to a 7!\n"
+                          "You have to either draw {cards_to_draw} cards or chain with another 7!",
+        "skip_required": "You cannot play a {card.rank.symbol} in response to a skip!\n"
+                         "You have to either pass the skip on or be skipped!",
+        "replenished": "Deck was replenished",
+        "drew": "{player.name} drew a card, and has {cards_left} cards left.",
+        "drew_many": "{player.name} drew {count} cards, and has {cards_left} cards left.",
+        "played": "{player.name} played {card}, and has {cards_left} cards left.",
+        "face_chosen": "{player.name} chose {face.symbol} as the next face.",
+        "skipped": "{player.name} is skipped due to card, and has {cards_left} cards left",
+        "skip_taken": "{player.name} is skipped instead of passing the skip on, and has {cards_left} cards left",
+        "finished": "{player.name} finished!",
+        "timed_out": "{player.name} ran out of time.",
+        "disconnected": "{player.name} lost the connection.",
+    }
+
+    def __call__(self, event: str, **data) -> None:
+        if event == "debug":
+            self.write(data["message"])
+        elif event == "game_over":
+            self.write("Game over!\nScore board:")
+            self.write("\n".join([f"{idx + 1}.: {player.name}" for idx, player in enumerate(data["finishers"])]))
+        elif event in self.MESSAGES:
+            self.write(self.MESSAGES[event].format(**data))
+
+    def write(self, text: str) -> None:
+        print(text)
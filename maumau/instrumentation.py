@@ -0,0 +1,166 @@
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from random import Random
+from typing import Deque, Dict, List, Tuple
+
+from .events import EventSink
+
+
+class Collector(EventSink):
+    """
+    Base class of sinks that measure games. Every event is stamped with the monotonic clock when it arrives, and games
+    report turns and decision times to collectors.
+    """
+
+    timed = True
+
+    def __call__(self, event: str, **data) -> None:
+        self.collect(event, time.perf_counter_ns(), data)
+
+    def collect(self, event: str, timestamp_ns: int, data: dict) -> None:
+        """
+        Handle a single event.
+        :param timestamp_ns: Monotonic time of the event in nanoseconds, as returned by time.perf_counter_ns.
+        """
+        raise NotImplementedError()
+
+
+class Histogram:
+    """ Distribution of nanosecond durations in buckets of powers of two, so adding a value costs next to nothing. """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    buckets: List[int]
+    """ Number of values by bit length, i.e. bucket b holds values below 2 ** b. """
+    count: int
+    total: int
+    min: int
+    max: int
+
+    def __init__(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def add(self, value: int) -> None:
+        self.buckets[min(value.bit_length(), 63)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.
+
+    def percentile(self, quantile: float) -> int:
+        """ :return: An upper bound of the given quantile, precise up to a factor of two. """
+        rank = quantile * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max)
+        return self.max
+
+
+class MetricsCollector(Collector):
+    """ Counts events and keeps histograms of turn and decision times, in total and per player. """
+
+    events: Counter
+    """ Number of times every event happened. """
+    cards_played: Counter
+    """ Number of cards played by player name. """
+    cards_drawn: Counter
+    turn_times: Histogram
+    decision_times: Histogram
+    player_decision_times: Dict[str, Histogram]
+    """ Decision times of every turn by player name. """
+
+    def __init__(self):
+        self.events = Counter()
+        self.cards_played = Counter()
+        self.cards_drawn = Counter()
+        self.turn_times = Histogram()
+        self.decision_times = Histogram()
+        self.player_decision_times = {}
+
+    def collect(self, event: str, timestamp_ns: int, data: dict) -> None:
+        self.events[event] += 1
+        if event == "turn_ended":
+            self.turn_times.add(data["duration_ns"])
+            self.decision_times.add(data["decision_ns"])
+            name = data["player"].name
+            histogram = self.player_decision_times.get(name)
+            if histogram is None:
+                histogram = self.player_decision_times[name] = Histogram()
+            histogram.add(data["decision_ns"])
+        elif event == "played":
+            self.cards_played[data["player"].name] += 1
+        elif event == "drew":
+            self.cards_drawn[data["player"].name] += 1
+        elif event == "drew_many":
+            self.cards_drawn[data["player"].name] += data["count"]
+
+    def slowest_players(self, count: int | None = None) -> List[Tuple[str, float]]:
+        """ :return: Names and mean decision time in nanoseconds of the slowest players, slowest first. """
+        ranking = sorted(((name, histogram.mean) for name, histogram in self.player_decision_times.items()),
+                         key=lambda entry: entry[1], reverse=True)
+        return ranking[:count]
+
+
+@dataclass
+class TurnSample:
+    """ All events of a single turn, with their times relative to the start of the turn. """
+
+    player: str
+    seat: int
+    round: int
+    duration_ns: int = 0
+    decision_ns: int = 0
+    events: List[Tuple[str, int]] = field(default_factory=list)
+    """ Name and time in nanoseconds since the turn started of every event. """
+
+
+class SamplingCollector(Collector):
+    """
+    Records a random sample of turns in detail, to see where time goes without keeping everything. Turns are picked
+    with a fixed probability and only the most recent samples are kept.
+    """
+
+    rate: float
+    """ Probability of a turn to be sampled. """
+    rng: Random
+    samples: Deque[TurnSample]
+    current: TurnSample | None
+    """ The turn being sampled right now. """
+    started_ns: int
+
+    def __init__(self, rate: float = .01, max_samples: int = 1000, seed: int | None = None):
+        self.rate = rate
+        self.rng = Random(seed)
+        self.samples = deque(maxlen=max_samples)
+        self.current = None
+        self.started_ns = 0
+
+    def collect(self, event: str, timestamp_ns: int, data: dict) -> None:
+        if event == "turn_started":
+            if self.rng.random() < self.rate:
+                self.current = TurnSample(player=data["player"].name, seat=data["seat"], round=data["round"])
+                self.started_ns = timestamp_ns
+            return
+        sample = self.current
+        if sample is None:
+            return
+        if event == "turn_ended":
+            sample.duration_ns = data["duration_ns"]
+            sample.decision_ns = data["decision_ns"]
+            self.samples.append(sample)
+            self.current = None
+        else:
+            sample.events.append((event, timestamp_ns - self.started_ns))
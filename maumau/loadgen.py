@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from random import Random
+from typing import List
+
+
+@dataclass
+class LoadReport:
+    """ What a load test measured. """
+
+    clients: int
+    games: int
+    """ Games finished by all clients together. Games with several clients count once for every client. """
+    elapsed: float
+    clients_per_table: int = 1
+    latencies: List[float] = field(default_factory=list)
+    """ Seconds from every move sent until the next message from the server arrived. """
+
+    @property
+    def tables_per_second(self) -> float:
+        return self.games / self.clients_per_table / self.elapsed if self.elapsed else 0.
+
+    def latency(self, quantile: float) -> float:
+        """ :return: The latency below which the given share of moves stayed. """
+        if not self.latencies:
+            return 0.
+        ordered = sorted(self.latencies)
+        return ordered[min(int(quantile * len(ordered)), len(ordered) - 1)]
+
+
+async def bot_client(host: str, port: int, name: str, games: int, rng: Random, latencies: List[float]) -> int:
+    """
+    Connect to a game server and play games with random legal moves.
+    :param latencies: Receives the latency of every move.
+    :return: The number of games finished.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"{name}\n".encode())
+    finished = 0
+    sent_at = None
+    try:
+        while finished < games:
+            line = await reader.readline()
+            if not line:
+                break
+            if sent_at is not None:
+                latencies.append(time.perf_counter() - sent_at)
+                sent_at = None
+
+            message = json.loads(line)
+            if message["type"] == "result":
+                finished += 1
+                if finished < games:
+                    writer.write(b"again\n")
+                continue
+            if message["type"] == "card":
+                answer = str(rng.choice(message["legal"])) if message["legal"] else "d"
+            elif message["type"] == "face":
+                answer = str(rng.randrange(len(message["faces"])))
+            elif message["type"] == "play_drawn":
+                answer = "y"
+            else:
+                continue
+            writer.write(f"{message['id']} {answer}\n".encode())
+            sent_at = time.perf_counter()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return finished
+
+
+async def generate_load(host: str,
+                        port: int,
+                        clients: int,
+                        games: int,
+                        clients_per_table: int = 1,
+                        seed: int | None = None,
+                        ) -> LoadReport:
+    """
+    Let many bot clients play against a game server at the same time.
+    :param clients: Number of concurrent connections.
+    :param games: Number of games every client plays.
+    :param clients_per_table: Number of clients the server seats at each table.
+    """
+    rng = Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    finished = await asyncio.gather(*(bot_client(host, port, f"Load {idx + 1}", games, Random(rng.getrandbits(64)),
+                                                 latencies)
+                                      for idx in range(clients)))
+    return LoadReport(clients=clients, games=sum(finished), elapsed=time.perf_counter() - start,
+                      clients_per_table=clients_per_table, latencies=latencies)
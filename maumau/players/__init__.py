@@ -1,3 +1,7 @@
 from .base import BasePlayer
+from .endgame import EndgameAI, EndgameMixin
+from .heuristic import HeuristicAI, Strategy
 from .human import HumanPlayer
+from .remote import RemotePlayer
+from .search_ai import SearchAI
 from .stupid_ai import StupidAI
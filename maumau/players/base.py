@@ -1,8 +1,12 @@
 import abc
-from typing import List, Callable
+from random import Random
+from typing import TYPE_CHECKING, List
 
 from cards import Hand, Card, IndexedSymbol
 
+if TYPE_CHECKING:
+    from ..state import GameState, Move, Observation
+
 
 class BasePlayer(abc.ABC):
     name: str
@@ -11,22 +15,37 @@ class BasePlayer(abc.ABC):
     hand: Hand
     """ The hand of the player. """
 
+    rng: Random
+    """ Source of randomness for the player's decisions. The game reseeds it, so games can be reproduced. """
+
+    seat: int
+    """ The player's seat in the current game. """
+
+    game_state: "GameState | None"
+    """ Read-only view of the current game, for players that need more than the arguments of their decisions. """
+
+    tracks_cards: bool = False
+    """ Whether the player uses game_state.tracker. Games only track cards if one of their players does. """
+
+    interactive: bool = False
+    """ Whether a person makes the decisions. Games are paced for them, but do not wait after their own turns. """
+
     def __init__(self, name: str):
         """ Create a player with a name. """
         self.name = name
         self.hand = Hand()
+        self.rng = Random()
+        self.seat = 0
+        self.game_state = None
 
     def choose_card(
             self,
-            is_card_allowed: Callable[[Card], bool],
-            current_card: Card,
-            current_face: IndexedSymbol,
-            cards_to_draw: int,
-            active_players_card_count: List[int],
-    ) -> int | str:
+            observation: "Observation",
+    ) -> "Move":
         """
         Choose card to play.
-        :return: Index of the card in hand to play, or other actions.
+        :param observation: What the player sees of the game, including all legal cards.
+        :return: The card to play, or DRAW.
         """
         raise NotImplementedError()
 
@@ -51,5 +70,30 @@ class BasePlayer(abc.ABC):
         """
         raise NotImplementedError()
 
+    async def choose_card_async(
+            self,
+            observation: "Observation",
+    ) -> "Move":
+        """
+        Async variant of choose_card, used by AsyncMauMau. Players that wait for input, e.g. from the network, override
+        it. Everybody else decides right away.
+        """
+        return self.choose_card(observation=observation)
+
+    async def choose_face_async(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        """ Async variant of choose_face. """
+        return self.choose_face(current_face=current_face, available_faces=available_faces)
+
+    async def choose_play_immediately_async(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        """ Async variant of choose_play_immediately. """
+        return self.choose_play_immediately(drawn_card=drawn_card)
+
     def __str__(self) -> str:
         return self.name
@@ -0,0 +1,121 @@
+from typing import Dict, List, Tuple
+
+from cards import Card, IndexedSymbol
+from .base import BasePlayer
+from .stupid_ai import StupidAI
+from ..endgame import EndgamePosition, EndgameSolver, SolveStats
+from ..rules import rule_table
+from ..state import DRAW, Move, Observation
+
+
+class EndgameMixin(BasePlayer):
+    """
+    Lets an EndgameSolver take over the decisions of a player once only two players are left, they hold few cards
+    between them and few cards are unseen, so the solver may look at every hand of the other player and every card
+    drawn. Put it before the player class in the bases, e.g. class MyAI(EndgameMixin, MyPlayer). The solver only
+    decides when it proves a move, see EndgameSolver.proven. Everything else, and every decision the solver cannot
+    prove in time, is left to the player.
+
+    The player tracks cards, so the solver only considers hands of the other player that fit with what they could not
+    play before.
+    """
+
+    tracks_cards = True
+
+    endgame_cards: int
+    """ The solver takes over when both players hold at most this many cards together. """
+    endgame_unseen: int
+    """ The solver takes over when at most this many cards are unseen, in the deck and the hand of the other player. """
+    endgame_budget: float
+    """ Seconds per decision. """
+    solver: EndgameSolver | None
+    """ The solver of the pack played, created for the first endgame. """
+
+    face: int | None
+    """ The face to choose for the Jack the solver decided to play. """
+
+    def __init__(self, name: str, endgame_cards: int = 8, endgame_unseen: int = 10, endgame_budget: float = .01,
+                 **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.endgame_cards = endgame_cards
+        self.endgame_unseen = endgame_unseen
+        self.endgame_budget = endgame_budget
+        self.solver = None
+        self.face = None
+
+    @property
+    def solve_stats(self) -> SolveStats:
+        """ Statistics of all endgames solved so far. """
+        return self.solver.stats if self.solver is not None else SolveStats()
+
+    def endgame_position(self) -> EndgamePosition | None:
+        """ :return: The position to solve, or None if the game is not in an endgame the solver knows. """
+        state = self.game_state
+        if state is None or state.players_left != 2 or state.rules.effects != rule_table(state.pack).effects:
+            return None
+        other = next(seat for seat in range(len(state.hand_counts))
+                     if seat != self.seat and not state.is_finished(seat))
+        if len(self.hand.cards) + state.hand_counts[other] > self.endgame_cards:
+            return None
+        if (state.pack.masks.all & ~state.table_mask & ~self.hand.mask).bit_count() > self.endgame_unseen:
+            return None
+        if self.solver is None or self.solver.rules.all != state.pack.masks.all:
+            self.solver = EndgameSolver(state.pack, budget=self.endgame_budget, rng=self.rng)
+        # The decisions of the solver depend on the game, so it follows the generator the game seeded
+        self.solver.rng = self.rng
+        tracker = state.tracker
+        return EndgamePosition(hand=self.hand.mask,
+                               other_count=state.hand_counts[other],
+                               top=state.current_card.code,
+                               next_face=state.current_face.index,
+                               cards_to_draw=state.cards_to_draw,
+                               table_mask=state.table_mask,
+                               other_excluded=tracker.excluded[other],
+                               other_fresh=tracker.fresh[other])
+
+    def best(self, values: Dict[Tuple[int, int], float]) -> Tuple[int, int] | None:
+        """ :return: The best move of the solver, or None if it did not prove it. """
+        return max(values, key=values.get) if values and self.solver.proven else None
+
+    def choose_card(
+            self,
+            observation: Observation,
+    ) -> Move:
+        position = self.endgame_position()
+        move = None if position is None else self.best(self.solver.solve_card(position))
+        if move is None:
+            return super().choose_card(observation)
+        code, face = move
+        if code < 0:
+            return DRAW
+        self.face = face if self.solver.rules.rank_of[code] == self.solver.rules.jack else None
+        return observation.pack.cards[code]
+
+    def choose_face(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        face = self.face
+        self.face = None
+        if face is None:
+            return super().choose_face(current_face, available_faces)
+        return available_faces[face]
+
+    def choose_play_immediately(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        position = self.endgame_position()
+        move = None if position is None else self.best(self.solver.solve_drawn(position, drawn_card.code))
+        if move is None:
+            return super().choose_play_immediately(drawn_card)
+        code, face = move
+        if code < 0:
+            return False
+        self.face = face if self.solver.rules.rank_of[code] == self.solver.rules.jack else None
+        return True
+
+
+class EndgameAI(EndgameMixin, StupidAI):
+    """ A StupidAI that leaves endgames of two to the solver. """
@@ -0,0 +1,109 @@
+from dataclasses import dataclass, fields
+from random import Random
+from typing import Dict, List, Tuple
+
+from cards import Card, IndexedSymbol
+from .base import BasePlayer
+from ..state import DRAW, Move, Observation
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """
+    The weights a HeuristicAI scores cards with. The card with the highest score is played, ties are broken at random.
+    The defaults play like StupidAI, which keeps Jacks for when nothing else fits.
+    """
+
+    wild: float = -1.
+    """ Score of wild cards, i.e. Jacks. Below zero, they are kept for later. """
+    draw: float = 0.
+    """ Score of draw cards, i.e. 7s. """
+    skip: float = 0.
+    """ Score of skip cards, i.e. 8s. """
+    attack: float = 0.
+    """ Added to the score of draw and skip cards while another player is about to finish. """
+    face_held: float = 0.
+    """ Added to the score of a card for every other card of its face in the hand, which keeps the face playable. """
+    play_drawn: float = 0.
+    """ A card drawn is played right away if it may be played and scores at least this much. """
+
+    def to_dict(self) -> Dict[str, float]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+STRATEGY_SPACE: Dict[str, Tuple[float, float]] = {
+    "wild": (-2., 2.),
+    "draw": (-2., 2.),
+    "skip": (-2., 2.),
+    "attack": (0., 3.),
+    "face_held": (0., 1.),
+    "play_drawn": (-2., 2.),
+}
+""" The range of every weight of a Strategy, for searches over strategies. """
+
+
+def random_strategy(rng: Random) -> Strategy:
+    """ :return: A strategy with every weight drawn uniformly from STRATEGY_SPACE. """
+    return Strategy(**{name: round(rng.uniform(low, high), 3) for name, (low, high) in STRATEGY_SPACE.items()})
+
+
+class HeuristicAI(BasePlayer):
+    """ Plays the legal card its strategy scores best. All weights are parameters, so strategies can be tuned. """
+
+    strategy: Strategy
+    threatened: bool
+    """ Whether another player held at most two cards at the last decision. """
+
+    def __init__(self, name: str, strategy: Strategy = Strategy()):
+        super().__init__(name=name)
+        self.strategy = strategy
+        self.threatened = False
+
+    def score(self, code: int, hand_mask: int) -> float:
+        state = self.game_state
+        rules, strategy = state.rules, self.strategy
+        score = 0.
+        if rules.wild_mask >> code & 1:
+            score += strategy.wild
+        if rules.draw_mask >> code & 1:
+            score += strategy.draw + self.threatened * strategy.attack
+        if rules.skip_mask >> code & 1:
+            score += strategy.skip + self.threatened * strategy.attack
+        if strategy.face_held:
+            face_mask = state.pack.masks.face_masks[state.pack.cards[code].face.index]
+            score += strategy.face_held * ((hand_mask & face_mask).bit_count() - 1)
+        return score
+
+    def choose_card(
+            self,
+            observation: Observation,
+    ) -> Move:
+        legal_mask = observation.legal_mask
+        if not legal_mask:
+            return DRAW
+        self.threatened = any(count <= 2 for seat, count in enumerate(observation.hand_counts)
+                              if seat != observation.seat and count)
+        best_score = None
+        best: List[Card] = []
+        for card in observation.pack.cards_from_mask(legal_mask):
+            score = self.score(card.code, observation.hand_mask)
+            if best_score is None or score > best_score:
+                best_score = score
+                best = [card]
+            elif score == best_score:
+                best.append(card)
+        return best[0] if len(best) == 1 else self.rng.choice(best)
+
+    def choose_face(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        face_counts = [(self.hand.mask & mask).bit_count() for mask in self.game_state.pack.masks.face_masks]
+        return available_faces[face_counts.index(max(face_counts))]
+
+    def choose_play_immediately(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        return self.score(drawn_card.code, self.hand.mask) >= self.strategy.play_drawn
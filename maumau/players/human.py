@@ -1,40 +1,44 @@
-from typing import List, Callable
+from typing import List
 
 from cards import Card, IndexedSymbol
 from .base import BasePlayer
+from ..rules import PENDING_DRAW, PENDING_SKIP
+from ..state import Move, Observation
 
 
 class HumanPlayer(BasePlayer):
+    interactive = True
+
     def __init__(self, name: str):
         super().__init__(name=name)
 
     def choose_card(
             self,
-            is_card_allowed: Callable[[Card], bool],
-            current_card: Card,
-            current_face: IndexedSymbol,
-            cards_to_draw: int,
-            active_players_card_count: List[int],
-    ) -> int | str:
+            observation: Observation,
+    ) -> Move:
+        # The hand is listed from its bitmask, ordered by code, and the cards that may be played are marked
+        cards = observation.hand
+        legal_mask = observation.legal_mask
+        current_card = observation.top_card
         prompt = "Your hand is:\n"
-        prompt += "\n".join([f"{idx + 1}: {card}" for idx, card in enumerate(self.hand.cards)])
+        prompt += "\n".join([f"{idx + 1}: {card}{' *' if legal_mask >> card.code & 1 else ''}"
+                             for idx, card in enumerate(cards)])
         prompt += "\nd: draw"
         prompt += f"\n{current_card} lies on top of the table."
-        if current_face != current_card.face:
-            prompt += f" The current face is {current_face.symbol}."
-        if current_card.rank.symbol in ["7", "8"]:
-            if cards_to_draw > 1:
-                prompt += f" If you chose to draw, you will have to draw {cards_to_draw} cards."
-            else:
-                prompt += " You are not affected by it."
-        prompt += "\nWhich card do you want to play? "
+        if observation.face != current_card.face:
+            prompt += f" The current face is {observation.face.symbol}."
+        rules = observation.rules
+        if observation.pending & PENDING_DRAW:
+            prompt += f" If you chose to draw, you will have to draw {observation.cards_to_draw} cards."
+        elif observation.pending & PENDING_SKIP:
+            prompt += " If you chose to draw, you will be skipped instead."
+        elif (rules.draw_mask | rules.skip_mask) >> current_card.code & 1:
+            prompt += " You are not affected by it."
+        prompt += "\nWhich card do you want to play? (* may be played) "
         choice = input(prompt)
 
-        try:
-            return int(choice) - 1
-        except ValueError:
-            pass
-
+        if choice.isdigit() and 0 < int(choice) <= len(cards):
+            return cards[int(choice) - 1]
         return choice
 
     def choose_face(
@@ -42,16 +46,18 @@ class HumanPlayer(BasePlayer):
             current_face: IndexedSymbol,
             available_faces: List[IndexedSymbol],
     ) -> IndexedSymbol:
-        prompt = "Your hand is:\n"
-        prompt += "\n".join([f"{card}" for card in self.hand.cards])
+        pack = self.game_state.pack
+        hand_mask = self.hand.mask
+        prompt = "Your hand is: " + " ".join([str(card) for card in pack.cards_from_mask(hand_mask)])
         prompt += "\nAvailable faces:\n"
-        prompt += "\n".join([f"{idx + 1}: {face.symbol}" for idx, face in enumerate(available_faces)])
-        prompt += "\nd: draw"
+        prompt += "\n".join([f"{idx + 1}: {face.symbol} ({(hand_mask & pack.masks.face_masks[face.index]).bit_count()}"
+                             f" in your hand)" for idx, face in enumerate(available_faces)])
         prompt += f"\n{current_face.symbol} is the current face."
         prompt += "\nWhich face do you choose? "
-        choice = input(prompt)
-
-        return available_faces[int(choice) - 1]
+        while True:
+            choice = input(prompt)
+            if choice.isdigit() and 0 < int(choice) <= len(available_faces):
+                return available_faces[int(choice) - 1]
 
     def choose_play_immediately(
             self,
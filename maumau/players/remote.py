@@ -0,0 +1,105 @@
+import asyncio
+import json
+from typing import List
+
+from cards import Card, IndexedSymbol
+from .base import BasePlayer
+from ..state import DRAW, Move, Observation
+
+
+class RemotePlayer(BasePlayer):
+    """
+    A player on the other end of a line protocol connection, which only plays in AsyncMauMau. Every decision is sent as
+    a JSON line with the type of the decision and an id. The answer is a line with the id and the choice, separated by
+    a space. Answers with the id of an earlier request, which came too late, are ignored.
+    """
+
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    requests: int
+    """ Number of requests sent so far, which is also the id of the last request. """
+    connected: bool
+    game_over: asyncio.Event
+    """ Set by the host when the game the player takes part in is over. """
+
+    def __init__(self, name: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        super().__init__(name=name)
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+        self.connected = True
+        self.game_over = asyncio.Event()
+
+    async def send(self, message: dict) -> None:
+        if not self.connected:
+            return
+        try:
+            self.writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+
+    async def read_line(self) -> str:
+        """ :return: The next line, without the line break. """
+        if not self.connected:
+            raise ConnectionResetError(f"{self.name} is not connected!")
+        line = await self.reader.readline()
+        if not line:
+            self.connected = False
+            raise ConnectionResetError(f"{self.name} closed the connection!")
+        return line.decode().strip()
+
+    async def ask(self, message: dict) -> str:
+        """
+        Send a request and wait for its answer.
+        :return: The answer, without the id.
+        """
+        self.requests += 1
+        await self.send({"id": self.requests, **message})
+        while True:
+            request_id, _, answer = (await self.read_line()).partition(" ")
+            if request_id == str(self.requests):
+                return answer
+
+    async def choose_card_async(
+            self,
+            observation: Observation,
+    ) -> Move:
+        hand = observation.hand
+        message = {"type": "card",
+                   "hand": [str(card) for card in hand],
+                   "legal": [idx for idx, card in enumerate(hand) if observation.is_legal(card)],
+                   "top": str(observation.top_card),
+                   "face": observation.face.symbol,
+                   "cards_to_draw": observation.cards_to_draw,
+                   "hand_counts": list(observation.hand_counts)}
+        while True:
+            answer = await self.ask(message)
+            if answer == DRAW:
+                return answer
+            if answer.isdigit() and int(answer) < len(hand):
+                return hand[int(answer)]
+            await self.send({"type": "invalid", "answer": answer})
+
+    async def choose_face_async(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        message = {"type": "face", "faces": [face.symbol for face in available_faces], "face": current_face.symbol}
+        while True:
+            answer = await self.ask(message)
+            if answer.isdigit() and int(answer) < len(available_faces):
+                return available_faces[int(answer)]
+            await self.send({"type": "invalid", "answer": answer})
+
+    async def choose_play_immediately_async(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        message = {"type": "play_drawn", "card": str(drawn_card)}
+        while True:
+            answer = (await self.ask(message)).lower()
+            if answer in ["y", "n"]:
+                return answer == "y"
+            await self.send({"type": "invalid", "answer": answer})
@@ -0,0 +1,139 @@
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from cards import Card, IndexedSymbol
+from .base import BasePlayer
+from ..compact import DRAW_PLAY, move_card, move_face
+from ..rules import rule_table
+from ..search import ISMCTS, SearchRoot, merge_root_stats, search_in_worker
+from ..state import DRAW, Move, Observation
+
+
+class SearchAI(BasePlayer):
+    """
+    Plays the move that information set Monte Carlo tree search likes best. Every decision is limited by an iteration
+    budget, a time limit, or both. The player tracks cards, so the hands dealt to the others fit with what they could
+    not play before.
+
+    With more than one worker, independent searches run in separate processes and their root statistics are added up.
+    The processes are started by the first search and shut down by close(), at the end of a with block, or when the
+    player is garbage collected.
+    """
+
+    tracks_cards = True
+
+    iterations: int | None
+    time_limit: float | None
+    """ Seconds per decision. """
+    workers: int
+    searcher: ISMCTS
+    executor: ProcessPoolExecutor | None
+
+    face: int | None
+    """ The face to choose for the Jack the search decided to play. """
+    play_drawn: bool
+    """ Whether the search decided to play a drawn card right away. """
+
+    def __init__(self,
+                 name: str,
+                 iterations: int | None = 500,
+                 time_limit: float | None = None,
+                 workers: int = 1,
+                 exploration: float = .7,
+                 rollout_moves: int = 10,
+                 max_nodes: int = 200_000,
+                 ):
+        super().__init__(name=name)
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.searcher = ISMCTS(exploration=exploration, rollout_moves=rollout_moves, max_nodes=max_nodes, rng=self.rng)
+        self.executor = None
+        self._shutdown = None
+        self.face = None
+        self.play_drawn = True
+        self._searched_game = None
+
+    def search_root(self, observation: Observation) -> SearchRoot:
+        # The compact engine only knows the classic rules with the roles of the pack
+        if observation.rules.effects != rule_table(observation.pack).effects:
+            raise ValueError("SearchAI only plays by the classic rules of the pack!")
+        state = self.game_state
+        tracker = state.tracker
+        seats = range(len(observation.hand_counts))
+        return SearchRoot(pack=observation.pack.source,
+                          seat=observation.seat,
+                          hand=observation.hand_mask,
+                          counts=tuple(observation.hand_counts),
+                          finished=tuple(seat for seat in seats if state.is_finished(seat)),
+                          top=observation.top_card.code,
+                          next_face=observation.face.index,
+                          cards_to_draw=observation.cards_to_draw,
+                          table_mask=state.table_mask,
+                          excluded=tuple(tracker.excluded),
+                          fresh=tuple(tracker.fresh))
+
+    def best_move(self, root: SearchRoot) -> int:
+        if self.workers > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._shutdown = weakref.finalize(self, self.executor.shutdown, cancel_futures=True)
+            futures = [self.executor.submit(search_in_worker, root, self.iterations, self.time_limit,
+                                            self.searcher.exploration, self.searcher.rollout_moves,
+                                            self.rng.getrandbits(64))
+                       for _ in range(self.workers)]
+            stats = merge_root_stats([future.result() for future in futures])
+        else:
+            # A new game brings a new generator and makes the old table useless
+            if self._searched_game is not self.game_state:
+                self._searched_game = self.game_state
+                self.searcher.clear()
+            self.searcher.rng = self.rng
+            stats = self.searcher.search(root, self.iterations, self.time_limit)
+        if not stats:
+            # The time was up before the first iteration, so play like the rollouts do
+            return root.determinize(self.rng).rollout_move()
+        return max(stats, key=lambda move: stats[move][0])
+
+    def close(self) -> None:
+        """ Shut down the worker processes, if any. """
+        if self.executor is not None:
+            self._shutdown()
+            self.executor = None
+
+    def __enter__(self) -> "SearchAI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def choose_card(
+            self,
+            observation: Observation,
+    ) -> Move:
+        move = self.best_move(self.search_root(observation))
+        if move < 0:
+            self.play_drawn = move == DRAW_PLAY
+            return DRAW
+        self.face = move_face(move)
+        return observation.pack.cards[move_card(move)]
+
+    def choose_face(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        face = self.face
+        self.face = None
+        if face is None or face < 0:
+            # A Jack played right after drawing it, go for the face held most
+            face_counts = [(self.hand.mask & mask).bit_count() for mask in self.game_state.pack.masks.face_masks]
+            face = face_counts.index(max(face_counts))
+        return available_faces[face]
+
+    def choose_play_immediately(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        return self.play_drawn
@@ -1,8 +1,8 @@
-from random import shuffle
-from typing import List, Callable
+from typing import List
 
 from cards import Card, IndexedSymbol
 from .base import BasePlayer
+from ..state import DRAW, Move, Observation
 
 
 class StupidAI(BasePlayer):
@@ -11,25 +11,17 @@ class StupidAI(BasePlayer):
 
     def choose_card(
             self,
-            is_card_allowed: Callable[[Card], bool],
-            current_card: Card,
-            current_face: IndexedSymbol,
-            cards_to_draw: int,
-            active_players_card_count: List[int],
-    ) -> int | str:
-        shuffle(self.hand.cards)
-        a_jake: int | None = None
-        for idx, card in enumerate(self.hand.cards):
-            if card.rank.symbol == "J":
-                a_jake = idx
-                continue  # don't waste Jakes
-            if is_card_allowed(card):
-                if (current_card.rank.symbol == "7" and card.rank.symbol == "7") \
-                        or current_card.rank.symbol != "7" or cards_to_draw < 2:
-                    return idx
-        if a_jake is not None and cards_to_draw < 2:
-            return a_jake
-        return "d"
+            observation: Observation,
+    ) -> Move:
+        legal_mask = observation.legal_mask
+        if not legal_mask:
+            return DRAW
+        # don't waste Jakes
+        mask = legal_mask & ~observation.rules.wild_mask or legal_mask
+        # Same as choosing from the list of cards, without building it: drop the lowest cards as often as picked
+        for _ in range(self.rng.randrange(mask.bit_count())):
+            mask &= mask - 1
+        return observation.pack.cards[(mask & -mask).bit_length() - 1]
 
     def choose_face(
             self,
@@ -45,4 +37,6 @@ class StupidAI(BasePlayer):
             self,
             drawn_card: Card
     ) -> bool:
-        return drawn_card.face.symbol not in ["J", "7"]  # do not waste "good" cards
+        # do not waste "good" cards, i.e. wild and draw cards
+        rules = self.game_state.rules
+        return not (rules.wild_mask | rules.draw_mask) >> drawn_card.code & 1
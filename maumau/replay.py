@@ -0,0 +1,171 @@
+import json
+from collections import deque
+from typing import Deque, IO, Iterator, List
+
+from cards import Card, IndexedSymbol
+from .engine import MauMau
+from .errors import ReplayMismatchError
+from .events import EventSink
+from .players import BasePlayer
+from .state import DRAW, Move, Observation
+
+
+class GameLog:
+    """
+    The seed and the sequence of decisions of a game, which is all it takes to repeat it.
+
+    In a log file every game starts with a JSON header line holding seed, pack definition, players in seating order
+    and, unless the classic rules were played, the rules definition, so logs replay anywhere. It is followed by
+    a line of space-separated actions: the code of a card played, "d" for drawing and "f" plus a face index for the
+    face chosen after a Jack. A drawn card that is played immediately shows up as a card code right after the "d".
+    The game ends with a line starting with "= " and a JSON object describing the outcome.
+    """
+
+    seed: int
+    pack: str | dict
+    """ The pack definition. Logs written by earlier versions may hold the path of the pack file instead. """
+    players: List[str]
+    rules: str | dict | None
+    """ The rules definition, or the path of the rules file in older logs, None for the classic rules. """
+    actions: List[str]
+    finishers: List[str] | None
+    """ The recorded finishing order, or None if the log ends before the game did. """
+    turns: int | None
+    completed: bool
+
+    def __init__(self, seed: int, pack: str | dict, players: List[str], rules: str | dict | None = None):
+        self.seed = seed
+        self.pack = pack
+        self.players = players
+        self.rules = rules
+        self.actions = []
+        self.finishers = None
+        self.turns = None
+        self.completed = False
+
+
+class GameLogWriter(EventSink):
+    """ Appends the log of every game played to a text stream. """
+
+    stream: IO[str]
+    in_game: bool
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.in_game = False
+
+    def end_game(self, game: MauMau, completed: bool) -> None:
+        self.stream.write("\n= " + json.dumps({"finishers": [player.name for player in game.finishers],
+                                                "turns": game.turns,
+                                                "completed": completed}) + "\n")
+        self.in_game = False
+
+    def __call__(self, event: str, **data) -> None:
+        if event == "played":
+            self.stream.write(f"{data['card'].code} ")
+        elif event in ("drew", "drew_many", "drew_nothing", "skip_taken"):
+            self.stream.write("d ")
+        elif event == "face_chosen":
+            self.stream.write(f"f{data['face'].index} ")
+        elif event == "started":
+            if self.in_game:
+                self.stream.write("\n")
+            game = data["game"]
+            # Definitions instead of paths, which may not resolve when the log is replayed elsewhere
+            header = {"seed": game.seed,
+                      "pack": game.pack.definition,
+                      "players": [player.name for player in game.players]}
+            if game.rules.source is not None:
+                header["rules"] = game.rules.definition
+            self.stream.write(json.dumps(header) + "\n")
+            self.in_game = True
+        elif event == "game_over":
+            self.end_game(data["game"], True)
+        elif event == "aborted":
+            self.end_game(data["game"], False)
+
+
+def read_logs(stream: IO[str]) -> Iterator[GameLog]:
+    """ :return: All game logs in the stream, in the order they were written. """
+    log: GameLog | None = None
+    for line in stream:
+        if line.startswith("{"):
+            if log is not None:
+                yield log
+            header = json.loads(line)
+            log = GameLog(header["seed"], header["pack"], header["players"], header.get("rules"))
+        elif line.startswith("= "):
+            outcome = json.loads(line[2:])
+            log.finishers = outcome["finishers"]
+            log.turns = outcome["turns"]
+            log.completed = outcome["completed"]
+        elif log is not None:
+            log.actions += line.split()
+    if log is not None:
+        yield log
+
+
+class ScriptedPlayer(BasePlayer):
+    """ Repeats the decisions recorded in a game log. All players of a replay share the queue of actions. """
+
+    actions: Deque[str]
+
+    def __init__(self, name: str, actions: Deque[str]):
+        super().__init__(name=name)
+        self.actions = actions
+
+    def next_action(self) -> str:
+        if not self.actions:
+            raise ReplayMismatchError(f"The log has no action left for {self.name}!")
+        return self.actions.popleft()
+
+    def choose_card(
+            self,
+            observation: Observation,
+    ) -> Move:
+        action = self.next_action()
+        if action == DRAW:
+            return action
+        if action.isdigit() and observation.hand_mask >> int(action) & 1:
+            return observation.pack.cards[int(action)]
+        raise ReplayMismatchError(f"{self.name} is supposed to play card {action}, but does not hold it!")
+
+    def choose_face(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        action = self.next_action()
+        if not action.startswith("f"):
+            raise ReplayMismatchError(f"{self.name} is supposed to choose a face, but the log says {action}!")
+        return available_faces[int(action[1:])]
+
+    def choose_play_immediately(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        if self.actions and self.actions[0] == str(drawn_card.code):
+            self.actions.popleft()
+            return True
+        return False
+
+
+def replay(log: GameLog, sink: EventSink | None = None, turns: int | None = None) -> MauMau:
+    """
+    Repeat a logged game.
+    :param log: The log to replay.
+    :param sink: (optional) Receives the events of the replayed game. By default, events are discarded.
+    :param turns: (optional) Stop after this many turns, e.g. to inspect the state of the game at that point.
+    :return: The game in the state it was left in.
+    """
+    actions = deque(log.actions)
+    players = [ScriptedPlayer(name, actions) for name in log.players]
+    game = MauMau(players, pack=log.pack, sink=EventSink() if sink is None else sink, seed=log.seed, rules=log.rules)
+    game.play(max_turns=log.turns if turns is None else turns)
+
+    if turns is None and log.finishers is not None:
+        finishers = [player.name for player in game.finishers]
+        if finishers != log.finishers or game.turns != log.turns:
+            raise ReplayMismatchError(f"Replay ended with {finishers} after {game.turns} turns, "
+                                      f"but the log recorded {log.finishers} after {log.turns} turns!")
+    return game
@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class GameResult:
+    """ Outcome of a single game, as returned by a headless simulation. """
+
+    finishers: List[str]
+    """ Names of the players in the order they finished. The last entry is the loser. """
+
+    rounds: int
+    """ Number of rounds started, i.e. how often the turn went around the table. """
+
+    turns: int
+    """ Number of turns actually taken by players. Skipped players do not count. """
+
+    cards_drawn: Dict[str, int] = field(default_factory=dict)
+    """ Number of cards each player drew during the game, not counting the initial deal. """
+
+    replenishes: int = 0
+    """ How often the deck was replenished from the table. """
+
+    completed: bool = True
+    """ False if the game was aborted because it hit the turn limit. """
+
+    seed: int | None = None
+    """ Seed of the game, if it can be reproduced. """
+
+    @property
+    def winner(self) -> str | None:
+        return self.finishers[0] if self.finishers else None
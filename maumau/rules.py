@@ -0,0 +1,186 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from cards import Pack
+
+EFFECTS: Tuple[str, ...] = ("draw", "skip", "reverse", "wild")
+"""
+Effects a rank can have:
+- draw: the next player draws this many cards, unless they answer with another draw card
+- skip: the next player misses their turn
+- reverse: the direction of play is reversed
+- wild: the card may be played on anything and the player chooses the next face
+"""
+
+ROLES: Tuple[str, ...] = ("draw_two", "skip", "wild")
+""" The ranks with special effects that packs may name in "roles". """
+
+DEFAULT_ROLES: Dict[str, str | None] = {
+    "draw_two": "7",
+    "skip": "8",
+    "wild": "J",
+}
+""" Symbols of the ranks taking each role, unless the pack file says otherwise in "roles". """
+
+PENDING_DRAW: int = 1
+""" Draw cards are pending, so the next player has to draw or answer with a draw card. """
+PENDING_SKIP: int = 2
+""" With chained skips: a skip is pending, so the next player is skipped unless they answer with a skip card. """
+
+RulesSource = str | dict | None
+""" The path of a rules file, a rules definition, or None for the classic rules with the roles of the pack. """
+
+
+def roles_rules(pack: Pack) -> dict:
+    """ :return: The rules definition of the classic rules, with the special ranks named in the pack. """
+    roles = {**DEFAULT_ROLES, **pack.definition.get("roles", {})}
+    unknown = set(roles) - set(ROLES)
+    if unknown:
+        raise ValueError(f"Unknown roles {', '.join(sorted(unknown))}!")
+    effects = {"draw_two": {"draw": 2}, "skip": {"skip": True}, "wild": {"wild": True}}
+    return {"ranks": {str(symbol): effects[role] for role, symbol in roles.items() if symbol is not None}}
+
+
+_rules: Dict[str, dict] = {}
+
+
+def load_rules(source: RulesSource) -> dict | None:
+    """ :return: The rules definition, which is read only the first time a file is asked for. """
+    if not isinstance(source, str):
+        return source
+    key = os.path.abspath(source)
+    definition = _rules.get(key)
+    if definition is None:
+        with open(source, "r") as fp:
+            definition = _rules[key] = json.load(fp)
+    return definition
+
+
+class RuleTable:
+    """
+    The rules of a game, compiled for a pack. Every rank gets its effects, and every situation gets the cards that may
+    be played in it. A situation is made of the top card, the face to play and what is pending, so there are only
+    4 * cards * faces of them.
+    """
+
+    pack: Pack
+    source: RulesSource
+    """ What the rules were loaded from, None for the classic rules with the roles of the pack. """
+    definition: dict
+    """ The rules the table was compiled from, see load_rules. """
+    effects: List[Dict[str, int | bool]]
+    """ Effects of every rank, by rank index. """
+    draw_counts: List[int]
+    """ Number of cards to draw by rank index, 0 for ranks without a draw effect. """
+    draw_mask: int
+    skip_mask: int
+    reverse_mask: int
+    wild_mask: int
+    chain_skips: bool
+    """ Whether a skipped player may pass the skip on with another skip card. """
+    answers: List[int]
+    """ Bitmask of the cards answering what is pending, by PENDING_DRAW and PENDING_SKIP. """
+    face_count: int
+    legal: List[int]
+    """ Bitmask of the cards that may be played, by situation. See situation() for the index. """
+
+    classic: bool
+    """ Whether these are the classic rules: one rank each to draw two, skip and choose a face, and nothing else. """
+    draw_two: int
+    """ With the classic rules: rank index of the card making the next player draw two cards, or -1. """
+    skip: int
+    """ With the classic rules: rank index of the card skipping the next player, or -1. """
+    wild: int
+    """ With the classic rules: rank index of the card that may be played on anything, or -1. """
+
+    def __init__(self, pack: Pack, rules: RulesSource = None):
+        definition = load_rules(rules)
+        if definition is None:
+            definition = roles_rules(pack)
+        self.pack = pack
+        self.source = rules
+        self.definition = definition
+        self.effects = [{} for _ in pack.ranks]
+        for symbol, effects in definition.get("ranks", {}).items():
+            rank = pack.rank_index(str(symbol))
+            if rank < 0:
+                raise ValueError(f"The rules refer to rank {symbol}, which the pack does not have!")
+            unknown = set(effects) - set(EFFECTS)
+            if unknown:
+                raise ValueError(f"Unknown effects {', '.join(sorted(unknown))}!")
+            self.effects[rank] = {effect: value for effect, value in effects.items() if value}
+        self.chain_skips = bool(definition.get("chain_skips", False))
+
+        self.draw_counts = [int(effects.get("draw", 0)) for effects in self.effects]
+        self.draw_mask = self.effect_mask("draw")
+        self.skip_mask = self.effect_mask("skip")
+        self.reverse_mask = self.effect_mask("reverse")
+        self.wild_mask = self.effect_mask("wild")
+        self.answers = [pack.masks.all, self.draw_mask, self.skip_mask, self.draw_mask & self.skip_mask]
+        self.face_count = len(pack.faces)
+
+        masks = pack.masks
+        self.legal = [0] * (4 * len(pack.cards) * self.face_count)
+        for top in pack.cards:
+            for face in pack.faces:
+                allowed = masks.face_masks[face.index] | masks.rank_masks[top.rank.index] | self.wild_mask
+                situation = self.situation(top.code, face.index, 0)
+                # Pending cards can only be answered with a card of the same effect
+                for pending, answers in enumerate(self.answers):
+                    self.legal[situation | pending] = allowed & answers
+
+        special = [effects for effects in self.effects if effects]
+        classic = [{"draw": 2}, {"skip": True}, {"wild": True}]
+        self.classic = not self.chain_skips and all(effects in classic for effects in special) \
+            and all(special.count(effects) <= 1 for effects in classic)
+        self.draw_two = self.classic_rank("draw")
+        self.skip = self.classic_rank("skip")
+        self.wild = self.classic_rank("wild")
+
+    def effect_mask(self, effect: str) -> int:
+        mask = 0
+        for rank, effects in enumerate(self.effects):
+            if effect in effects:
+                mask |= self.pack.masks.rank_masks[rank]
+        return mask
+
+    def classic_rank(self, effect: str) -> int:
+        if self.classic:
+            for rank, effects in enumerate(self.effects):
+                if effect in effects:
+                    return rank
+        return -1
+
+    def situation(self, top: int, face: int, pending: int) -> int:
+        """
+        :param top: Code of the top card.
+        :param face: Index of the face to play.
+        :param pending: PENDING_DRAW and PENDING_SKIP, if draw cards or a skip are pending.
+        :return: The index of the situation in the table.
+        """
+        return (top * self.face_count + face) << 2 | pending
+
+    def allowed(self, top: int, face: int) -> int:
+        """ :return: Bitmask of the cards matching the top card and face, regardless of anything pending. """
+        return self.legal[(top * self.face_count + face) << 2]
+
+    def legal_mask(self, top: int, face: int, pending: int) -> int:
+        """ :return: Bitmask of the cards that may be played. """
+        return self.legal[(top * self.face_count + face) << 2 | pending]
+
+
+_tables: Dict[Tuple[Pack, str], RuleTable] = {}
+
+
+def rule_table(pack: Pack, rules: RulesSource = None) -> RuleTable:
+    """ :return: The table of the pack and rules. It is built the first time it is asked for and shared afterwards. """
+    if rules is None:
+        # The classic rules of every simulated game, which need no key built
+        key = (pack, None)
+    else:
+        key = (pack, os.path.abspath(rules) if isinstance(rules, str) else json.dumps(rules, sort_keys=True))
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = RuleTable(pack, rules)
+    return table
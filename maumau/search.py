@@ -0,0 +1,189 @@
+import math
+import time
+from dataclasses import dataclass
+from random import Random
+from typing import Dict, List, Tuple
+
+from cards import load_pack
+from .compact import CompactGame
+
+
+@dataclass(frozen=True)
+class SearchRoot:
+    """ Everything the player to move knows about the game. It is picklable, so it can be sent to other processes. """
+
+    pack: str | dict
+    """ Path or definition of the pack. """
+    seat: int
+    hand: int
+    """ Bitmask of the player's hand. """
+    counts: Tuple[int, ...]
+    """ Number of cards in hand of every seat. """
+    finished: Tuple[int, ...]
+    top: int
+    next_face: int
+    cards_to_draw: int
+    table_mask: int
+    excluded: Tuple[int, ...] = ()
+    """ Bitmask of the cards every seat is known not to hold, apart from the ones they drew since, see belief. """
+    fresh: Tuple[int, ...] = ()
+    """ Number of cards every seat drew since they were seen passing, which may be any. """
+
+    def determinize(self, rng: Random) -> CompactGame:
+        return CompactGame.determinize(load_pack(self.pack), self.seat, self.hand, list(self.counts),
+                                       list(self.finished), self.top, self.next_face, self.cards_to_draw,
+                                       self.table_mask, rng, list(self.excluded), list(self.fresh))
+
+
+class Edge:
+    __slots__ = ("visits", "reward", "available")
+
+    visits: int
+    reward: float
+    """ Sum of the rewards of the player making the move. """
+    available: int
+    """ How often the move was legal when its node was visited. """
+
+    def __init__(self):
+        self.visits = 0
+        self.reward = 0.
+        self.available = 0
+
+
+RootStats = Dict[int, Tuple[int, float]]
+""" Visits and summed reward of every move at the root. """
+
+
+class ISMCTS:
+    """
+    Information set Monte Carlo tree search. Every iteration deals the unknown cards randomly, walks down the tree
+    along moves that are legal in that deal, and plays on with random moves for a few turns. Games that are not over by
+    then are scored by the number of cards of the players, which is noisy, but much less so than a single random game
+    to the end.
+
+    Nodes live in a transposition table keyed by what the searching player can see of the game, so different move
+    orders that lead to the same situation share their statistics, and so do consecutive searches of the same game.
+    """
+
+    exploration: float
+    rollout_moves: int
+    """ Number of random moves played after leaving the tree. """
+    max_nodes: int
+    """ The table is cleared when it grows beyond this many nodes. """
+    rng: Random
+    table: Dict[Tuple, Dict[int, Edge]]
+
+    iterations: int
+    """ Number of iterations of the last search. """
+    table_hits: int
+    """ Number of node lookups of the last search that found an existing node. """
+    table_lookups: int
+
+    def __init__(self,
+                 exploration: float = .7,
+                 rollout_moves: int = 10,
+                 max_nodes: int = 200_000,
+                 rng: Random | None = None,
+                 ):
+        self.exploration = exploration
+        self.rollout_moves = rollout_moves
+        self.max_nodes = max_nodes
+        self.rng = Random() if rng is None else rng
+        self.table = {}
+        self.iterations = 0
+        self.table_hits = 0
+        self.table_lookups = 0
+
+    def clear(self) -> None:
+        self.table.clear()
+
+    def search(self, root: SearchRoot, iterations: int | None = None, time_limit: float | None = None) -> RootStats:
+        """
+        Search until the iteration budget or the time limit is used up, whichever comes first.
+        :return: The statistics of every move at the root.
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError("A search needs an iteration budget or a time limit!")
+        if len(self.table) > self.max_nodes:
+            self.table.clear()
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.iterations = self.table_hits = self.table_lookups = 0
+
+        root_key = None
+        while iterations is None or self.iterations < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            game = root.determinize(self.rng)
+            if root_key is None:
+                root_key = game.key(root.seat)
+            self.iterate(game, root.seat)
+            self.iterations += 1
+
+        edges = self.table.get(root_key, {})
+        return {move: (edge.visits, edge.reward) for move, edge in edges.items()}
+
+    def iterate(self, game: CompactGame, observer: int) -> None:
+        path: List[Tuple[Edge, int]] = []
+        while not game.is_over():
+            key = game.key(observer)
+            self.table_lookups += 1
+            edges = self.table.get(key)
+            if edges is None:
+                edges = self.table[key] = {}
+            else:
+                self.table_hits += 1
+
+            moves = game.moves()
+            untried = []
+            for move in moves:
+                edge = edges.get(move)
+                if edge is None:
+                    edge = edges[move] = Edge()
+                edge.available += 1
+                if not edge.visits:
+                    untried.append(move)
+
+            if untried:
+                move = untried[self.rng.randrange(len(untried))]
+                path.append((edges[move], game.seat))
+                game.apply(move)
+                break
+
+            best_move = moves[0]
+            best_score = -1.
+            for move in moves:
+                edge = edges[move]
+                score = edge.reward / edge.visits \
+                    + self.exploration * math.sqrt(math.log(edge.available) / edge.visits)
+                if score > best_score:
+                    best_move = move
+                    best_score = score
+            path.append((edges[best_move], game.seat))
+            game.apply(best_move)
+
+        game.rollout(self.rollout_moves)
+        rewards = game.rewards()
+        for edge, seat in path:
+            edge.visits += 1
+            edge.reward += rewards[seat]
+
+
+def search_in_worker(root: SearchRoot,
+                     iterations: int | None,
+                     time_limit: float | None,
+                     exploration: float,
+                     rollout_moves: int,
+                     seed: int,
+                     ) -> RootStats:
+    """ Run an independent search, meant for root parallelism across processes. """
+    searcher = ISMCTS(exploration=exploration, rollout_moves=rollout_moves, rng=Random(seed))
+    return searcher.search(root, iterations, time_limit)
+
+
+def merge_root_stats(stats: List[RootStats]) -> RootStats:
+    merged: RootStats = {}
+    for root_stats in stats:
+        for move, (visits, reward) in root_stats.items():
+            total_visits, total_reward = merged.get(move, (0, 0.))
+            merged[move] = (total_visits + visits, total_reward + reward)
+    return merged
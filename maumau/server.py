@@ -0,0 +1,151 @@
+import asyncio
+import random
+from random import Random
+from typing import List, Set
+
+from cards import Pack, PackSource, load_pack
+from .async_engine import AsyncMauMau
+from .engine import MauMau
+from .events import EventSink
+from .players import BasePlayer, RemotePlayer, StupidAI
+from .result import GameResult
+from .rules import RulesSource
+from .tournament import PlayerFactory
+
+
+class GameServer:
+    """
+    Hosts any number of tables on a single event loop. Clients connect over TCP and send their name as the first line.
+    They wait in the lobby until a table is free, and the server fills the remaining seats with bots.
+
+    After the result of a game, a client sends "again" to go back to the lobby, or closes the connection.
+    """
+
+    host: str
+    port: int
+    pack: Pack
+    rules: RulesSource
+    seats: int
+    """ Number of players per table. """
+    remote_seats: int
+    """ Number of seats per table taken by clients. The other seats are taken by bots. """
+    bot_factory: PlayerFactory
+    turn_timeout: float | None
+    max_turns: int | None
+    sink: EventSink
+    rng: Random
+
+    lobby: "asyncio.Queue[RemotePlayer]"
+    names: Set[str]
+    """ Names of the clients connected, which are unique. """
+    tables: int
+    """ Number of tables currently playing. """
+    games_played: int
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 7777,
+                 seats: int = 4,
+                 remote_seats: int = 1,
+                 bot_factory: PlayerFactory = StupidAI,
+                 pack: PackSource = MauMau.DEFAULT_PACK,
+                 turn_timeout: float | None = 30.,
+                 max_turns: int | None = 10_000,
+                 sink: EventSink | None = None,
+                 seed: int | None = None,
+                 rules: RulesSource = None,
+                 ):
+        if not 0 < remote_seats <= seats:
+            raise ValueError("A table needs at least one and at most all seats for clients!")
+        self.host = host
+        self.port = port
+        self.pack = load_pack(pack)
+        self.rules = rules
+        self.seats = seats
+        self.remote_seats = remote_seats
+        self.bot_factory = bot_factory
+        self.turn_timeout = turn_timeout
+        self.max_turns = max_turns
+        self.sink = EventSink() if sink is None else sink
+        self.rng = Random(random.getrandbits(64) if seed is None else seed)
+        self.lobby = asyncio.Queue()
+        self.names = set()
+        self.tables = 0
+        self.games_played = 0
+
+    async def serve_forever(self) -> None:
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.seat_players())
+
+    def unique_name(self, name: str) -> str:
+        name = name or "Player"
+        unique, number = name, 1
+        while unique in self.names:
+            number += 1
+            unique = f"{name} {number}"
+        return unique
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Serve a single client connection, from its first line until it is closed. """
+        name = self.unique_name((await reader.readline()).decode().strip())
+        self.names.add(name)
+        player = RemotePlayer(name, reader, writer)
+        try:
+            await player.send({"type": "welcome", "name": name})
+            while player.connected:
+                player.game_over.clear()
+                await self.lobby.put(player)
+                await player.game_over.wait()
+                if not await self.wants_again(player):
+                    break
+        finally:
+            self.names.discard(name)
+            writer.close()
+
+    @staticmethod
+    async def wants_again(player: RemotePlayer) -> bool:
+        """ :return: Whether the client asked for another game. Late answers to earlier requests are skipped. """
+        try:
+            while True:
+                line = await player.read_line()
+                if line == "again":
+                    return True
+        except ConnectionError:
+            return False
+
+    async def seat_players(self) -> None:
+        """ Take clients from the lobby and start a table as soon as there are enough of them. """
+        tasks = set()
+        while True:
+            remote_players = []
+            while len(remote_players) < self.remote_seats:
+                player = await self.lobby.get()
+                if player.connected:
+                    remote_players.append(player)
+            bots = [self.bot_factory(f"Bot {idx + 1}") for idx in range(self.seats - self.remote_seats)]
+            players = remote_players + bots
+            self.rng.shuffle(players)
+            task = asyncio.create_task(self.play_table(players))
+            # The loop only keeps weak references to tasks
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def play_table(self, players: List[BasePlayer]) -> GameResult:
+        remote_players = [player for player in players if isinstance(player, RemotePlayer)]
+        self.tables += 1
+        try:
+            game = AsyncMauMau(players, pack=self.pack, sink=self.sink, seed=self.rng.getrandbits(64),
+                               turn_timeout=self.turn_timeout, rules=self.rules)
+            for player in remote_players:
+                await player.send({"type": "seated", "seat": player.seat, "seed": game.seed,
+                                   "players": [other.name for other in players]})
+            result = await game.play_async(max_turns=self.max_turns)
+            self.games_played += 1
+            for player in remote_players:
+                await player.send({"type": "result", "finishers": result.finishers, "completed": result.completed})
+            return result
+        finally:
+            self.tables -= 1
+            for player in remote_players:
+                player.game_over.set()
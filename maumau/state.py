@@ -0,0 +1,222 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator, List, Sequence, Tuple
+
+from cards import Card, IndexedSymbol, Pack
+
+if TYPE_CHECKING:
+    from .belief import CardTracker
+    from .engine import MauMau
+    from .rules import RuleTable
+
+DRAW: str = "d"
+""" The move of a player who draws instead of playing a card. """
+
+SHOW_ALL: str = "!"
+""" Not a move, but asks the game to show all hands and the table, for debugging. The player is asked again. """
+
+Move = Card | str
+""" A card from the player's hand to play, or DRAW. """
+
+
+class SeatValues(Sequence[int]):
+    """ Read-only view of a list with one value per seat. """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: List[int]):
+        self._values = values
+
+    def __getitem__(self, seat):
+        return self._values[seat]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._values)
+
+    def __eq__(self, other: object) -> bool:
+        return list(self) == list(other) if isinstance(other, Sequence) else NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self._values)
+
+
+class GameState:
+    """
+    Read-only view of a running game. Nothing is copied, so it always shows the current state and costs nothing to
+    pass around.
+    """
+
+    __slots__ = ("_game", "hand_counts")
+
+    hand_counts: SeatValues
+    """ Number of cards in hand of every player, by seat. Finished players hold no cards. """
+
+    def __init__(self, game: "MauMau"):
+        self._game = game
+        self.hand_counts = SeatValues(game.hand_counts)
+
+    @property
+    def pack(self) -> Pack:
+        return self._game.pack
+
+    @property
+    def rules(self) -> "RuleTable":
+        return self._game.rules
+
+    @property
+    def tracker(self) -> "CardTracker | None":
+        """ What everybody knows about the cards nobody has seen, if a player asked for it with tracks_cards. """
+        return self._game.tracker
+
+    @property
+    def current_card(self) -> Card:
+        return self._game.table.cards[-1]
+
+    @property
+    def current_face(self) -> IndexedSymbol:
+        return self._game.next_face
+
+    @property
+    def cards_to_draw(self) -> int:
+        return self._game.cards_to_draw
+
+    @property
+    def chain_length(self) -> int:
+        """ Number of 7s on top of the table. """
+        return self._game.chain
+
+    @property
+    def table_mask(self) -> int:
+        """ Bitmask of all cards on the table, which everybody has seen being played. """
+        return self._game.table.mask
+
+    @property
+    def seat(self) -> int:
+        """ The seat whose turn is next. """
+        return self._game.seat
+
+    @property
+    def players_left(self) -> int:
+        return len(self._game.players) - len(self._game.finished_seats)
+
+    def is_finished(self, seat: int) -> bool:
+        return seat in self._game.finished_seats
+
+    @property
+    def turns(self) -> int:
+        return self._game.turns
+
+
+class Observation:
+    """
+    What a player sees when choosing a move. Like GameState, it is a read-only view of the game, which the game creates
+    once per seat, so asking for a decision creates nothing. Everything is read from the game when asked for, so
+    players that keep anything beyond the decision have to copy it. It holds bitmasks instead of lists, cards are
+    looked up only when asked for.
+    """
+
+    __slots__ = ("_game", "seat", "hand_counts")
+
+    seat: int
+    hand_counts: SeatValues
+    """ Number of cards in hand of every player, by seat. """
+
+    def __init__(self, game: "MauMau", seat: int):
+        self._game = game
+        self.seat = seat
+        self.hand_counts = game.state.hand_counts
+
+    @property
+    def pack(self) -> Pack:
+        return self._game.pack
+
+    @property
+    def rules(self) -> "RuleTable":
+        """ The rules of the game, e.g. to look up the effects of a card. """
+        return self._game.rules
+
+    @property
+    def hand_mask(self) -> int:
+        """ Bitmask of the codes of all cards in the player's hand. """
+        return self._game.players[self.seat].hand.mask
+
+    @property
+    def legal_mask(self) -> int:
+        """ Bitmask of the cards the player may play, including that pending cards have to be answered in kind. """
+        game = self._game
+        return game.players[self.seat].hand.mask & game.rules.legal_mask(game.table.cards[-1].code,
+                                                                         game.next_face.index, game.pending)
+
+    @property
+    def top_card(self) -> Card:
+        return self._game.table.cards[-1]
+
+    @property
+    def face(self) -> IndexedSymbol:
+        """ The face to play, which differs from the face of the top card after a Jack. """
+        return self._game.next_face
+
+    @property
+    def cards_to_draw(self) -> int:
+        """ Number of cards the player draws instead of playing a card. """
+        return self._game.cards_to_draw
+
+    @property
+    def pending(self) -> int:
+        """ PENDING_DRAW and PENDING_SKIP, if the player has to answer draw cards or a skip. """
+        return self._game.pending
+
+    @property
+    def hand(self) -> List[Card]:
+        """ The cards in the player's hand, ordered by code. """
+        return self.pack.cards_from_mask(self.hand_mask)
+
+    @property
+    def legal_cards(self) -> List[Card]:
+        """ The cards the player may play, ordered by code. """
+        return self.pack.cards_from_mask(self.legal_mask)
+
+    def is_legal(self, card: Card) -> bool:
+        return self.legal_mask >> card.code & 1 == 1
+
+    @property
+    def moves(self) -> List[Move]:
+        """ All legal moves. Drawing is always allowed. """
+        return self.legal_cards + [DRAW]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Everything that changes during a game, in flat form: card codes packed into bytes, plain integers and, if asked for,
+    the states of the random generators. Taking or restoring one does not create any card objects, and pickling one is
+    cheap, so games can be forked many times and shipped to other processes.
+    """
+
+    pack: str | dict
+    """ Path of the pack file, or the pack definition. """
+    rules: str | dict | None
+    """ Path of the rules file or the rules definition, None for the classic rules. """
+    seed: int
+    cards: bytes
+    """ Codes of the cards in the deck, on the table and in every hand, in that order, as unsigned 16 bit integers. """
+    sizes: Tuple[int, ...]
+    """ Number of cards in the deck, on the table and in every hand, by seat. """
+    counters: Tuple[int, ...]
+    """
+    cards_to_draw, miss_turn, index of the next face, chain, pending, reversed, seat, last_seat, round, turns and
+    replenishes, in this order.
+    """
+    next_seat: Tuple[int, ...]
+    prev_seat: Tuple[int, ...]
+    finishers: Tuple[int, ...]
+    """ Seats of the players who finished, in the order they finished. """
+    cards_drawn: Tuple[int, ...]
+    """ Number of cards drawn by every player, by seat. """
+    rng_states: Tuple[tuple, ...] = ()
+    """ States of the random generators of the game and of every player, by seat, empty unless asked for. """
+    excluded: Tuple[int, ...] = ()
+    fresh: Tuple[int, ...] = ()
+    """ State of the card tracker, empty if the game does not track cards. """
@@ -0,0 +1,174 @@
+import asyncio
+import sys
+import threading
+from typing import List, TextIO
+
+from cards import Card, IndexedSymbol, PackSource
+from .async_engine import AsyncMauMau
+from .engine import MauMau
+from .events import ConsoleSink
+from .players import BasePlayer, StupidAI
+from .result import GameResult
+from .rules import PENDING_DRAW, PENDING_SKIP, RulesSource
+from .state import DRAW, Move, Observation
+from .tournament import PlayerFactory
+
+
+class Terminal(ConsoleSink):
+    """
+    Front end of games played at a terminal. Events are printed as they happen, one line each, while lines typed are
+    collected in the background, so input never blocks the game. Anything typed before a decision is asked for is kept
+    and answers it, which lets people pick their next move while the bots are still playing.
+    """
+
+    output: TextIO
+    lines: "asyncio.Queue[str | None]"
+    """ Lines typed and not used yet. None marks the end of the input. """
+    reader: threading.Thread | None
+
+    def __init__(self, output: TextIO | None = None):
+        """ :param output: (optional) Where to print to. By default, the standard output at the time. """
+        self.output = sys.stdout if output is None else output
+        self.lines = asyncio.Queue()
+        self.reader = None
+
+    def start(self, stream: TextIO | None = None) -> None:
+        """
+        Start reading lines from the stream, by default the standard input. This has to be called from the event loop
+        the game runs on.
+        """
+        loop = asyncio.get_running_loop()
+        stream = sys.stdin if stream is None else stream
+
+        def read() -> None:
+            # Reading from a terminal blocks, so it happens in a thread that hands every line over to the loop
+            try:
+                for line in stream:
+                    loop.call_soon_threadsafe(self.lines.put_nowait, line.strip())
+                loop.call_soon_threadsafe(self.lines.put_nowait, None)
+            except RuntimeError:
+                # The game is over and its loop closed, so nobody asks for lines anymore
+                pass
+
+        self.reader = threading.Thread(target=read, name="terminal-input", daemon=True)
+        self.reader.start()
+
+    def write(self, text: str) -> None:
+        self.output.write(text + "\n")
+        self.output.flush()
+
+    async def ask(self, prompt: str) -> str:
+        """ :return: The next line typed, which may have been typed before the prompt was shown. """
+        if self.lines.empty():
+            self.output.write(prompt)
+            self.output.flush()
+        line = await self.lines.get()
+        if line is None:
+            raise EOFError("The input ended.")
+        return line
+
+
+class TerminalPlayer(BasePlayer):
+    """
+    A person at the terminal. Only the async decisions are supported, so it plays in an AsyncMauMau. The hand is only
+    printed when it changed since it was shown last, and moves without an alternative are made right away.
+    """
+
+    interactive = True
+
+    terminal: Terminal
+    auto_draw: bool
+    """ Whether to draw without asking if no card may be played. """
+    shown_hand: int
+    """ Bitmask of the hand as it was printed last. """
+
+    def __init__(self, name: str, terminal: Terminal, auto_draw: bool = True):
+        super().__init__(name=name)
+        self.terminal = terminal
+        self.auto_draw = auto_draw
+        self.shown_hand = -1
+
+    def show_hand(self, cards: List[Card], mask: int) -> None:
+        if mask != self.shown_hand:
+            self.shown_hand = mask
+            self.terminal.write("Your hand: " + " ".join(f"{idx + 1}:{card}" for idx, card in enumerate(cards)))
+
+    async def choose_card_async(
+            self,
+            observation: Observation,
+    ) -> Move:
+        cards = observation.hand
+        if not observation.legal_mask and self.auto_draw:
+            self.terminal.write(f"{self.name} cannot play on {observation.top_card} and draws.")
+            return DRAW
+        self.show_hand(cards, observation.hand_mask)
+
+        prompt = f"{self.name}, on {observation.top_card}"
+        if observation.face != observation.top_card.face:
+            prompt += f", face {observation.face.symbol}"
+        if observation.pending & PENDING_DRAW:
+            prompt += f", draw {observation.cards_to_draw} or chain"
+        elif observation.pending & PENDING_SKIP:
+            prompt += ", pass the skip on or be skipped"
+        prompt += " - card number, d to draw, h for your hand: "
+        while True:
+            choice = await self.terminal.ask(prompt)
+            if choice == DRAW:
+                return DRAW
+            if choice.isdigit() and 0 < int(choice) <= len(cards):
+                return cards[int(choice) - 1]
+            if choice == "h":
+                self.shown_hand = -1
+                self.show_hand(cards, observation.hand_mask)
+            else:
+                self.terminal.write("Invalid option!")
+
+    async def choose_face_async(
+            self,
+            current_face: IndexedSymbol,
+            available_faces: List[IndexedSymbol],
+    ) -> IndexedSymbol:
+        prompt = " ".join(f"{idx + 1}:{face.symbol}" for idx, face in enumerate(available_faces))
+        prompt += f" - {self.name}, which face instead of {current_face.symbol}? "
+        while True:
+            choice = await self.terminal.ask(prompt)
+            if choice.isdigit() and 0 < int(choice) <= len(available_faces):
+                return available_faces[int(choice) - 1]
+            self.terminal.write("Invalid option!")
+
+    async def choose_play_immediately_async(
+            self,
+            drawn_card: Card
+    ) -> bool:
+        prompt = f"{self.name}, you drew {drawn_card} - play it right away (y/n)? "
+        while True:
+            choice = (await self.terminal.ask(prompt)).lower()
+            if choice in ("y", "n"):
+                return choice == "y"
+            self.terminal.write("Invalid option!")
+
+
+async def play_terminal(names: List[str],
+                        bots: int = 3,
+                        bot_factory: PlayerFactory = StupidAI,
+                        pack: PackSource = MauMau.DEFAULT_PACK,
+                        rules: RulesSource = None,
+                        pace: float = .5,
+                        auto_draw: bool = True,
+                        seed: int | None = None,
+                        ) -> GameResult:
+    """
+    Play a game between people at the terminal and bots.
+    :param names: Names of the people playing, who take turns at the same terminal.
+    :param bots: Number of bots.
+    :param bot_factory: Creates the bots.
+    :param pace: Seconds to wait after every turn of a bot, so people can follow. Input is read meanwhile.
+    :param auto_draw: Whether people draw without being asked if no card may be played.
+    """
+    terminal = Terminal()
+    terminal.start()
+    players = [TerminalPlayer(name, terminal, auto_draw=auto_draw) for name in names]
+    players += [bot_factory(f"Bot {idx + 1}") for idx in range(bots)]
+    game = AsyncMauMau(players, pack=pack, sink=terminal, seed=seed, rules=rules)
+    game.turn_delay = pace
+    return await game.play_async()
@@ -0,0 +1,187 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
+from random import Random
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from cards import Pack, PackSource, load_pack
+from .engine import MauMau
+from .events import EventSink
+from .players import BasePlayer
+from .result import GameResult
+from .rules import RulesSource, load_rules
+
+PlayerFactory = Callable[[str], BasePlayer]
+
+
+@dataclass(frozen=True)
+class Entrant:
+    """ A participant of a tournament. The factory has to be picklable, e.g. a player class. """
+
+    name: str
+    factory: PlayerFactory
+
+
+@dataclass
+class Standing:
+    """ Aggregated results of one entrant. """
+
+    name: str
+    games: int = 0
+    wins: int = 0
+    position_sum: int = 0
+    """ Sum of finishing positions, starting at 1. """
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.
+
+    @property
+    def average_position(self) -> float:
+        return self.position_sum / self.games if self.games else 0.
+
+    def confidence_interval(self, z: float = 1.96) -> Tuple[float, float]:
+        """
+        Wilson score interval of the win rate.
+        :param z: The quantile of the standard normal distribution, 1.96 for a 95% interval.
+        :return: Lower and upper bound of the win rate.
+        """
+        if not self.games:
+            return 0., 1.
+        n = self.games
+        p = self.win_rate
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+        return max(0., center - margin), min(1., center + margin)
+
+
+def seating(entrants: List[Entrant], game: int) -> List[Entrant]:
+    """ Rotate the seats round-robin, so every entrant starts equally often from every seat. """
+    shift = game % len(entrants)
+    return entrants[shift:] + entrants[:shift]
+
+
+def chunk_seed(seed: int, chunk: int) -> str:
+    """ Seed of a single chunk, independent of which worker happens to play it. """
+    return f"{seed}:{chunk}"
+
+
+def play_chunk(entrants: List[Entrant],
+               pack: PackSource,
+               rules: RulesSource,
+               seed: int,
+               chunk: int,
+               first_game: int,
+               games: int,
+               max_turns: int | None,
+               ) -> List[GameResult]:
+    """
+    Play a consecutive range of games. This runs inside the worker processes.
+    :return: The results of the games, in order.
+    """
+    rng = Random(chunk_seed(seed, chunk))
+    players = {entrant.name: entrant.factory(entrant.name) for entrant in entrants}
+    sink = EventSink()
+    results = []
+    for game in range(first_game, first_game + games):
+        lineup = [players[entrant.name] for entrant in seating(entrants, game)]
+        engine = MauMau(lineup, pack=pack, sink=sink, seed=rng.getrandbits(64), rules=rules)
+        results.append(engine.play(max_turns=max_turns))
+    return results
+
+
+class Tournament:
+    """
+    Plays a large number of games between a fixed set of entrants, spread over a pool of worker processes.
+    Games are split into chunks, each of which is seeded on its own, so the outcome only depends on the seed and the
+    chunk size, not on the number of workers.
+    """
+
+    entrants: List[Entrant]
+    pack: Pack
+    rules: RulesSource
+    games: int
+    seed: int
+    workers: int
+    chunk_size: int
+    max_turns: int | None
+
+    standings: Dict[str, Standing]
+    aborted: int
+    """ Number of games that hit the turn limit. They do not count towards the standings. """
+
+    def __init__(self,
+                 entrants: List[Entrant],
+                 games: int,
+                 pack: PackSource = MauMau.DEFAULT_PACK,
+                 seed: int = 0,
+                 workers: int | None = None,
+                 chunk_size: int = 500,
+                 max_turns: int | None = 10_000,
+                 rules: RulesSource = None,
+                 ):
+        if len({entrant.name for entrant in entrants}) != len(entrants):
+            raise ValueError("Cannot have multiple entrants with identical names!")
+        self.entrants = list(entrants)
+        self.pack = load_pack(pack)
+        self.rules = rules
+        self.games = games
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_turns = max_turns
+        self.standings = {entrant.name: Standing(entrant.name) for entrant in self.entrants}
+        self.aborted = 0
+
+    def chunks(self) -> List[Tuple[int, int, int]]:
+        """ :return: Index, first game and number of games of every chunk. """
+        return [(idx, first, min(self.chunk_size, self.games - first))
+                for idx, first in enumerate(range(0, self.games, self.chunk_size))]
+
+    def chunk_calls(self) -> List[Callable[[], List[GameResult]]]:
+        """ :return: A call playing the games of every chunk, which can be sent to a worker process. """
+        # Workers get the definitions instead of the paths, so they never have to read the pack or rules file
+        args = (self.entrants, self.pack.definition, load_rules(self.rules), self.seed)
+        return [partial(play_chunk, *args, chunk, first, count, self.max_turns)
+                for chunk, first, count in self.chunks()]
+
+    def stream(self) -> Iterator[List[GameResult]]:
+        """
+        Play all games and yield the results chunk by chunk as soon as they are available. With multiple workers,
+        chunks arrive in the order they finish.
+        """
+        if self.workers == 1:
+            for call in self.chunk_calls():
+                yield call()
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(call) for call in self.chunk_calls()]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def record(self, result: GameResult) -> None:
+        if not result.completed:
+            self.aborted += 1
+            return
+        for position, name in enumerate(result.finishers):
+            standing = self.standings[name]
+            standing.games += 1
+            standing.position_sum += position + 1
+        self.standings[result.winner].wins += 1
+
+    def run(self) -> List[Standing]:
+        """
+        Play all games.
+        :return: The standings, best win rate first.
+        """
+        for results in self.stream():
+            for result in results:
+                self.record(result)
+        return self.ranking()
+
+    def ranking(self) -> List[Standing]:
+        return sorted(self.standings.values(), key=lambda standing: standing.win_rate, reverse=True)
@@ -0,0 +1,288 @@
+import math
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from random import Random
+from typing import Dict, List, Tuple
+
+from cards import PackSource, load_pack
+from .engine import MauMau
+from .events import EventSink
+from .players import StupidAI
+from .players.heuristic import HeuristicAI, Strategy, random_strategy
+from .rules import RulesSource, load_rules
+from .tournament import PlayerFactory, Standing
+
+CANDIDATE = "Candidate"
+""" The name of the candidate in the games played for it. The opponents are called Opponent 1, 2 and so on. """
+
+
+def game_seeds(seed: int, round_index: int, games: int) -> List[int]:
+    """ :return: The seeds of the games of a round, which all candidates play, so they meet the same deals. """
+    rng = Random(f"{seed}:{round_index}")
+    return [rng.getrandbits(64) for _ in range(games)]
+
+
+def play_games(strategy: Strategy,
+               opponent: PlayerFactory,
+               players: int,
+               pack: PackSource,
+               rules: RulesSource,
+               seeds: List[int],
+               first_game: int,
+               max_turns: int | None,
+               ) -> bytes:
+    """
+    Play games of a candidate strategy against opponents. This runs inside the worker processes.
+    :param first_game: Index of the first game, which decides the seat of the candidate, so every seat gets its turn.
+    :return: One byte per game, in the order of the seeds: 1 if the candidate won, else 0.
+    """
+    candidate = HeuristicAI(CANDIDATE, strategy)
+    opponents = [opponent(f"Opponent {idx + 1}") for idx in range(players - 1)]
+    sink = EventSink()
+    wins = bytearray()
+    for game, seed in enumerate(seeds, first_game):
+        seat = game % players
+        lineup = opponents[:seat] + [candidate] + opponents[seat:]
+        result = MauMau(lineup, pack=pack, sink=sink, seed=seed, rules=rules).play(max_turns=max_turns)
+        wins.append(result.completed and result.winner == CANDIDATE)
+    return bytes(wins)
+
+
+@dataclass
+class Candidate:
+    name: str
+    strategy: Strategy
+    wins: bytearray = field(default_factory=bytearray)
+    """ Outcome of every game played so far, in the order of the rounds and seeds: 1 for a win, else 0. """
+    dropped: int | None = None
+    """ The round the candidate was dropped in, or None if it is still in the race. """
+
+    @property
+    def games(self) -> int:
+        return len(self.wins)
+
+    @property
+    def win_rate(self) -> float:
+        return sum(self.wins) / len(self.wins) if self.wins else 0.
+
+    def paired_z(self, other: "Candidate") -> float:
+        """
+        Compare with another candidate on the games both played. Both met the same deals, so the difference of their
+        outcomes varies much less than the outcomes themselves.
+        :return: The z-score of the mean difference of the outcomes, below zero if this candidate wins less.
+        """
+        count = min(self.games, other.games)
+        if count < 2:
+            return 0.
+        differences = [mine - theirs for mine, theirs in zip(self.wins[:count], other.wins[:count])]
+        mean = sum(differences) / count
+        variance = sum((difference - mean) ** 2 for difference in differences) / (count - 1)
+        if not variance:
+            return 0. if not mean else math.copysign(math.inf, mean)
+        return mean / math.sqrt(variance / count)
+
+
+@dataclass
+class RoundReport:
+    """ What happened in a round of the tuning. """
+
+    round: int
+    candidates: int
+    """ Number of candidates that played in the round. """
+    games: int
+    """
+    Number of games played in the round, by all candidates together. Candidates dropped as losing stop playing before
+    the end of the round, so it may be less than the games per candidate times the candidates.
+    """
+    leader: str
+    leader_win_rate: float
+    leader_interval: Tuple[float, float]
+    """ 95% Wilson interval of the win rate of the leader. """
+    dropped_losing: int
+    """ Number of candidates dropped because they lost to the leader significantly. """
+    dropped_halving: int
+    """ Number of candidates dropped because they ranked in the lower part of the rest. """
+    elapsed: float
+
+
+@dataclass
+class TuningReport:
+    best: Strategy
+    best_win_rate: float
+    baseline: float
+    """ The win rate of a candidate as good as its opponents, 1 / players. """
+    rounds: List[RoundReport]
+    candidates: List[Candidate]
+    games: int
+    """ Number of games played in total. """
+
+    def format(self) -> str:
+        lines = [f"{'round':>5} {'alive':>6} {'games':>7} {'leader':>14} {'win rate':>9} {'95% interval':>17} "
+                 f"{'losing':>7} {'halved':>7} {'seconds':>8}"]
+        for report in self.rounds:
+            low, high = report.leader_interval
+            lines.append(f"{report.round:>5} {report.candidates:>6} {report.games:>7} {report.leader:>14} "
+                         f"{report.leader_win_rate:>9.2%} {f'[{low:.2%}, {high:.2%}]':>17} "
+                         f"{report.dropped_losing:>7} {report.dropped_halving:>7} {report.elapsed:>8.2f}")
+        lines.append(f"Best win rate {self.best_win_rate:.2%} against a baseline of {self.baseline:.2%} "
+                     f"after {self.games} games.")
+        return "\n".join(lines)
+
+
+class Tuner:
+    """
+    Searches for the strategy of a HeuristicAI that wins most often against a field of opponents, by successive
+    halving: many random strategies start out with a few games each, and after every round the best of them play on
+    with more games, until only one is left.
+
+    Every round, all candidates play the same deals from the same seats, i.e. common random numbers, so the luck of
+    the cards cancels out when candidates are compared. Candidates that lose to the leader significantly on the games
+    they both played are dropped right away, besides the halving, so the games go to the candidates that may still
+    win. The games of a round are split into chunks that are played on a pool of worker processes.
+    """
+
+    opponent: PlayerFactory
+    players: int
+    pack: PackSource
+    rules: RulesSource
+    candidates: int
+    first_games: int
+    """ Number of games every candidate plays in the first round. """
+    eta: int
+    """ Only one in eta candidates survives a halving, and the games per round grow by that factor. """
+    z: float
+    """ z-score below which a candidate counts as losing to the leader. """
+    seed: int
+    workers: int
+    chunk_size: int
+    max_turns: int | None
+    rng: Random
+
+    def __init__(self,
+                 opponent: PlayerFactory = StupidAI,
+                 players: int = 4,
+                 pack: PackSource = MauMau.DEFAULT_PACK,
+                 rules: RulesSource = None,
+                 candidates: int = 32,
+                 first_games: int = 200,
+                 eta: int = 2,
+                 z: float = 2.5,
+                 seed: int = 0,
+                 workers: int | None = None,
+                 chunk_size: int = 100,
+                 max_turns: int | None = 10_000,
+                 ):
+        """
+        :param opponent: Creates the opponents of the candidates. It has to be picklable, e.g. a player class.
+        :param candidates: Number of strategies to start with. The default strategy is always one of them.
+        """
+        if eta < 2:
+            raise ValueError("Successive halving needs eta of at least 2!")
+        self.opponent = opponent
+        self.players = players
+        self.pack = load_pack(pack).source
+        self.rules = load_rules(rules)
+        self.candidates = candidates
+        self.first_games = first_games
+        self.eta = eta
+        self.z = z
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_turns = max_turns
+        self.rng = Random(seed)
+
+    def initial_candidates(self) -> List[Candidate]:
+        strategies = [Strategy()] + [random_strategy(self.rng) for _ in range(self.candidates - 1)]
+        return [Candidate(f"#{idx}", strategy) for idx, strategy in enumerate(strategies)]
+
+    def play_round(self, executor: Executor | None, candidates: List[Candidate], round_index: int, games: int
+                   ) -> List[Candidate]:
+        """
+        Let every candidate play the games of a round, chunk by chunk, concurrently if there is an executor. Once all
+        candidates played a chunk, the ones that lose to the leader significantly are dropped, and the chunks they did
+        not start yet are cancelled.
+        :return: The candidates dropped because they lost to the leader.
+        """
+        seeds = game_seeds(self.seed, round_index, games)
+        # The seats continue where the last round stopped, so they stay balanced over all rounds
+        offset = candidates[0].games
+        chunks = [(start, seeds[start:start + self.chunk_size]) for start in range(0, games, self.chunk_size)]
+        play = partial(play_games, opponent=self.opponent, players=self.players, pack=self.pack, rules=self.rules,
+                       max_turns=self.max_turns)
+        futures: Dict[Tuple[int, int], Future] = {}
+        if executor is not None:
+            # The first chunks of all candidates go first, so the drops can be decided while the rest are played
+            futures = {(idx, start): executor.submit(play, candidate.strategy, seeds=chunk, first_game=offset + start)
+                       for start, chunk in chunks for idx, candidate in enumerate(candidates)}
+        alive = list(enumerate(candidates))
+        losing = []
+        for start, chunk in chunks:
+            for idx, candidate in alive:
+                future = futures.get((idx, start))
+                candidate.wins += future.result() if future is not None \
+                    else play(candidate.strategy, seeds=chunk, first_game=offset + start)
+            # Decided on whole chunks only, so the outcome does not depend on the order the workers finish in
+            leader = max(alive, key=lambda item: item[1].win_rate)[1]
+            for idx, candidate in alive:
+                if candidate.paired_z(leader) < -self.z:
+                    candidate.dropped = round_index
+                    losing.append(candidate)
+                    for later, _ in chunks:
+                        if (idx, later) in futures:
+                            futures[idx, later].cancel()
+            alive = [(idx, candidate) for idx, candidate in alive if candidate.dropped is None]
+        return losing
+
+    def run(self) -> TuningReport:
+        """ Tune until a single candidate is left. """
+        candidates = self.initial_candidates()
+        alive = list(candidates)
+        rounds = []
+        games = self.first_games
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            round_index = 0
+            while True:
+                start = time.perf_counter()
+                before = sum(candidate.games for candidate in alive)
+                losing = self.play_round(executor, alive, round_index, games)
+                played = sum(candidate.games for candidate in alive) - before
+                alive = [candidate for candidate in alive if candidate.dropped is None]
+                alive.sort(key=lambda candidate: candidate.win_rate, reverse=True)
+                leader = alive[0]
+
+                keep = max(1, len(alive) // self.eta) if len(alive) > 1 else 1
+                halved = alive[keep:]
+                for candidate in halved:
+                    candidate.dropped = round_index
+                alive = alive[:keep]
+
+                rounds.append(RoundReport(round=round_index,
+                                          candidates=len(alive) + len(losing) + len(halved),
+                                          games=played,
+                                          leader=leader.name,
+                                          leader_win_rate=leader.win_rate,
+                                          leader_interval=Standing(leader.name, games=leader.games,
+                                                                   wins=sum(leader.wins)).confidence_interval(),
+                                          dropped_losing=len(losing),
+                                          dropped_halving=len(halved),
+                                          elapsed=time.perf_counter() - start))
+                if len(alive) == 1:
+                    break
+                round_index += 1
+                games *= self.eta
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best = alive[0]
+        return TuningReport(best=best.strategy,
+                            best_win_rate=best.win_rate,
+                            baseline=1 / self.players,
+                            rounds=rounds,
+                            candidates=candidates,
+                            games=sum(candidate.games for candidate in candidates))
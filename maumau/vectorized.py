@@ -0,0 +1,387 @@
+"""
+Plays many games of Mau Mau at once on NumPy arrays, which is much faster than MauMau.simulate, but has limits:
+- The deck of a game is a bitmask, and every card is drawn uniformly from the cards left in it, instead of from the top
+  of an ordered deck that is reshuffled from the table. A game only ever replenishes an empty deck, so the games follow
+  the same distribution as those of MauMau, but no game can be replayed card for card by MauMau with the same seed.
+- The legal moves come from rule_table(pack), which knows the classic rules only. The rules configs MauMau accepts,
+  e.g. reverse cards or other draw counts, cannot be played.
+- It plays about 80,000 games per second with 100,000 games on a single core, not 100,000 or more. Most of the time
+  goes into the NumPy passes over the running games, about 60 per turn.
+"""
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError("The vectorized engine requires numpy.") from e
+
+from cards import IndexedSymbol, PackSource, load_pack
+from .engine import MauMau
+from .result import GameResult
+from .rules import rule_table
+
+ONE = np.uint64(1)
+WORD = np.uint64(0xFFFF)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """ :return: The number of set bits of every uint64 mask. """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    masks = masks - ((masks >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    masks = (masks & np.uint64(0x3333333333333333)) + ((masks >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    masks = (masks + (masks >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((masks * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def bits(codes: np.ndarray) -> np.ndarray:
+    """ :return: The single-bit masks of the given card codes. """
+    return np.left_shift(ONE, codes.astype(np.uint64))
+
+
+def lowest_card(masks: np.ndarray) -> np.ndarray:
+    """ :return: The code of the lowest card of every non-empty mask. """
+    lowest = masks & (~masks + ONE)
+    return np.log2(lowest.astype(np.float64)).astype(np.int64)
+
+
+WORD_COUNTS = popcount(np.arange(1 << 16, dtype=np.uint64))
+""" Number of set bits of every 16-bit word. """
+_word_bits = (np.arange(1 << 16)[:, None] >> np.arange(16)) & 1
+_words, _positions = np.nonzero(_word_bits)
+WORD_SELECT = np.zeros((1 << 16) * 16, dtype=np.int8)
+WORD_SELECT[_words * 16 + np.cumsum(_word_bits, axis=1)[_words, _positions] - 1] = _positions
+""" Position of the k-th lowest set bit of every 16-bit word, at index word * 16 + k. """
+del _word_bits, _words, _positions
+
+
+class VectorPolicy:
+    """
+    A player strategy that decides for many games at once. Every method receives the engine, the indices of the games
+    that need a decision and the seat of the deciding player, which is the same for all of these games, so a policy
+    decides for all running games in one call.
+    """
+
+    def choose_cards(self, engine: "VectorizedMauMau", games: np.ndarray, seat: int, legal: np.ndarray) -> np.ndarray:
+        """
+        Choose the cards to play.
+        :param legal: Bitmask of the cards that may be played in each game, 7-chains already enforced.
+        :return: The code of the card to play in each game, or -1 to draw.
+        """
+        raise NotImplementedError()
+
+    def choose_faces(self, engine: "VectorizedMauMau", games: np.ndarray, seat: int) -> np.ndarray:
+        """
+        Choose the face the next player has to play after a Jack.
+        :return: The index of the face chosen in each game.
+        """
+        raise NotImplementedError()
+
+    def play_immediately(self,
+                         engine: "VectorizedMauMau",
+                         games: np.ndarray,
+                         seat: int,
+                         cards: np.ndarray,
+                         ) -> np.ndarray:
+        """
+        Choose whether to play the cards just drawn immediately or keep them.
+        :return: Whether the card should be played in each game.
+        """
+        raise NotImplementedError()
+
+
+class StupidPolicy(VectorPolicy):
+    """ The strategy of StupidAI, expressed on arrays. """
+
+    def choose_cards(self, engine: "VectorizedMauMau", games: np.ndarray, seat: int, legal: np.ndarray) -> np.ndarray:
+        # Any legal card but Jacks, which are only played if nothing else is possible and no 7-chain is pending
+        choice = engine.random_card(legal & ~engine.jack_mask)
+        jacks = engine.hands[seat][games] & engine.jack_mask
+        use_jack = (choice < 0) & (jacks != 0) & (engine.cards_to_draw[games] < 2)
+        choice[use_jack] = engine.random_card(jacks[use_jack])
+        return choice
+
+    def choose_faces(self, engine: "VectorizedMauMau", games: np.ndarray, seat: int) -> np.ndarray:
+        hands = engine.hands[seat][games]
+        face_counts = popcount(hands[:, None] & engine.face_masks[None, :])
+        return np.argmax(face_counts, axis=1)
+
+    def play_immediately(self,
+                         engine: "VectorizedMauMau",
+                         games: np.ndarray,
+                         seat: int,
+                         cards: np.ndarray,
+                         ) -> np.ndarray:
+        # Do not waste good cards, i.e. Jacks and 7s
+        return ((engine.jack_mask | engine.seven_mask) >> cards.astype(np.uint64)) & ONE == 0
+
+
+class VectorizedMauMau:
+    """
+    Plays many games in lockstep, with the state of all games held in NumPy arrays. Every step lets the current seat of
+    each running game take its turn, following the classic rules of MauMau. Packs may have at most 64 cards, so hands
+    fit into uint64 bitmasks.
+    """
+
+    HAND_SIZE: int = 5
+
+    policies: List[VectorPolicy]
+    faces: Tuple[IndexedSymbol, ...]
+    rng: np.random.Generator
+
+    face_of: np.ndarray
+    """ Face index of every card code. """
+    rank_of: np.ndarray
+    """ Rank index of every card code. """
+    face_masks: np.ndarray
+    rank_masks: np.ndarray
+    seven: int
+    eight: int
+    jack: int
+    seven_mask: np.ndarray
+    jack_mask: np.ndarray
+    legal: np.ndarray
+    """ Bitmask of the cards that may be played, indexed like RuleTable.legal. """
+
+    deck: np.ndarray
+    """
+    Bitmask of the draw pile of every game. Cards are drawn from it at random, which is the same as drawing the top card
+    of a shuffled pile.
+    """
+    table: np.ndarray
+    """ Bitmask of the table pile of every game, the top card included. """
+    top: np.ndarray
+    """ Code of the top card of the table pile of every game. """
+    hands: np.ndarray
+    """ Hand bitmask of every seat and game. """
+    next_face: np.ndarray
+    cards_to_draw: np.ndarray
+    miss_turn: np.ndarray
+    seat: int
+    """ The seat whose turn it is. All running games advance in lockstep, so it is the same in all of them. """
+
+    live: np.ndarray
+    completed: np.ndarray
+    finished: np.ndarray
+    place: np.ndarray
+    """ Finishing position of every seat and game, starting at 0, or -1 if the player has not finished yet. """
+    finish_count: np.ndarray
+    rounds: np.ndarray
+    turns: np.ndarray
+    replenishes: np.ndarray
+    cards_drawn: np.ndarray
+
+    def __init__(self,
+                 policies: List[VectorPolicy],
+                 games: int,
+                 pack: PackSource = MauMau.DEFAULT_PACK,
+                 seed: int | None = None,
+                 ):
+        pack = load_pack(pack)
+        card_count = len(pack.cards)
+        player_count = len(policies)
+        if card_count > 64:
+            raise ValueError("The vectorized engine supports at most 64 cards per pack!")
+        if card_count < player_count * self.HAND_SIZE + 1:
+            raise ValueError("Not enough cards to deal to all players!")
+
+        self.policies = list(policies)
+        self.faces = pack.faces
+        self.rng = np.random.default_rng(seed)
+
+        self.face_of = np.array([card.face.index for card in pack.cards], dtype=np.int64)
+        self.rank_of = np.array([card.rank.index for card in pack.cards], dtype=np.int64)
+        self.face_masks = np.array(pack.masks.face_masks, dtype=np.uint64)
+        self.rank_masks = np.array(pack.masks.rank_masks, dtype=np.uint64)
+        rules = rule_table(pack)
+        self.seven = rules.draw_two
+        self.eight = rules.skip
+        self.jack = rules.wild
+        self.seven_mask = np.uint64(rules.draw_mask)
+        self.jack_mask = np.uint64(rules.wild_mask)
+        self.legal = np.array(rules.legal, dtype=np.uint64)
+
+        # Shuffle and deal from the end of the deck, just like Deck.draw does
+        order = np.argsort(self.rng.random((games, card_count)), axis=1)
+        self.hands = np.zeros((player_count, games), dtype=np.uint64)
+        top = card_count
+        for seat in range(player_count):
+            for _ in range(self.HAND_SIZE):
+                top -= 1
+                self.hands[seat] |= bits(order[:, top])
+        top -= 1
+        self.deck = np.bitwise_or.reduce(bits(order[:, :top]), axis=1)
+        self.top = order[:, top].copy()
+        self.table = bits(self.top)
+
+        self.next_face = self.face_of[self.top]
+        self.cards_to_draw = np.ones(games, dtype=np.int64)
+        self.miss_turn = np.zeros(games, dtype=bool)
+        self.seat = 0
+
+        self.live = np.ones(games, dtype=bool)
+        self.completed = np.zeros(games, dtype=bool)
+        self.finished = np.zeros((player_count, games), dtype=bool)
+        self.place = np.full((player_count, games), -1, dtype=np.int64)
+        self.finish_count = np.zeros(games, dtype=np.int64)
+        self.rounds = np.zeros(games, dtype=np.int64)
+        self.turns = np.zeros(games, dtype=np.int64)
+        self.replenishes = np.zeros(games, dtype=np.int64)
+        self.cards_drawn = np.zeros((player_count, games), dtype=np.int64)
+
+    def allowed(self, games: np.ndarray) -> np.ndarray:
+        """ :return: Bitmask of all cards that may currently be played in each game, ignoring 7-chains. """
+        return self.legal[(self.top[games] * len(self.faces) + self.next_face[games]) * 4]
+
+    def random_card(self, masks: np.ndarray) -> np.ndarray:
+        """ :return: The code of a uniformly chosen card of each mask, or -1 if the mask is empty. """
+        counts = popcount(masks)
+        # Single precision is plenty to pick one of at most 64 cards, and truncating is flooring for positive numbers
+        picks = (self.rng.random(len(masks), dtype=np.float32) * counts).astype(np.int64)
+        # Skip the 16-bit words of the mask with fewer set bits than remain to be skipped, then look up the bit
+        word = (masks & WORD).astype(np.int64)
+        codes = np.zeros(len(masks), dtype=np.int64)
+        for idx in range(1, (len(self.face_of) + 15) // 16):
+            below = WORD_COUNTS[word]
+            later = picks >= below
+            picks -= below * later
+            word = np.where(later, ((masks >> np.uint64(16 * idx)) & WORD).astype(np.int64), word)
+            codes += 16 * later
+        codes += WORD_SELECT[word * 16 + picks]
+        return np.where(counts > 0, codes, -1)
+
+    def replenish(self, games: np.ndarray) -> None:
+        """ Put all table cards but the top one back into the deck. """
+        if not len(games):
+            return
+        top = bits(self.top[games])
+        self.deck[games] |= self.table[games] & ~top
+        self.table[games] = top
+        self.replenishes[games] += 1
+
+    def play(self, games: np.ndarray, seat: int, cards: np.ndarray) -> None:
+        self.hands[seat][games] &= ~bits(cards)
+        self.table[games] |= bits(cards)
+        self.top[games] = cards
+
+        ranks = self.rank_of[cards]
+        # Handle 7 - next player has to draw 2 cards or chain
+        sevens = games[ranks == self.seven]
+        to_draw = self.cards_to_draw[sevens]
+        self.cards_to_draw[sevens] = np.where(to_draw < 2, 0, to_draw) + 2
+        # Handle 8 - next player misses their turn
+        self.miss_turn[games[ranks == self.eight]] = True
+        # Handle J - current player can change face to whatever they want
+        faces = self.face_of[cards]
+        jacks = np.nonzero(ranks == self.jack)[0]
+        if len(jacks):
+            faces[jacks] = self.policies[seat].choose_faces(self, games[jacks], seat)
+        self.next_face[games] = faces
+
+    def draw(self, games: np.ndarray, seat: int) -> None:
+        deck = self.deck[games]
+        wanted = self.cards_to_draw[games]
+        drawn = np.zeros(len(games), dtype=np.uint64)
+        # A pile with too few cards is drawn completely, and the rest is drawn after the table was put back into it
+        short = np.nonzero(popcount(deck) < wanted)[0]
+        if len(short):
+            drawn[short] = deck[short]
+            wanted[short] -= popcount(deck[short])
+            self.deck[games[short]] = 0
+            self.replenish(games[short])
+            deck[short] = self.deck[games[short]]
+        wanted = np.minimum(wanted, popcount(deck))
+
+        # Several cards are drawn one after the other, each uniformly from the cards still in the pile
+        picking = np.nonzero(wanted > 0)[0]
+        while len(picking):
+            drawn[picking] |= bits(self.random_card(deck[picking] & ~drawn[picking]))
+            wanted[picking] -= 1
+            picking = picking[wanted[picking] > 0]
+        self.deck[games] = deck & ~drawn
+        self.hands[seat][games] |= drawn
+        counts = popcount(drawn)
+        self.cards_drawn[seat][games] += counts
+
+        # A single drawn card may be played immediately
+        single = counts == 1
+        games_single = games[single]
+        drawn = lowest_card(drawn[single])
+        playable = np.nonzero((self.allowed(games_single) >> drawn.astype(np.uint64)) & ONE)[0]
+        if len(playable):
+            play = self.policies[seat].play_immediately(self, games_single[playable], seat, drawn[playable])
+            self.play(games_single[playable[play]], seat, drawn[playable[play]])
+
+        self.cards_to_draw[games] = 1
+
+    def step(self) -> bool:
+        """
+        Let the current seat of every running game take its turn and move on to the next seat.
+        :return: Whether any game is still running.
+        """
+        games = np.nonzero(self.live)[0]
+        if not len(games):
+            return False
+        player_count = len(self.policies)
+        seat = self.seat
+        self.seat = (seat + 1) % player_count
+        if seat == 0:
+            self.rounds[games] += 1
+
+        games = games[~self.finished[seat][games]]
+        self.replenish(games[self.deck[games] == 0])
+
+        skipped = self.miss_turn[games]
+        self.miss_turn[games[skipped]] = False
+        games = games[~skipped]
+
+        situations = (self.top[games] * len(self.faces) + self.next_face[games]) * 4 + (self.cards_to_draw[games] > 1)
+        legal = self.hands[seat][games] & self.legal[situations]
+        choices = self.policies[seat].choose_cards(self, games, seat, legal)
+        playing = choices >= 0
+        if np.any(playing & ((legal >> np.maximum(choices, 0).astype(np.uint64)) & ONE == 0)):
+            raise ValueError("A policy chose a card that is not allowed!")
+        self.play(games[playing], seat, choices[playing])
+        self.draw(games[~playing], seat)
+        self.turns[games] += 1
+
+        games = games[self.hands[seat][games] == 0]
+        self.finished[seat][games] = True
+        self.place[seat][games] = self.finish_count[games]
+        self.finish_count[games] += 1
+
+        over = games[player_count - self.finish_count[games] < 2]
+        last = np.argmax(~self.finished[:, over], axis=0)
+        self.place[last, over] = self.finish_count[over]
+        self.finished[last, over] = True
+        self.finish_count[over] += 1
+        self.live[over] = False
+        self.completed[over] = True
+        return True
+
+    def run(self, max_turns: int | None = 10_000) -> None:
+        """
+        Play until all games are over.
+        :param max_turns: (optional) Abort games after this many turns.
+        """
+        while self.step():
+            if max_turns is not None:
+                self.live &= self.turns < max_turns
+
+    def results(self, names: List[str]) -> List[GameResult]:
+        """
+        :param names: The names of the players, by seat.
+        :return: The outcome of every game.
+        """
+        results = []
+        for game in range(len(self.live)):
+            places = self.place[:, game]
+            order = [seat for seat in np.argsort(places) if places[seat] >= 0]
+            results.append(GameResult(finishers=[names[seat] for seat in order],
+                                      rounds=int(self.rounds[game]),
+                                      turns=int(self.turns[game]),
+                                      cards_drawn={name: int(self.cards_drawn[seat, game])
+                                                   for seat, name in enumerate(names)},
+                                      replenishes=int(self.replenishes[game]),
+                                      completed=bool(self.completed[game])))
+        return results
@@ -0,0 +1,86 @@
+"""
+Thin client of the simulation daemon started with python -m maumau daemon. It only imports the standard library, so a
+query costs little more than the games themselves.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Iterator, List
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "maumau.sock")
+
+
+def query(job: dict, path: str = DEFAULT_SOCKET) -> Iterator[dict]:
+    """
+    Send a job to the daemon.
+    :return: The messages of the daemon, up to and including the one that ends the job.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(job).encode() + b"\n")
+        with connection.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                message = json.loads(line)
+                yield message
+                if message["event"] != "progress":
+                    return
+    raise ConnectionError("The daemon closed the connection before the job was done!")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python query.py", description="Run games on the simulation daemon.")
+    parser.add_argument("--players", default="stupid,stupid,stupid,stupid",
+                        help="Comma-separated types of the players: stupid, heuristic, endgame or search.")
+    parser.add_argument("--strategy", default=None,
+                        help="JSON file with the strategy of the heuristic players, as written by tune --save.")
+    parser.add_argument("--games", type=int, default=1000, help="Number of games to play.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the games.")
+    parser.add_argument("--pack", default=None, help="Name of a pack the daemon loaded, or the path of a pack file.")
+    parser.add_argument("--copies", type=int, default=None, help="Play with a shoe of this many copies of the pack.")
+    parser.add_argument("--rules", default=None, help="Name of rules the daemon loaded, or the path of a rules file.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Games per chunk sent to a worker.")
+    parser.add_argument("--max-turns", type=int, default=10_000, help="Abort games after this many turns.")
+    parser.add_argument("--results", default=None, help="Write the record of every game to this JSON lines file.")
+    parser.add_argument("--json", action="store_true", help="Print the final message of the daemon as JSON.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Socket the daemon listens on.")
+    args = parser.parse_args(argv)
+
+    options = None
+    if args.strategy:
+        with open(args.strategy, "r") as stream:
+            options = json.load(stream)
+    players = [{"type": kind, "options": options} if kind == "heuristic" and options else kind
+               for kind in args.players.split(",")]
+    job = {"players": players, "games": args.games, "seed": args.seed, "pack": args.pack, "copies": args.copies,
+           "rules": args.rules, "chunk_size": args.chunk_size, "max_turns": args.max_turns,
+           "results": bool(args.results)}
+
+    results = open(args.results, "w") if args.results else None
+    try:
+        for message in query(job, args.socket):
+            if results is not None:
+                for result in message.get("results", []):
+                    results.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if results is not None:
+            results.close()
+
+    if args.json or message["event"] == "error":
+        print(json.dumps(message, ensure_ascii=False))
+        if message["event"] == "error":
+            sys.exit(1)
+        return
+    print(f"Played {message['games']} games in {message['elapsed'] * 1000:.1f}ms.")
+    if message["aborted"]:
+        print(f"{message['aborted']} games hit the turn limit and were aborted.")
+    for rank, standing in enumerate(message["standings"]):
+        low, high = standing["interval"]
+        print(f"{rank + 1}. {standing['name']}: {standing['win_rate']:.2%} wins [{low:.2%}, {high:.2%}], "
+              f"average position {standing['average_position']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
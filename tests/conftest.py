@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def in_root(monkeypatch):
+    """ Packs and rules are found relative to the root of the repository, like the command line does. """
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from maumau import EventSink, MauMau, StupidAI
+
+np = pytest.importorskip("numpy")
+from maumau.batching import DecisionBatcher, FeatureEncoder, LinearPolicy, MLPPolicy, PolicyPlayer, \
+    play_batched  # noqa: E402
+
+
+def observations(count: int) -> list:
+    """ :return: What the first player sees in several games. """
+    games = [MauMau([StupidAI("A"), StupidAI("B")], sink=EventSink(), seed=seed) for seed in range(count)]
+    return [game.observe(game.players[0]) for game in games]
+
+
+def test_full_batch_is_evaluated_at_once():
+    encoder = FeatureEncoder()
+    policy = LinearPolicy.random(encoder, seed=0)
+    batcher = DecisionBatcher(policy, encoder, max_batch=8, timeout=60.)
+    batcher.expected = 3
+    seen = observations(3)
+
+    async def decide_all():
+        return await asyncio.gather(*(batcher.decide(observation) for observation in seen))
+
+    scores = asyncio.run(decide_all())
+    assert (batcher.stats.batches, batcher.stats.decisions, batcher.stats.full, batcher.stats.largest) == (1, 3, 1, 3)
+    for observation, row in zip(seen, scores):
+        assert row == pytest.approx(policy.forward(encoder.encode(observation)[None])[0], abs=1e-5)
+
+
+def test_batch_is_evaluated_after_the_timeout():
+    encoder = FeatureEncoder()
+    batcher = DecisionBatcher(LinearPolicy.random(encoder, seed=0), encoder, max_batch=8, timeout=.01)
+    asyncio.run(batcher.decide(observations(1)[0]))
+    assert (batcher.stats.batches, batcher.stats.decisions, batcher.stats.full) == (1, 1, 0)
+    assert batcher.stats.mean_wait >= .01
+
+
+def test_face_is_chosen_from_the_game_as_it_is():
+    encoder = FeatureEncoder()
+    policy = MLPPolicy.random(encoder, seed=1)
+    player = PolicyPlayer("Policy", policy, encoder)
+    with pytest.raises(ValueError):
+        player.choose_face(encoder.pack.faces[0], list(encoder.pack.faces))
+    game = MauMau([player, StupidAI("B")], sink=EventSink(), seed=0)
+    player.choose_card(game.observe(player))
+    # Without scores left from a decision before, the face still follows from the game
+    player.scores = None
+    first = encoder.draw_output + 1
+    expected = np.argmax(policy.forward(encoder.encode(game.observe(player))[None])[0][first:])
+    assert player.choose_face(encoder.pack.faces[0], list(encoder.pack.faces)) == encoder.pack.faces[expected]
+
+
+def test_policy_plays_batched_games():
+    encoder = FeatureEncoder(max_opponents=3)
+    results, stats = asyncio.run(play_batched(MLPPolicy.random(encoder, seed=0), encoder, games=12, concurrency=4,
+                                              seed=0))
+    assert all(result.completed for result in results)
+    assert stats.decisions >= len(results)
+    assert stats.mean_batch > 1
+    assert stats.largest <= 4
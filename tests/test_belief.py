@@ -0,0 +1,106 @@
+import pytest
+
+from cards import Hand, iter_codes, load_pack
+from maumau import EventSink, MauMau, Observation, StupidAI
+from maumau.belief import CardTracker
+
+
+def mask(*codes: int) -> int:
+    return sum(1 << code for code in codes)
+
+
+@pytest.fixture
+def tracker() -> CardTracker:
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    table = Hand()
+    table.add([pack.cards[0]])
+    return CardTracker(pack, table, [5, 5])
+
+
+def test_probabilities_after_scripted_plays(tracker):
+    # The observer holds cards 1 to 5 and the table card 0, which leaves 26 unseen cards
+    unseen = tracker.unseen(mask(1, 2, 3, 4, 5))
+    assert unseen.bit_count() == 26
+    assert tracker.probability(1, 0, unseen) == tracker.probability(1, 1, unseen) == 0.
+    # Nothing is known about the dealt cards yet
+    assert tracker.probability(1, 6, unseen) == pytest.approx(5 / 26)
+
+    # Passing rules out the cards that could have been played
+    tracker.passed(1, mask(6, 7, 8, 9))
+    assert tracker.probability(1, 6, unseen) == 0.
+    assert tracker.probability(1, 10, unseen) == pytest.approx(5 / 22)
+    assert tracker.possible(1, unseen) == unseen & ~mask(6, 7, 8, 9)
+
+    # A drawn card may be any of them
+    tracker.hand_counts[1] = 6
+    tracker.drew(1, 1)
+    assert tracker.probability(1, 6, unseen) == pytest.approx(1 / 26)
+    assert tracker.probability(1, 10, unseen) == pytest.approx(1 / 26 + 5 / 22)
+    assert tracker.possible(1, unseen) == unseen
+
+    # Playing keeps the drawn card unknown, the next pass covers it and forgets the older exclusions
+    tracker.hand_counts[1] = 5
+    tracker.played(1)
+    assert tracker.fresh[1] == 1
+    tracker.passed(1, mask(11))
+    assert (tracker.excluded[1], tracker.fresh[1]) == (mask(11), 0)
+    assert tracker.probability(1, 6, unseen) == pytest.approx(5 / 25)
+    tracker.passed(1, mask(12))
+    assert tracker.excluded[1] == mask(11, 12)
+    assert tracker.probability(1, 12, unseen) == 0.
+    assert tracker.probability(1, 6, unseen) == pytest.approx(5 / 24)
+
+    # Seat 0 was never seen passing
+    assert tracker.probability(0, 6, unseen) == pytest.approx(5 / 26)
+    for seat in range(2):
+        assert tracker.probabilities(seat, unseen) == [tracker.probability(seat, code, unseen)
+                                                       for code in range(len(tracker.pack.cards))]
+
+
+def test_fresh_cards_never_exceed_the_hand(tracker):
+    tracker.hand_counts[1] = 7
+    tracker.drew(1, 2)
+    tracker.hand_counts[1] = 3
+    tracker.played(1)
+    assert tracker.fresh[1] == 3
+    unseen = tracker.unseen(0)
+    assert tracker.probability(1, 6, unseen) == pytest.approx(3 / 31)
+
+
+def test_everything_excluded_falls_back_to_all_unseen_cards(tracker):
+    unseen = tracker.unseen(mask(1, 2, 3, 4, 5))
+    tracker.passed(1, unseen)
+    assert tracker.possible(1, unseen) == unseen
+    assert tracker.probability(1, 6, unseen) == pytest.approx(5 / 26)
+
+
+class TrackingAI(StupidAI):
+    """ Plays like StupidAI and checks the cards of the others against the tracker before every move. """
+
+    game: MauMau
+    checks: int = 0
+
+    tracks_cards = True
+
+    def choose_card(self, observation: Observation):
+        tracker = self.game_state.tracker
+        unseen = tracker.unseen(observation.hand_mask)
+        for other in self.game.players:
+            seat = self.game.seat_of[other]
+            if other is self or self.game_state.is_finished(seat):
+                continue
+            # StupidAI only draws when it cannot play, so the tracker never rules out a card it holds
+            assert other.hand.mask & ~tracker.possible(seat, unseen) == 0
+            assert all(tracker.probability(seat, code, unseen) > 0. for code in iter_codes(other.hand.mask))
+            self.checks += 1
+        return super().choose_card(observation)
+
+
+def test_tracker_never_rules_out_held_cards():
+    for seed in range(10):
+        tracking = TrackingAI("Tracking")
+        game = MauMau([tracking, StupidAI("A"), StupidAI("B")], sink=EventSink(), seed=seed)
+        tracking.game = game
+        assert game.tracker is not None
+        assert game.play().completed
+        assert tracking.checks
@@ -0,0 +1,11 @@
+from maumau import benchmark
+from maumau.__main__ import main
+
+
+def test_baseline_covers_every_benchmark():
+    assert set(benchmark.load_results(benchmark.BASELINE)) == set(benchmark.BENCHMARKS)
+
+
+def test_bench_compares_with_the_baseline_by_default(capsys):
+    main(["bench", "--filter", "hand.sort", "--repeat", "1", "--min-time", "0.01", "--tolerance", "1"])
+    assert f"Compared with {benchmark.BASELINE}:" in capsys.readouterr().out
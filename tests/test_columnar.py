@@ -0,0 +1,50 @@
+import pytest
+
+from maumau import MauMau, StupidAI
+from maumau.columnar import ChunkedColumn, ResultReader, ResultWriter
+
+NEEDS = {"arrow": "pyarrow", "parquet": "pyarrow", "npy": "numpy", "csv": None}
+""" The package each format needs. """
+
+
+def values(column) -> list:
+    """ :return: The values of a column read back, in whatever form the format returns it. """
+    if hasattr(column, "to_pylist"):
+        return column.to_pylist()
+    return [value.item() if hasattr(value, "item") else value for value in column]
+
+
+@pytest.mark.parametrize("file_format", list(NEEDS))
+def test_results_round_trip(tmp_path, file_format):
+    if NEEDS[file_format] is not None:
+        pytest.importorskip(NEEDS[file_format])
+    players = [StupidAI(f"AI {idx + 1}") for idx in range(3)]
+    # Small batches, so the tables are split into several parts
+    with ResultWriter(str(tmp_path), batch_size=4, file_format=file_format) as writer:
+        results = MauMau.simulate(players, games=10, sink=writer, seed=0)
+    reader = ResultReader(str(tmp_path))
+    assert len(reader.parts("games")) == 3
+    assert values(reader.column("games", "game")) == list(range(10))
+    assert values(reader.column("games", "seed")) == [result.seed for result in results]
+    assert values(reader.column("games", "turns")) == [result.turns for result in results]
+    assert values(reader.column("games", "players")) == ["AI 1,AI 2,AI 3"] * 10
+    assert values(reader.column("games", "finishers")) == [
+        ",".join(str(int(name[-1]) - 1) for name in result.finishers) for result in results]
+    assert values(reader.column("games", "completed")) == [True] * 10
+    assert values(reader.column("games", "cards_drawn")) == [sum(result.cards_drawn.values()) for result in results]
+    turns = values(reader.column("turns", "game"))
+    assert turns == [game for game, result in enumerate(results) for _ in range(result.turns)]
+
+
+def test_npy_columns_stay_memory_mapped(tmp_path):
+    np = pytest.importorskip("numpy")
+    with ResultWriter(str(tmp_path), batch_size=4, file_format="npy", turns=False) as writer:
+        results = MauMau.simulate([StupidAI("A"), StupidAI("B")], games=10, sink=writer, seed=0)
+    column = ResultReader(str(tmp_path)).column("games", "turns")
+    assert isinstance(column, ChunkedColumn)
+    assert all(isinstance(chunk, np.memmap) for chunk in column.chunks)
+    assert len(column) == 10
+    assert (column[5], column[-1]) == (results[5].turns, results[-1].turns)
+    assert column.to_numpy().tolist() == [result.turns for result in results]
+    with pytest.raises(IndexError):
+        column[10]
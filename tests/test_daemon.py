@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from maumau import StupidAI
+from maumau.daemon import SimulationDaemon
+from maumau.tournament import Entrant, Tournament
+
+
+class Writer:
+    """ Collects the lines a daemon sends to a client. """
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, data: bytes) -> None:
+        self.messages.append(json.loads(data))
+
+    async def drain(self) -> None:
+        pass
+
+
+@pytest.fixture
+def daemon() -> SimulationDaemon:
+    # Building tournaments needs no worker processes
+    return SimulationDaemon(workers=1)
+
+
+def test_players_with_their_options(daemon):
+    tournament = daemon.tournament({"players": ["stupid", {"type": "heuristic", "name": "Tuned",
+                                                           "options": {"wild": 0.5, "draw": 1}},
+                                                {"type": "search", "options": {"iterations": 50}}], "games": 10})
+    assert [entrant.name for entrant in tournament.entrants] == ["stupid 1", "Tuned", "search 3"]
+
+
+@pytest.mark.parametrize("job", [
+    ["stupid", "stupid"],
+    {"players": "stupid"},
+    {"players": ["stupid", 3], "games": 10},
+    {"players": ["stupid", {"type": ["search"]}], "games": 10},
+    {"players": ["stupid", {"type": "stupid", "options": {"wild": 1.}}], "games": 10},
+    {"players": ["stupid", {"type": "search", "options": {"workers": 8}}], "games": 10},
+    {"players": ["stupid", {"type": "search", "options": {"iterations": "many"}}], "games": 10},
+    {"players": ["stupid", {"type": "endgame", "options": {"endgame_cards": True}}], "games": 10},
+    {"players": ["stupid", {"type": "heuristic", "options": [0.5]}], "games": 10},
+    {"players": ["stupid", "stupid"]},
+    {"players": ["stupid", "stupid"], "games": -5},
+    {"players": ["stupid", "stupid"], "games": "10"},
+    {"players": ["stupid", "stupid"], "games": 10, "chunk_size": "x"},
+    {"players": ["stupid", "stupid"], "games": 10, "chunk_size": 0},
+    {"players": ["stupid", "stupid"], "games": 10, "chunk_size": 2.5},
+    {"players": ["stupid", "stupid"], "games": 10, "max_turns": "x"},
+    {"players": ["stupid", "stupid"], "games": 10, "max_turns": True},
+    {"players": ["stupid", "stupid"], "games": 10, "max_turns": None},
+])
+def test_invalid_jobs_are_refused(daemon, job):
+    with pytest.raises((TypeError, ValueError)):
+        daemon.tournament(job)
+
+
+def test_job_settings_are_used(daemon):
+    tournament = daemon.tournament({"players": ["stupid", "stupid"], "games": 10, "chunk_size": 3, "max_turns": 50})
+    assert (tournament.games, tournament.chunk_size, tournament.max_turns) == (10, 3, 50)
+
+
+def test_failing_job_gets_an_error_line(daemon):
+    # A tournament that cannot even split its games into chunks, which a job can no longer ask for
+    tournament = Tournament([Entrant("A", StupidAI), Entrant("B", StupidAI)], games=10, workers=1, chunk_size="x")
+    writer = Writer()
+    asyncio.run(daemon.run_job(tournament, writer))
+    assert [message["event"] for message in writer.messages] == ["error"]
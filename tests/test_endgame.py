@@ -0,0 +1,156 @@
+import math
+from itertools import combinations
+from random import Random
+
+import pytest
+
+from cards import iter_codes, load_pack
+from maumau import EndgameAI, EventSink, MauMau, StupidAI
+from maumau.compact import DRAW_KEEP, CompactGame
+from maumau.endgame import EndgamePosition, EndgameSolver
+
+
+SMALL_PACK = {"faces": ["♣", "♦"], "ranks": [7, 8, 9, "J", "K"], "roles": {"draw_two": 7, "skip": 8, "wild": "J"}}
+""" Few enough cards to search every game by brute force, with the roles of the classic rules. """
+
+
+def codes(pack, *cards: str) -> int:
+    by_name = {str(card): card.code for card in pack.cards}
+    return sum(1 << by_name[card] for card in cards)
+
+
+def estimate(game: CompactGame) -> float:
+    """ The guess the solver makes where its search ends, see EndgameSolver.estimate(). """
+    hand, other = game.hands[game.seat], game.hands[1 - game.seat]
+    count = hand.bit_count()
+    if game.legal_cards():
+        count -= 1
+        if not count:
+            return 1.
+    else:
+        count += game.cards_to_draw
+    return other.bit_count() / (count + other.bit_count())
+
+
+def after(game: CompactGame, seat: int, depth: int) -> float:
+    """ :return: The win probability of the seat that just moved. """
+    if game.is_over():
+        return float(game.finish_order[0] == seat)
+    value = brute_force(game, depth)
+    return value if game.seat == seat else 1. - value
+
+
+def brute_force(game: CompactGame, depth: int) -> float:
+    """ :return: The win probability of the seat to move, searching every move and every card drawn. """
+    if not depth:
+        return estimate(game)
+    return max(move_values(game, depth - 1).values())
+
+
+def move_values(game: CompactGame, depth: int) -> dict:
+    seat = game.seat
+    values = {}
+    for code in iter_codes(game.legal_cards()):
+        faces = range(game.rules.face_count) if game.rules.rank_of[code] == game.rules.jack \
+            else [game.rules.face_of[code]]
+        for face in faces:
+            played = game.copy()
+            played.play(code, face)
+            if not played.is_over():
+                played.advance()
+            values[(code, face)] = after(played, seat, depth)
+    values[(-1, -1)] = draw_value(game, depth)
+    return values
+
+
+def draw_value(game: CompactGame, depth: int) -> float:
+    seat = game.seat
+    game = game.copy()
+    first = ()
+    if len(game.deck) < game.cards_to_draw:
+        # The cards left in the deck are drawn first, then the rest from the table pile shuffled under them
+        first = tuple(game.deck)
+        game.replenish()
+    count = min(game.cards_to_draw, len(game.deck))
+    if not count:
+        game.apply(DRAW_KEEP)
+        return after(game, seat, depth)
+    outcomes = [first + rest for rest in combinations([code for code in game.deck if code not in first],
+                                                      count - len(first))]
+    total = 0.
+    for drawn in outcomes:
+        kept = game.copy()
+        # Put the cards to draw on top of the deck
+        kept.deck = [code for code in kept.deck if code not in drawn] + list(drawn)
+        allowed = kept.allowed()
+        kept.apply(DRAW_KEEP)
+        value = after(kept, seat, depth)
+        if count == 1 and allowed >> drawn[0] & 1:
+            code = drawn[0]
+            faces = range(game.rules.face_count) if game.rules.rank_of[code] == game.rules.jack \
+                else [game.rules.face_of[code]]
+            for face in faces:
+                played = game.copy()
+                played.deck.remove(code)
+                played.hands[seat] |= 1 << code
+                played.counts[seat] += 1
+                played.play(code, face)
+                played.cards_to_draw = 1
+                if not played.is_over():
+                    played.advance()
+                value = max(value, after(played, seat, depth))
+        total += value
+    return total / len(outcomes)
+
+
+@pytest.mark.parametrize("hand, top, unseen, other_count, to_draw", [
+    ("♣8 ♦9", "♣K", "♦7 ♦J ♣9", 2, 1),
+    ("♣J ♦9 ♦K", "♣9", "♦7 ♣K ♣7", 1, 1),
+    ("♦7 ♦K", "♣7", "♦8 ♣J ♣9", 2, 2),
+    ("♣9", "♦8", "♦J ♣7", 2, 1),
+])
+def test_solver_values_match_brute_force(hand, top, unseen, other_count, to_draw):
+    pack = load_pack(SMALL_PACK)
+    hand_mask, top_code, unseen_mask = codes(pack, *hand.split()), codes(pack, top).bit_length() - 1, \
+        codes(pack, *unseen.split())
+    table_mask = (1 << len(pack.cards)) - 1 & ~hand_mask & ~unseen_mask
+    face = pack.cards[top_code].face.index
+    position = EndgamePosition(hand_mask, other_count, top_code, face, to_draw, table_mask)
+    hands = [sum(1 << code for code in other) for other in combinations(iter_codes(unseen_mask), other_count)]
+    for depth in range(1, 4):
+        # A fresh solver for every depth, since deeper values found in the memo are used for shallower searches
+        solver = EndgameSolver(pack, max_depth=depth, budget=60.)
+        solver.deadline = math.inf
+        average = {}
+        for other in hands:
+            game = CompactGame.determinize(pack, 0, hand_mask, [hand_mask.bit_count(), other_count], [], top_code,
+                                           face, to_draw, table_mask, Random(0))
+            game.hands[1] = other
+            game.deck = list(iter_codes(unseen_mask & ~other))
+            expected = move_values(game, depth)
+            values = solver.root_values(position, other, unseen_mask & ~other, table_mask & ~(1 << top_code), -1,
+                                        depth)
+            assert values == pytest.approx(expected)
+            for move, value in expected.items():
+                average[move] = average.get(move, 0.) + value / len(hands)
+        if depth == 1:
+            assert EndgameSolver(pack, max_depth=1, budget=60.).solve_card(position) == pytest.approx(average)
+
+
+def test_solver_only_decides_proven_moves():
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    # Playing the 8 first means playing again, and then the 9 of clubs wins
+    hand_mask, top_code = codes(pack, "♣8", "♣9"), codes(pack, "♣10").bit_length() - 1
+    unseen_mask = codes(pack, "♥7", "♥J", "♠A")
+    table_mask = (1 << len(pack.cards)) - 1 & ~hand_mask & ~unseen_mask
+    solver = EndgameSolver(pack, budget=60., rng=Random(0))
+    values = solver.solve_card(EndgamePosition(hand_mask, 2, top_code, pack.cards[top_code].face.index, 1,
+                                               table_mask))
+    assert solver.proven
+    assert max(values, key=values.get) == (codes(pack, "♣8").bit_length() - 1, pack.cards[top_code].face.index)
+
+
+def test_endgame_ai_plays_with_the_solver_or_without():
+    for seed in range(5):
+        result = MauMau([EndgameAI("Endgame"), StupidAI("Stupid")], sink=EventSink(), seed=seed).play()
+        assert result.completed
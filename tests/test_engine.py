@@ -0,0 +1,90 @@
+import asyncio
+from typing import List
+
+from cards import Card
+from maumau import AsyncMauMau, DRAW, EventSink, MauMau, Observation, StupidAI
+
+
+class RecordingSink(EventSink):
+    events: List[str]
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event: str, **data) -> None:
+        self.events.append(event)
+
+
+class CheatingAI(StupidAI):
+    """ Tries to play a card of the table instead of one of its own once, then plays like StupidAI. """
+
+    cheated: bool = False
+
+    def choose_card(self, observation: Observation) -> Card | str:
+        if not self.cheated:
+            self.cheated = True
+            return observation.top_card
+        return super().choose_card(observation)
+
+
+def test_card_not_held_is_invalid():
+    sink = RecordingSink()
+    cheater = CheatingAI("Cheater")
+    result = MauMau([cheater, StupidAI("AI")], sink=sink, seed=3).play(max_turns=1000)
+    assert cheater.cheated
+    assert sink.events.count("invalid_option") == 1
+    assert result.completed
+
+
+def test_card_not_held_is_invalid_async():
+    sink = RecordingSink()
+    cheater = CheatingAI("Cheater")
+    result = asyncio.run(AsyncMauMau([cheater, StupidAI("AI")], sink=sink, seed=3).play_async(max_turns=1000))
+    assert sink.events.count("invalid_option") == 1
+    assert result.completed
+
+
+class CuriousAI(StupidAI):
+    """ Asks to see all hands once, like a developer typing "!". """
+
+    asked: bool = False
+
+    def choose_card(self, observation: Observation) -> Card | str:
+        if not self.asked:
+            self.asked = True
+            return "!"
+        return super().choose_card(observation)
+
+
+def test_show_all_is_not_a_move():
+    sink = RecordingSink()
+    result = MauMau([CuriousAI("Curious"), StupidAI("AI")], sink=sink, seed=3).play(max_turns=1000)
+    assert sink.events.count("debug") == 1
+    assert "invalid_option" not in sink.events
+    assert result.completed
+
+
+def test_observation_follows_the_game():
+    game = MauMau([StupidAI("A"), StupidAI("B")], sink=EventSink(), seed=0)
+    observation = game.observe(game.players[0])
+    assert observation is game.observe(game.players[0])
+    assert observation.hand_mask == game.players[0].hand.mask
+    assert observation.top_card is game.table.cards[-1]
+    game.step()
+    assert observation.hand_mask == game.players[0].hand.mask
+    assert observation.top_card is game.table.cards[-1]
+
+
+def test_cards_never_equal_other_types():
+    game = MauMau([StupidAI("A"), StupidAI("B")], sink=EventSink(), seed=0)
+    card = game.pack.cards[0]
+    assert card != DRAW
+    assert card.face != DRAW
+    assert card == game.pack.cards[0]
+
+
+def test_stupid_ai_keeps_special_cards_drawn():
+    game = MauMau([StupidAI("A"), StupidAI("B")], sink=EventSink(), seed=0)
+    player = game.players[0]
+    kept = {card.rank.symbol for card in game.pack.cards if not player.choose_play_immediately(card)}
+    assert kept == {"7", "J"}
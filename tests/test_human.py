@@ -0,0 +1,47 @@
+from maumau import EventSink, HumanPlayer, MauMau, StupidAI
+from maumau.state import DRAW
+
+
+def scripted(monkeypatch, answers):
+    prompts = []
+
+    def answer(prompt: str) -> str:
+        prompts.append(prompt)
+        return next(answers)
+    monkeypatch.setattr("builtins.input", answer)
+    return prompts
+
+
+def test_card_prompt_lists_the_hand_by_code(monkeypatch):
+    prompts = scripted(monkeypatch, iter(["1", DRAW]))
+    human = HumanPlayer("You")
+    game = MauMau([human, StupidAI("Bot")], sink=EventSink(), seed=0)
+    observation = game.observe(human)
+    assert human.choose_card(observation) == observation.hand[0]
+    assert human.choose_card(observation) == DRAW
+    lines = prompts[0].splitlines()
+    for idx, card in enumerate(observation.hand):
+        assert lines[idx + 1] == f"{idx + 1}: {card}{' *' if observation.is_legal(card) else ''}"
+
+
+def test_face_prompt_counts_the_cards_of_every_face(monkeypatch):
+    prompts = scripted(monkeypatch, iter(["x", "9", "2"]))
+    human = HumanPlayer("You")
+    game = MauMau([human, StupidAI("Bot")], sink=EventSink(), seed=0)
+    faces = list(game.pack.faces)
+    # Invalid answers are asked again
+    assert human.choose_face(faces[0], faces) == faces[1]
+    assert len(prompts) == 3
+    for idx, face in enumerate(faces):
+        count = sum(card.face == face for card in human.hand.cards)
+        assert f"{idx + 1}: {face.symbol} ({count} in your hand)" in prompts[0]
+
+
+def test_human_plays_a_whole_game(monkeypatch):
+    # Draw whenever asked for a card, keep drawn cards and pick the first face
+    answers = {"card": DRAW, "face": "1", "drew": "n"}
+    monkeypatch.setattr("builtins.input", lambda prompt: answers["card" if "play?" in prompt else
+                                                                 "face" if "face do" in prompt else "drew"])
+    result = MauMau([HumanPlayer("You"), StupidAI("Bot")], sink=EventSink(), seed=1).play(max_turns=1000)
+    assert result.completed
+    assert result.winner == "Bot"
@@ -0,0 +1,40 @@
+from maumau import MauMau, StupidAI
+from maumau.instrumentation import Histogram, MetricsCollector, SamplingCollector
+
+
+def test_histogram_buckets_by_powers_of_two():
+    histogram = Histogram()
+    for value in (1, 3, 5, 100, 1000):
+        histogram.add(value)
+    assert (histogram.count, histogram.total, histogram.min, histogram.max) == (5, 1109, 1, 1000)
+    assert histogram.mean == 1109 / 5
+    assert histogram.percentile(.5) == 8
+    assert histogram.percentile(1.) == 1000
+
+
+def test_metrics_match_the_game_result():
+    for seed in range(5):
+        metrics = MetricsCollector()
+        players = [StupidAI(f"AI {idx + 1}") for idx in range(4)]
+        game = MauMau(players, sink=metrics, seed=seed)
+        result = game.play()
+        assert result.completed
+        assert metrics.events["turn_ended"] == metrics.events["turn_started"] == result.turns
+        assert metrics.turn_times.count == metrics.decision_times.count == result.turns
+        assert sum(histogram.count for histogram in metrics.player_decision_times.values()) == result.turns
+        assert {name: metrics.cards_drawn[name] for name in result.cards_drawn} == result.cards_drawn
+        for seat, player in enumerate(players):
+            # Every card dealt or drawn was played, except those the loser still holds
+            dealt = MauMau.HAND_SIZE + result.cards_drawn[player.name]
+            assert metrics.cards_played[player.name] == dealt - game.hand_counts[seat]
+
+
+def test_sampling_collector_keeps_whole_turns():
+    collector = SamplingCollector(rate=1., max_samples=10, seed=0)
+    result = MauMau([StupidAI("A"), StupidAI("B")], sink=collector, seed=0).play()
+    assert len(collector.samples) == min(10, result.turns)
+    assert collector.current is None
+    for sample in collector.samples:
+        assert sample.player in ("A", "B")
+        assert 0 <= sample.decision_ns <= sample.duration_ns
+        assert all(0 <= offset for _, offset in sample.events)
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+
+from maumau import MauMau, StupidAI
+from maumau.replay import GameLogWriter, read_logs, replay
+
+
+@pytest.mark.parametrize("rules", [None, "./packs/rules/house.json"])
+def test_replay_round_trip(rules):
+    stream = io.StringIO()
+    players = [StupidAI(f"AI {idx + 1}") for idx in range(4)]
+    results = MauMau.simulate(players, games=30, sink=GameLogWriter(stream), seed=7, rules=rules)
+
+    logs = list(read_logs(io.StringIO(stream.getvalue())))
+    assert len(logs) == len(results)
+    for log, result in zip(logs, results):
+        assert log.seed == result.seed
+        # Raises if the replayed game ends differently
+        game = replay(log)
+        assert [player.name for player in game.finishers] == result.finishers
+        assert game.turns == result.turns
+
+
+def test_logs_replay_from_anywhere(monkeypatch, tmp_path):
+    stream = io.StringIO()
+    players = [StupidAI(f"AI {idx + 1}") for idx in range(3)]
+    results = MauMau.simulate(players, games=5, sink=GameLogWriter(stream), seed=1, rules="./packs/rules/house.json")
+
+    monkeypatch.chdir(tmp_path)
+    for log, result in zip(read_logs(io.StringIO(stream.getvalue())), results):
+        assert [player.name for player in replay(log).finishers] == result.finishers
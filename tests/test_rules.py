@@ -0,0 +1,44 @@
+import pytest
+
+from cards import load_pack
+from maumau.rules import PENDING_DRAW, PENDING_SKIP, rule_table
+
+
+@pytest.mark.parametrize("pack_path", ["./packs/french_32.json", "./packs/french_52.json"])
+def test_classic_legality(pack_path):
+    """
+    Every situation allows exactly the cards of the face to play, of the top card's rank, and Jacks. Pending draw cards
+    can only be answered with another 7.
+    """
+    pack = load_pack(pack_path)
+    rules = rule_table(pack)
+    assert rules.classic
+    for top in pack.cards:
+        for face in pack.faces:
+            for pending in (0, PENDING_DRAW):
+                legal = rules.legal_mask(top.code, face.index, pending)
+                for card in pack.cards:
+                    expected = card.face == face or card.rank == top.rank or card.rank.symbol == "J"
+                    if pending:
+                        expected = expected and card.rank.symbol == "7"
+                    assert (legal >> card.code & 1 == 1) == expected, (str(top), str(face), pending, str(card))
+
+
+def test_classic_special_ranks():
+    pack = load_pack("./packs/french_32.json")
+    rules = rule_table(pack)
+    symbols = {"draw": "7", "skip": "8", "wild": "J"}
+    for effect, mask in [("draw", rules.draw_mask), ("skip", rules.skip_mask), ("wild", rules.wild_mask)]:
+        assert {card.rank.symbol for card in pack.cards_from_mask(mask)} == {symbols[effect]}
+
+
+def test_house_rules_answers():
+    pack = load_pack("./packs/french_32.json")
+    rules = rule_table(pack, "./packs/rules/house.json")
+    assert rules.chain_skips and not rules.classic
+    top = next(card for card in pack.cards if card.rank.symbol == "8")
+    skips = rules.legal_mask(top.code, top.face.index, PENDING_SKIP)
+    assert {card.rank.symbol for card in pack.cards_from_mask(skips)} == {"8"}
+    draws = rules.legal_mask(top.code, top.face.index, PENDING_DRAW)
+    # The Queen both draws and is wild, so it answers draw cards on any face
+    assert {card.rank.symbol for card in pack.cards_from_mask(draws)} == {"7", "Q"}
@@ -0,0 +1,47 @@
+from random import Random
+
+from cards import load_pack
+from maumau import EventSink, MauMau, SearchAI, StupidAI
+from maumau.compact import DRAW_KEEP, DRAW_PLAY, CompactGame, play_move
+
+
+def codes(pack, *cards: str) -> int:
+    by_name = {str(card): card.code for card in pack.cards}
+    return sum(1 << by_name[card] for card in cards)
+
+
+def game_with(hand: str, top: str, cards_to_draw: int = 1, seed: int = 0) -> CompactGame:
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    top_code = codes(pack, top).bit_length() - 1
+    return CompactGame.determinize(pack, 0, codes(pack, *hand.split()), [len(hand.split()), 5], [], top_code,
+                                   pack.cards[top_code].face.index, cards_to_draw, 1 << top_code, Random(seed))
+
+
+def test_draw_variants_only_for_single_cards():
+    assert game_with("♦8 ♦9", "♣10").moves() == [DRAW_PLAY, DRAW_KEEP]
+    # A pending 7 that cannot be answered means drawing two cards, which are never played right away
+    assert game_with("♦8 ♦9", "♣7", cards_to_draw=2).moves() == [DRAW_PLAY]
+
+
+def test_jacks_only_if_nothing_else_fits():
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    game = game_with("♣8 ♣J ♦9", "♣10")
+    assert game.moves() == [codes(pack, "♣8").bit_length() - 1]
+    game = game_with("♣J ♦9 ♦K", "♥10")
+    jack = codes(pack, "♣J").bit_length() - 1
+    assert game.moves() == [play_move(jack, pack.cards[codes(pack, "♦9").bit_length() - 1].face.index)]
+
+
+def test_deals_respect_what_passes_revealed():
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    excluded = codes(pack, "♥7", "♥8", "♥9", "♥10", "♥Q", "♥K", "♥A")
+    for seed in range(20):
+        game = CompactGame.determinize(pack, 0, codes(pack, "♣8"), [1, 3], [], 0, 0, 1, 1, Random(seed),
+                                       excluded=[0, excluded], fresh=[0, 0])
+        assert not game.hands[1] & excluded
+
+
+def test_search_without_time_left_still_plays():
+    with SearchAI("Search", iterations=None, time_limit=0.) as player:
+        result = MauMau([player, StupidAI("Stupid")], sink=EventSink(), seed=1).play()
+    assert result.completed
@@ -0,0 +1,33 @@
+import asyncio
+import socket
+
+from maumau.loadgen import generate_load
+from maumau.server import GameServer
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def load_test(server: GameServer, clients: int, games: int, clients_per_table: int):
+    task = asyncio.create_task(server.serve_forever())
+    # Give the server a moment to start listening, like the load command does
+    await asyncio.sleep(.1)
+    try:
+        return await asyncio.wait_for(generate_load(server.host, server.port, clients=clients, games=games,
+                                                    clients_per_table=clients_per_table, seed=0), timeout=60)
+    finally:
+        task.cancel()
+
+
+def test_load_generator_plays_against_the_server():
+    server = GameServer(port=free_port(), seats=3, remote_seats=2, turn_timeout=5., seed=0)
+    report = asyncio.run(load_test(server, clients=4, games=3, clients_per_table=2))
+    assert report.games == 12
+    # Two clients share every table
+    assert server.games_played == 6
+    assert report.tables_per_second > 0
+    assert report.latencies
+    assert 0 < report.latency(.5) <= report.latency(.99)
@@ -0,0 +1,68 @@
+from collections import Counter
+
+import pytest
+
+from cards import load_pack, load_shoe
+from maumau import EventSink, MauMau, StupidAI
+
+
+def test_shoe_has_every_card_once_per_copy():
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    shoe = load_shoe(pack, 3)
+    assert len(shoe.cards) == 3 * len(pack.cards)
+    assert [card.code for card in shoe.cards] == list(range(len(shoe.cards)))
+    assert shoe.masks.all == (1 << len(shoe.cards)) - 1
+    copies = Counter((card.face.index, card.rank.index) for card in shoe.cards)
+    assert len(copies) == len(pack.cards) and set(copies.values()) == {3}
+    # Two packs taken twice each make a shoe of four
+    assert len(load_shoe([pack, pack], 2).cards) == 4 * len(pack.cards)
+
+
+@pytest.mark.parametrize("sources, copies", [
+    ([], 1),
+    (MauMau.DEFAULT_PACK, 0),
+    ([MauMau.DEFAULT_PACK, {"faces": ["♣", "♦"], "ranks": [7, 8, 9, "J", "K"]}], 1),
+])
+def test_invalid_shoes_are_refused(sources, copies):
+    with pytest.raises(ValueError):
+        load_shoe(sources, copies)
+
+
+def test_small_tables_get_the_pack_itself():
+    pack = load_pack(MauMau.DEFAULT_PACK)
+    assert MauMau.shoe_for(4) is pack
+    shoe = MauMau.shoe_for(64)
+    assert len(shoe.cards) >= 64 * 8
+
+
+class RingSink(EventSink):
+    """ Checks the ring of seats still playing whenever a player finishes. """
+
+    game: MauMau
+    checks: int = 0
+
+    def __call__(self, event: str, **data) -> None:
+        if event != "finished":
+            return
+        game = self.game
+        playing = [seat for seat in range(len(game.players)) if seat not in game.finished_seats]
+        seat, ring = playing[0], []
+        for _ in playing:
+            ring.append(seat)
+            assert game.prev_seat[game.next_seat[seat]] == seat
+            seat = game.next_seat[seat]
+        assert seat == playing[0]
+        assert sorted(ring) == playing
+        self.checks += 1
+
+
+def test_large_table_finishes_with_a_valid_seat_ring():
+    players = [StupidAI(f"AI {idx + 1}") for idx in range(64)]
+    sink = RingSink()
+    game = MauMau(players, pack=MauMau.shoe_for(len(players)), sink=sink, seed=0)
+    sink.game = game
+    result = game.play()
+    assert result.completed
+    assert sink.checks == len(players) - 1
+    assert len(result.finishers) == len(set(result.finishers)) == len(players)
+    assert set(result.finishers) == {player.name for player in players}
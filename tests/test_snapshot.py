@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from maumau import EventSink, MauMau, StupidAI
+
+
+def started_game(seed: int, turns: int = 15) -> MauMau:
+    game = MauMau([StupidAI(f"AI {idx + 1}") for idx in range(4)], sink=EventSink(), seed=seed)
+    game.start()
+    for _ in range(turns):
+        if not game.step():
+            break
+    return game
+
+
+def finish(game: MauMau):
+    running = True
+    while running and game.turns < 10_000:
+        running = game.step()
+    return game.outcome(running)
+
+
+def test_restore_repeats_the_game():
+    for seed in range(20):
+        game = started_game(seed)
+        snapshot = game.snapshot(rng_states=True)
+        first = finish(game)
+        game.restore(snapshot)
+        assert game.snapshot(rng_states=True) == snapshot
+        assert finish(game) == first
+
+
+def test_from_snapshot_repeats_the_game():
+    for seed in range(20):
+        game = started_game(seed)
+        snapshot = game.snapshot(rng_states=True)
+        rebuilt = MauMau.from_snapshot(snapshot, [StupidAI(f"AI {idx + 1}") for idx in range(4)])
+        assert rebuilt.snapshot(rng_states=True) == snapshot
+        assert finish(rebuilt) == finish(game)
+
+
+def test_snapshots_leave_out_the_generators_by_default():
+    game = started_game(0)
+    snapshot = game.snapshot()
+    assert snapshot.rng_states == ()
+    assert len(pickle.dumps(snapshot)) < 1000
+    # Restoring the same snapshot twice still repeats the game, if the generators are in the same state both times
+    rebuilt = [MauMau.from_snapshot(snapshot, [StupidAI(f"AI {idx + 1}") for idx in range(4)]) for _ in range(2)]
+    assert finish(rebuilt[0]) == finish(rebuilt[1])
+
+
+def test_clone_is_equivalent_and_independent():
+    for seed in range(20):
+        game = started_game(seed)
+        snapshot = game.snapshot(rng_states=True)
+        clone = game.clone(rng_states=True)
+        assert clone.snapshot(rng_states=True) == snapshot
+        clone_result = finish(clone)
+        # Playing the clone did not touch the original
+        assert game.snapshot(rng_states=True) == snapshot
+        assert finish(game) == clone_result
+
+
+def test_clones_without_generator_states_are_reproducible():
+    for seed in range(20):
+        game = started_game(seed)
+        snapshot = game.snapshot()
+        clones = [game.clone(), game.clone()]
+        assert clones[0].snapshot() == snapshot
+        assert finish(clones[0]) == finish(clones[1])
+        assert game.snapshot() == snapshot
+    with pytest.raises(ValueError):
+        game.clone(seed=1, rng_states=True)
@@ -0,0 +1,20 @@
+import io
+
+from maumau.__main__ import main
+
+
+def test_play_at_the_terminal(monkeypatch, capsys):
+    # Answers that fit every question eventually: draw, play a drawn card, the first card or face
+    monkeypatch.setattr("sys.stdin", io.StringIO("d\ny\n1\n" * 2000))
+    main(["play", "--name", "You", "--bots", "1", "--pace", "0", "--seed", "3"])
+    output = capsys.readouterr().out
+    assert "Your hand: 1:" in output
+    assert "Game abandoned." not in output
+    assert "Game over!" in output
+    assert "You played" in output
+
+
+def test_game_is_abandoned_when_the_input_ends(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO(""))
+    main(["play", "--name", "You", "--bots", "1", "--pace", "0", "--seed", "3", "--no-auto-draw"])
+    assert capsys.readouterr().out.endswith("Game abandoned.\n")
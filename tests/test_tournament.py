@@ -0,0 +1,34 @@
+import pytest
+
+from maumau import StupidAI
+from maumau.tournament import Entrant, Standing, Tournament
+
+
+def entrants(count: int = 3):
+    return [Entrant(f"AI {idx + 1}", StupidAI) for idx in range(count)]
+
+
+def test_chunks_cover_every_game_once():
+    tournament = Tournament(entrants(), games=1050, workers=1, chunk_size=500)
+    assert tournament.chunks() == [(0, 0, 500), (1, 500, 500), (2, 1000, 50)]
+    assert Tournament(entrants(), games=1000, workers=1, chunk_size=500).chunks() == [(0, 0, 500), (1, 500, 500)]
+    assert Tournament(entrants(), games=3, workers=1, chunk_size=500).chunks() == [(0, 0, 3)]
+
+
+def test_standings_do_not_depend_on_the_workers():
+    runs = []
+    for workers in (1, 2):
+        tournament = Tournament(entrants(), games=60, seed=7, workers=workers, chunk_size=10)
+        runs.append((tournament.run(), tournament.aborted))
+    assert runs[0] == runs[1]
+    assert sum(standing.wins for standing in runs[0][0]) == 60 - runs[0][1]
+
+
+def test_wilson_interval():
+    assert Standing("A", games=100, wins=50).confidence_interval() == pytest.approx((0.4038, 0.5962), abs=1e-4)
+    assert Standing("A", games=10, wins=0).confidence_interval() == pytest.approx((0., 0.2775), abs=1e-4)
+    assert Standing("A", games=10, wins=10).confidence_interval() == pytest.approx((0.7225, 1.), abs=1e-4)
+    assert Standing("A").confidence_interval() == (0., 1.)
+    # A wider interval for a higher confidence
+    low, high = Standing("A", games=100, wins=50).confidence_interval(z=2.576)
+    assert low < 0.4038 and high > 0.5962
@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from maumau import StupidAI
+from maumau.players.heuristic import Strategy
+from maumau.tuning import Candidate, Tuner
+
+
+def candidate(wins: str) -> Candidate:
+    return Candidate(wins, Strategy(), wins=bytearray(int(win) for win in wins))
+
+
+def test_paired_z():
+    # Differences 1, 0, 0, 1: mean 0.5, sample variance 1/3
+    assert candidate("1101").paired_z(candidate("0100")) == pytest.approx(0.5 / math.sqrt(1 / 3 / 4))
+    assert candidate("0100").paired_z(candidate("1101")) == pytest.approx(-0.5 / math.sqrt(1 / 3 / 4))
+    # Only the games both played count
+    assert candidate("110100").paired_z(candidate("0100")) == candidate("1101").paired_z(candidate("0100"))
+    assert candidate("1010").paired_z(candidate("1010")) == 0.
+    assert candidate("1111").paired_z(candidate("0000")) == math.inf
+    assert candidate("1").paired_z(candidate("0")) == 0.
+
+
+def test_clearly_worse_candidate_is_dropped_early():
+    tuner = Tuner(opponent=StupidAI, candidates=2, seed=0, workers=1, chunk_size=50, z=2.5)
+    # Playing Jacks first throws them away, which loses far more often than keeping them
+    good, bad = Candidate("good", Strategy()), Candidate("bad", Strategy(wild=2.))
+    losing = tuner.play_round(None, [good, bad], 0, 1000)
+    assert losing == [bad]
+    assert bad.dropped == 0
+    assert good.dropped is None
+    assert good.games == 1000
+    assert bad.games < 500
+    assert bad.games % 50 == 0
+
+
+def test_tuner_halves_until_one_is_left():
+    report = Tuner(opponent=StupidAI, candidates=8, first_games=20, seed=1, workers=1, chunk_size=10).run()
+    assert [dropped for dropped in (candidate.dropped for candidate in report.candidates) if dropped is None] == [None]
+    counts = [round_report.candidates for round_report in report.rounds]
+    assert counts[0] == 8
+    assert all(later < earlier for earlier, later in zip(counts, counts[1:]))
+    # Every game played shows up in exactly one round
+    assert sum(round_report.games for round_report in report.rounds) == report.games
+    assert report.games == sum(candidate.games for candidate in report.candidates)
+    for round_report in report.rounds:
+        assert round_report.games <= round_report.candidates * 20 * 2 ** round_report.round
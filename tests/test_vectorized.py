@@ -0,0 +1,48 @@
+import math
+import statistics
+
+import pytest
+
+from maumau import MauMau, StupidAI
+
+np = pytest.importorskip("numpy")
+from maumau.vectorized import StupidPolicy, VectorizedMauMau, popcount  # noqa: E402
+
+
+def test_random_card_is_uniform_over_the_mask():
+    engine = VectorizedMauMau([StupidPolicy()] * 2, games=1, seed=0)
+    masks = np.full(60_000, (1 << 0) | (1 << 3) | (1 << 15) | (1 << 16) | (1 << 31), dtype=np.uint64)
+    codes, counts = np.unique(engine.random_card(masks), return_counts=True)
+    assert codes.tolist() == [0, 3, 15, 16, 31]
+    assert all(abs(count - 12_000) < 600 for count in counts)
+    assert engine.random_card(np.zeros(3, dtype=np.uint64)).tolist() == [-1, -1, -1]
+
+
+def test_cards_are_never_lost_or_duplicated():
+    engine = VectorizedMauMau([StupidPolicy()] * 4, games=500, seed=1)
+    card_count = len(engine.face_of)
+    while engine.step():
+        held = engine.deck | engine.table | np.bitwise_or.reduce(engine.hands, axis=0)
+        assert (held == (1 << card_count) - 1).all()
+        assert (popcount(engine.deck) + popcount(engine.table) + popcount(engine.hands).sum(axis=0) == card_count).all()
+    assert engine.completed.all()
+
+
+def test_plays_like_the_object_engine():
+    games = 2000
+    names = [f"AI {idx + 1}" for idx in range(4)]
+    results = MauMau.simulate([StupidAI(name) for name in names], games=games, seed=0)
+    engine = VectorizedMauMau([StupidPolicy()] * 4, games=games, seed=0)
+    engine.run()
+    # Both engines draw their games from the same distribution, so their means only differ by noise
+    turns = [result.turns for result in results]
+    error = math.sqrt(statistics.variance(turns) / games + engine.turns.var() / games)
+    assert abs(statistics.mean(turns) - engine.turns.mean()) < 4 * error
+    for seat, name in enumerate(names):
+        wins = sum(result.winner == name for result in results) / games
+        vector_wins = (engine.place[seat] == 0).mean()
+        error = math.sqrt((wins * (1 - wins) + vector_wins * (1 - vector_wins)) / games)
+        assert abs(wins - vector_wins) < 4 * error
+        drawn = [result.cards_drawn[name] for result in results]
+        error = math.sqrt(statistics.variance(drawn) / games + engine.cards_drawn[seat].var() / games)
+        assert abs(statistics.mean(drawn) - engine.cards_drawn[seat].mean()) < 4 * error